@@ -0,0 +1,173 @@
+"""
+Parallel, resumable multi-day backfill for the raw flight tables.
+
+Runs `extract_load_aerodatabox_data` and/or `extract_load_opensky_data` for every day in
+a date range, several days at a time, within an API call budget. Progress is recorded per
+(source, day) in a checkpoint file, so an interrupted backfill picks up where it stopped.
+
+Usage:
+    python backfill.py --start 2025-01-01 --end 2025-01-31 --countries DE,FR,CH,AE \\
+        --max-parallel-days 4 --quota-budget 5000
+"""
+import os
+import logging
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from src.flights_ingestion import extract_load_opensky_data, plan_opensky_windows
+from src.arr_dep_ingestion import extract_load_aerodatabox_data
+from src.raw_schemas import OPENSKY_FLIGHTS
+from snowflake_handler import get_connection_pool
+from utils.checkpoints import CheckpointStore
+from utils.logging import setup_logger
+from utils.metrics import export_run_metrics
+
+OPENSKY_COLUMNS = OPENSKY_FLIGHTS.column_names
+OPENSKY_CREDENTIALS = "credentials/opensky_credentials.json"
+OPENSKY_API = "https://opensky-network.org/api"
+OPENSKY_ENDPOINT = "/flights/all"
+OPENSKY_TABLE = "flights"
+
+AERODATABOX_KEY_PATH = "credentials/aerodatabox_api_key.json"
+AERODATABOX_API = "https://prod.api.market/api/v1/aedbx/aerodatabox"
+AERODATABOX_ENDPOINT = "flights/airports/"
+
+SOURCES = ("aerodatabox", "opensky")
+
+def date_range(start: str, end: str) -> list[str]:
+    """Inclusive list of YYYY-MM-DD strings between start and end."""
+    start_date = datetime.date.fromisoformat(start)
+    end_date = datetime.date.fromisoformat(end)
+    return [
+        (start_date + datetime.timedelta(days=offset)).isoformat()
+        for offset in range((end_date - start_date).days + 1)
+    ]
+
+def estimate_api_calls(source: str, airports: list[str]) -> int:
+    """Minimum number of API calls one day of a source costs."""
+    if source == "aerodatabox":
+        # At least two 12h windows per airport
+        return 2 * len(airports)
+    # One call per /flights/all interval, the interval count doesn't depend on the day
+    return len(plan_opensky_windows("2000-01-01"))
+
+def open_connection():
+    """Pooled connection, closing it hands the session back for the next day."""
+    return get_connection_pool().acquire()
+
+def fetch_airports(countries: list[str]) -> list[str]:
+    """Reads the airports to backfill from the airports table, like the DAG does."""
+    connection = open_connection()
+    try:
+        placeholders = ', '.join(['%s'] * len(countries))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT icao FROM airports WHERE COUNTRY IN ({placeholders})", countries)
+            return [row[0] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+def run_day(source: str, date: str, airports: list[str], checkpoints: CheckpointStore):
+    """Backfills one (source, day) unit on its own Snowflake connection."""
+    key = f"{source}:{date}"
+    connection = open_connection()
+
+    try:
+        if source == "aerodatabox":
+            extract_load_aerodatabox_data(
+                AERODATABOX_KEY_PATH, AERODATABOX_API, AERODATABOX_ENDPOINT, airports, date, connection
+            )
+        else:
+            extract_load_opensky_data(
+                OPENSKY_COLUMNS, OPENSKY_CREDENTIALS, OPENSKY_API, date, OPENSKY_ENDPOINT, OPENSKY_TABLE, connection
+            )
+        checkpoints.mark_completed(key, airports=len(airports) if source == "aerodatabox" else None)
+
+    except Exception as e:
+        checkpoints.mark_failed(key, str(e))
+        raise
+
+    finally:
+        connection.close()
+
+def plan_backfill(dates: list[str], sources: list[str], airports: list[str],
+                  checkpoints: CheckpointStore, quota_budget: int = None) -> list[tuple[str, str]]:
+    """
+    Returns the pending (source, day) units that fit into the API call budget.
+    Units already completed in the checkpoint file are skipped.
+    """
+    completed = checkpoints.completed()
+    planned, budget_used = [], 0
+
+    for date in dates:
+        for source in sources:
+            if f"{source}:{date}" in completed:
+                continue
+
+            cost = estimate_api_calls(source, airports)
+            if quota_budget is not None and budget_used + cost > quota_budget:
+                logging.warning(f"Quota budget of {quota_budget} calls reached, "
+                               f"leaving the remaining days for the next backfill run.")
+                return planned
+
+            planned.append((source, date))
+            budget_used += cost
+
+    logging.info(f"Planned {len(planned)} backfill units, estimated {budget_used} API calls.")
+    return planned
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, help="First day to backfill (YYYY-MM-DD).")
+    parser.add_argument("--end", required=True, help="Last day to backfill, inclusive (YYYY-MM-DD).")
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma separated: aerodatabox,opensky.")
+    parser.add_argument("--airports", help="Comma separated ICAO codes (default: read from the airports table).")
+    parser.add_argument("--countries", default="DE,FR,CH,AE", help="Countries used when --airports is not given.")
+    parser.add_argument("--max-parallel-days", type=int, default=2)
+    parser.add_argument("--quota-budget", type=int, help="Maximum number of API calls this run may spend.")
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.json", help="Checkpoint file for resuming.")
+    parser.add_argument("--log-dir", default="logs", help="Directory of backfill.log.")
+    args = parser.parse_args()
+
+    os.makedirs(args.log_dir, exist_ok=True)
+    setup_logger(os.path.join(args.log_dir, 'backfill.log'))
+
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(sorted(unknown))}")
+
+    airports = []
+    if "aerodatabox" in sources:
+        if args.airports:
+            airports = [icao.strip().upper() for icao in args.airports.split(",") if icao.strip()]
+        else:
+            airports = fetch_airports([country.strip() for country in args.countries.split(",")])
+
+        if not airports:
+            logging.error("No airports to backfill.")
+            raise Exception("noAirportsData")
+
+    checkpoints = CheckpointStore(args.checkpoint)
+    units = plan_backfill(date_range(args.start, args.end), sources, airports, checkpoints, args.quota_budget)
+
+    failures = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.max_parallel_days, thread_name_prefix="backfill") as executor:
+            futures = {executor.submit(run_day, source, date, airports, checkpoints): (source, date) for source, date in units}
+            for future, (source, date) in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Backfill of {source} for {date} failed: {e}")
+                    failures.append((source, date))
+    finally:
+        export_run_metrics("backfill", f"backfill_{args.start}_{args.end}")
+
+    if failures:
+        raise Exception(f"{len(failures)} backfill units failed, rerun the same command to resume.")
+
+    logging.info("Backfill completed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Times the dbt staging models on a local DuckDB database at increasing data sizes, without Snowflake.
+
+For every size, synthetic raw tables are generated with benchmarks/synthetic_data.py (or an existing
+fixture directory written with --raw is used), loaded into a fresh DuckDB file under the schema of
+the raw_layer source, and the models are built with `dbt run --target duckdb` (see
+dbt_project/profiles.yml and dbt_project/macros/snowflake_compat.sql). The last day is held back and
+loaded afterwards, followed by a second dbt run, which times the incremental models' daily run.
+Besides dbt's own timings, each model is then materialized once per --repeat (views run their
+query) and the fastest run is kept.
+
+With --save the timings are written to a JSON file; a later run with --baseline compares against it
+and exits with status 1 when a model got slower by more than --threshold.
+
+Requires dbt-core and dbt-duckdb: pip install -r dbt_project/dbt-dev-requirements.txt
+
+Usage:
+    python benchmarks/bench_dbt_models.py [--airports 50,200,800] [--days 2] [--reloads 2]
+                                          [--select staging] [--repeat 3] [--fixtures DIR]
+                                          [--save timings.json] [--baseline timings.json] [--threshold 0.25]
+"""
+import sys, os
+import re
+import glob
+import json
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import duckdb
+
+from benchmarks.synthetic_data import SyntheticTraffic, write_fixtures, write_airports
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS
+
+DBT_PROJECT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dbt_project")
+SOURCES_FILE = os.path.join(DBT_PROJECT_DIR, "models", "staging", "_sources.yml")
+
+RAW_SCHEMAS = [AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS]
+
+# Slowdowns below this many seconds are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.05
+
+# Timings of a model compared against the baseline: dbt's full build and daily run, and its query
+TIMED_METRICS = ("full_seconds", "incremental_seconds", "seconds")
+
+def source_schema() -> str:
+    """Schema of the raw_layer source, the models read the raw tables from there."""
+    with open(SOURCES_FILE) as f:
+        match = re.search(r"^\s*schema:\s*(\S+)", f.read(), re.M)
+    return match.group(1)
+
+def _column_expression(column) -> str:
+    """Cast of one CSV column to its raw table type, the CSV is read as text."""
+    sql_type = column.sql_type.split()[0]
+    if sql_type.upper() == "TIMESTAMP":
+        # Snowflake's TIMESTAMP (NTZ) keeps the wall clock time of '2025-01-02 14:05+01:00' and drops the offset
+        return f"CAST(regexp_replace({column.name}, '(Z|[+-]\\d\\d:\\d\\d)$', '') AS TIMESTAMP)"
+    return f"CAST({column.name} AS {sql_type})"
+
+def fixture_dates(fixtures_dir: str) -> list[str]:
+    """Days with raw files in a fixture directory."""
+    paths = glob.glob(os.path.join(fixtures_dir, "raw", AIRPORT_DEPARTURES.name, "*.csv.gz"))
+    return sorted(os.path.basename(path)[:-len(".csv.gz")] for path in paths)
+
+def load_raw_tables(database_path: str, fixtures_dir: str, schema: str, dates: list[str], reloads: int) -> dict:
+    """
+    Loads the days `dates` into the raw tables in DuckDB from <fixtures>/raw/<table>/<date>.csv.gz,
+    creating them and the airports table (<fixtures>/airports.csv) as needed. Every file is loaded
+    `reloads` times, an hour apart, like repeated ingestion runs of the same days.
+    Returns the row counts per table.
+    """
+    counts = {}
+    with duckdb.connect(database_path) as connection:
+        connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+
+        for table in RAW_SCHEMAS:
+            files = [os.path.join(fixtures_dir, "raw", table.name, f"{date}.csv.gz") for date in dates]
+            missing = [path for path in files if not os.path.exists(path)]
+            if missing:
+                raise FileNotFoundError(f"No raw files {missing}, write the fixtures with --raw.")
+
+            definitions = ", ".join(f"{column.name} {column.sql_type.split()[0]}" for column in table.columns)
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {schema}.{table.name} ({definitions})")
+
+            names = ", ".join(column.name for column in table.columns)
+            expressions = ", ".join(
+                f"{_column_expression(column)} + INTERVAL ($reload) HOUR" if column.name == "ingestion_timestamp"
+                else _column_expression(column)
+                for column in table.columns
+            )
+            for reload in range(reloads if files else 0):
+                connection.execute(f"INSERT INTO {schema}.{table.name} ({names}) SELECT {expressions} "
+                                   f"FROM read_csv($files, header = true, all_varchar = true)",
+                                   {"files": files, "reload": reload})
+
+            counts[table.name] = connection.execute(f"SELECT count(*) FROM {schema}.{table.name}").fetchone()[0]
+
+        connection.execute(f"CREATE OR REPLACE TABLE {schema}.airports AS "
+                           f"SELECT * FROM read_csv($path, header = true)",
+                           {"path": os.path.join(fixtures_dir, "airports.csv")})
+    return counts
+
+def run_dbt(dbt: str, database_path: str, target_path: str, select: str, full_refresh: bool = False) -> dict:
+    """Builds the selected models on the DuckDB target and returns dbt's run results."""
+    env = dict(os.environ, DBT_DUCKDB_PATH=database_path)
+
+    if not os.path.isdir(os.path.join(DBT_PROJECT_DIR, "dbt_packages")):
+        subprocess.run([dbt, "deps", "--project-dir", DBT_PROJECT_DIR, "--profiles-dir", DBT_PROJECT_DIR],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+
+    command = [dbt, "run", "--project-dir", DBT_PROJECT_DIR, "--profiles-dir", DBT_PROJECT_DIR,
+               "--target", "duckdb", "--target-path", target_path, "--select", select]
+    if full_refresh:
+        command.append("--full-refresh")
+
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"dbt run failed:\n{completed.stdout[-4000:]}{completed.stderr[-4000:]}")
+
+    with open(os.path.join(target_path, "run_results.json")) as f:
+        return json.load(f)
+
+def dbt_seconds(run_results: dict) -> dict:
+    """Execution time of every successfully built model."""
+    return {result["unique_id"].split(".")[-1]: result["execution_time"]
+            for result in run_results["results"] if result["status"] == "success"}
+
+def time_models(database_path: str, run_results: dict, repeat: int) -> dict:
+    """Materializes every built model `repeat` times, returns {model: (rows, fastest seconds)}."""
+    timings = {}
+    with duckdb.connect(database_path) as connection:
+        for result in run_results["results"]:
+            if result["status"] != "success" or not result.get("relation_name"):
+                continue
+
+            model = result["unique_id"].split(".")[-1]
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                connection.execute(f"CREATE OR REPLACE TEMP TABLE bench_model AS SELECT * FROM {result['relation_name']}")
+                seconds.append(time.perf_counter() - start)
+
+            rows = connection.execute("SELECT count(*) FROM bench_model").fetchone()[0]
+            timings[model] = (rows, min(seconds))
+        connection.execute("DROP TABLE IF EXISTS bench_model")
+    return timings
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Timings slower than their baseline by more than `threshold` (ratio) and MIN_REGRESSION_SECONDS."""
+    regressions = []
+    for size, models in results.items():
+        for model, timing in models.items():
+            previous = baseline.get(size, {}).get(model, {})
+            for metric in TIMED_METRICS:
+                seconds, previous_seconds = timing.get(metric), previous.get(metric)
+                if seconds is None or previous_seconds is None:
+                    continue
+                if seconds > previous_seconds * (1 + threshold) and seconds - previous_seconds > MIN_REGRESSION_SECONDS:
+                    regressions.append((size, model, metric, previous_seconds, seconds))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--airports", default="50,200,800", help="Comma-separated airport counts, one data size each.")
+    parser.add_argument("--days", type=int, default=2, help="Days of the full build, one more day is loaded after it.")
+    parser.add_argument("--start", default="2025-01-02", help="First day (YYYY-MM-DD).")
+    parser.add_argument("--flights-per-airport", type=int, default=600)
+    parser.add_argument("--reloads", type=int, default=2,
+                        help="Times every raw file is loaded, so the models' deduplication has work to do.")
+    parser.add_argument("--fixtures", help="Use this fixture directory (synthetic_data.py --raw) instead of generating sizes.")
+    parser.add_argument("--select", default="staging", help="dbt node selection.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dbt", default=shutil.which("dbt") or "dbt", help="dbt executable.")
+    parser.add_argument("--save", help="Write the timings to this JSON file.")
+    parser.add_argument("--baseline", help="Timings JSON of an earlier run to check for regressions.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio before failing.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated fixtures and DuckDB files.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_dbt_models_")
+    schema = source_schema()
+    start = datetime.datetime.strptime(args.start, "%Y-%m-%d")
+    generated_dates = [(start + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(args.days + 1)]
+
+    if args.fixtures:
+        sizes = [(os.path.basename(os.path.normpath(args.fixtures)), args.fixtures)]
+    else:
+        sizes = [(f"{count}_airports", None) for count in (int(count) for count in args.airports.split(","))]
+
+    results = {}
+    try:
+        for size, fixtures_dir in sizes:
+            if fixtures_dir is None:
+                fixtures_dir = os.path.join(work_dir, size)
+                traffic = SyntheticTraffic(int(size.split("_")[0]), args.flights_per_airport)
+                write_airports(traffic, fixtures_dir)
+                write_fixtures(traffic, fixtures_dir, generated_dates, raw=True)
+                dates = generated_dates
+            else:
+                dates = fixture_dates(fixtures_dir)
+
+            # A single day of fixtures can only be built in full
+            full_dates, daily_dates = (dates[:-1], dates[-1:]) if len(dates) > 1 else (dates, [])
+            database_path = os.path.join(work_dir, f"{size}.duckdb")
+            target_path = os.path.join(work_dir, f"target_{size}")
+
+            load_raw_tables(database_path, fixtures_dir, schema, full_dates, args.reloads)
+            run_results = run_dbt(args.dbt, database_path, target_path, args.select, full_refresh=True)
+            full_seconds = dbt_seconds(run_results)
+
+            incremental_seconds = {}
+            counts = load_raw_tables(database_path, fixtures_dir, schema, daily_dates, args.reloads)
+            if daily_dates:
+                run_results = run_dbt(args.dbt, database_path, target_path, args.select)
+                incremental_seconds = dbt_seconds(run_results)
+
+            timings = time_models(database_path, run_results, args.repeat)
+
+            print(f"\n{size}: " + ", ".join(f"{table} {rows:,}" for table, rows in counts.items())
+                  + f" raw rows, {len(full_dates)} day(s) + {len(daily_dates)} incremental")
+            print(f"{'model':<32} {'rows':>10} {'full s':>8} {'daily s':>8} {'query s':>8}")
+            results[size] = {}
+            for model, (rows, seconds) in sorted(timings.items()):
+                incremental = incremental_seconds.get(model)
+                print(f"{model:<32} {rows:>10,} {full_seconds.get(model, 0):>8.3f} "
+                      f"{incremental if incremental is not None else float('nan'):>8.3f} {seconds:>8.3f}")
+                results[size][model] = {"rows": rows, "full_seconds": full_seconds.get(model),
+                                        "incremental_seconds": incremental, "seconds": seconds}
+    finally:
+        if args.keep:
+            print(f"\nFixtures and databases kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for size, model, metric, previous_seconds, seconds in regressions:
+            print(f"REGRESSION {size} {model} {metric}: {previous_seconds:.3f}s -> {seconds:.3f}s")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo model slower than the baseline by more than {args.threshold:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+End-to-end throughput of extract_load_aerodatabox_data and extract_load_opensky_data, offline.
+
+The APIs are served by benchmarks/replay_server.py (recorded fixtures or synthetic payloads, with
+configurable latency) in a child process, and Snowflake is replaced by the stand-in connections of
+benchmarks/warehouse_stub.py with simulated statement and load costs. Each airport count runs
+against a fresh server and warehouse; OpenSky volume scales with the airport count.
+
+Usage:
+    python benchmarks/bench_end_to_end.py [--airports 10,100,1000] [--sources aerodatabox,opensky]
+                                          [--latency-ms 150] [--jitter-ms 50] [--fixtures DIR]
+"""
+import sys, os
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep tokens, unit checkpoints and cached responses of the benchmark away from real runs,
+# set before the ingestion modules read them at import time
+_bench_dir = tempfile.mkdtemp(prefix="bench_end_to_end_")
+os.environ["OPENSKY_TOKEN_CACHE_PATH"] = os.path.join(_bench_dir, "opensky_token_cache.json")
+os.environ["INGESTION_CHECKPOINTS"] = "off"
+os.environ.pop("API_CACHE_DIR", None)
+os.environ["AERODATABOX_WINDOW_HINTS_PATH"] = os.path.join(_bench_dir, "window_hints.json")
+os.environ["AERODATABOX_API_KEY"] = "replay-key"
+os.environ["OPENSKY_CLIENT_ID"] = "replay-client"
+os.environ["OPENSKY_CLIENT_SECRET"] = "replay-secret"
+
+from benchmarks.replay_server import replay_server_process, DEFAULT_MOVEMENTS_PER_AIRPORT
+from benchmarks.warehouse_stub import StubWarehouse, DEFAULT_STATEMENT_SECONDS, DEFAULT_COPY_ROWS_PER_SECOND
+from src.arr_dep_ingestion import extract_load_aerodatabox_data
+from src.flights_ingestion import extract_load_opensky_data
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS
+from utils.http_session import close_session
+from utils.metrics import get_metrics, reset_metrics
+
+DATE = "2025-01-02"
+
+def airport_codes(count: int, fixtures_dir: str = None) -> list[str]:
+    """Airports with fixtures for DATE first, then synthetic codes."""
+    codes = []
+    fixture_day = os.path.join(fixtures_dir, "aerodatabox", DATE) if fixtures_dir else None
+    if fixture_day and os.path.isdir(fixture_day):
+        codes = sorted(name[:-len(".json")] for name in os.listdir(fixture_day) if name.endswith(".json"))[:count]
+
+    i = 0
+    while len(codes) < count:
+        code = f"X{i:03d}"
+        if code not in codes:
+            codes.append(code)
+        i += 1
+    return codes
+
+def run_scenario(source: str, airport_count: int, args) -> dict:
+    """Runs one extract-load against a fresh replay server and warehouse, returns its measurements."""
+    airports = airport_codes(airport_count, args.fixtures)
+    warehouse = StubWarehouse(args.statement_ms / 1000, args.copy_rows_per_second)
+
+    with replay_server_process(fixtures=args.fixtures, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                               movements=args.movements,
+                               opensky_flights=airport_count * args.opensky_flights_per_airport) as url:
+        os.environ["OPENSKY_AUTH_URL"] = f"{url}/auth/token"
+        # New server port, so no pooled HTTP connections to reuse
+        close_session()
+        reset_metrics()
+        connection = warehouse.connect()
+
+        start = time.perf_counter()
+        if source == "aerodatabox":
+            extract_load_aerodatabox_data(None, f"{url}/aerodatabox", "flights/airports/", airports, DATE,
+                                          connection, connection_factory=warehouse.connect)
+            tables = [AIRPORT_DEPARTURES.name, AIRPORT_ARRIVALS.name]
+        else:
+            extract_load_opensky_data(OPENSKY_FLIGHTS.column_names, None, f"{url}/opensky", DATE,
+                                      "/flights/all", OPENSKY_FLIGHTS.name, connection)
+            tables = [OPENSKY_FLIGHTS.name]
+        elapsed = time.perf_counter() - start
+
+    metrics = get_metrics()
+    summary = metrics.summary()
+    loaded_rows = sum(warehouse.row_count(table) for table in tables)
+    load_rates = [rate for table, rate in summary["rows_loaded_per_second"].items() if table in tables and rate]
+
+    return {
+        "requests": int(metrics.counter_total("ingestion_requests_total", source=source)),
+        "parsed_rows": int(metrics.counter_total("ingestion_rows_parsed_total", source=source)),
+        "loaded_rows": loaded_rows,
+        "seconds": elapsed,
+        "parse_rate": summary["rows_parsed_per_second"].get(source),
+        "load_rate": min(load_rates) if load_rates else None,
+        "statements": sum(warehouse.statements.values()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--airports", default="10,100,1000", help="Comma-separated airport counts.")
+    parser.add_argument("--sources", default="aerodatabox,opensky")
+    parser.add_argument("--fixtures", help="Fixture directory replayed by the server (see replay_server.py).")
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--movements", type=int, default=DEFAULT_MOVEMENTS_PER_AIRPORT,
+                        help="Synthetic AeroDataBox movements per airport and day.")
+    parser.add_argument("--opensky-flights-per-airport", type=int, default=100)
+    parser.add_argument("--statement-ms", type=float, default=DEFAULT_STATEMENT_SECONDS * 1000,
+                        help="Simulated round trip of every warehouse statement.")
+    parser.add_argument("--copy-rows-per-second", type=float, default=DEFAULT_COPY_ROWS_PER_SECOND)
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="Requests per second allowed by the rate limiters (the real quotas would dominate).")
+    parser.add_argument("--verbose", action="store_true", help="Show the ingestion logs.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    for source in ("AERODATABOX", "OPENSKY"):
+        os.environ[f"{source}_RATE_PER_SECOND"] = str(args.rate)
+        os.environ[f"{source}_BURST"] = str(args.rate)
+
+    print(f"{'source':<12} {'airports':>8} {'requests':>9} {'rows':>10} {'seconds':>8} {'rows/s':>10} "
+          f"{'req/s':>7} {'parse rows/s':>13} {'load rows/s':>12} {'statements':>10}")
+
+    for source in args.sources.split(","):
+        for airport_count in (int(count) for count in args.airports.split(",")):
+            result = run_scenario(source, airport_count, args)
+
+            if source == "aerodatabox" and result["loaded_rows"] != result["parsed_rows"]:
+                print(f"  warning: {result['parsed_rows']} rows parsed but {result['loaded_rows']} loaded")
+
+            print(f"{source:<12} {airport_count:>8} {result['requests']:>9,} {result['loaded_rows']:>10,} "
+                  f"{result['seconds']:>8.1f} {result['loaded_rows'] / result['seconds']:>10,.0f} "
+                  f"{result['requests'] / result['seconds']:>7.1f} {result['parse_rate'] or 0:>13,.0f} "
+                  f"{result['load_rate'] or 0:>12,.0f} {result['statements']:>10}")
+
+if __name__ == "__main__":
+    main()
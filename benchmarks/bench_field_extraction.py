@@ -0,0 +1,111 @@
+"""
+Microbenchmark for AeroDataBox record parsing.
+
+Compares the previous `get_value` based parsing (path split + dict walk per field,
+dict per record, then dict-to-tuple re-ordering) against the compiled extractors, with the
+field maps of both write modes (append leaves content_hash NULL, merge hashes every column).
+
+Usage:
+    python benchmarks/bench_field_extraction.py [--payload recorded_response.json] [--records 200000]
+"""
+import sys, os
+import json
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.arr_dep_ingestion import get_value
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS
+from utils.field_extraction import hash_record, compile_extractor
+from utils.upsert import WRITE_MODE_APPEND, WRITE_MODE_MERGE
+
+def legacy_parser(fields):
+    """Rebuilds the previous parsing path from a field map."""
+    columns = [column for column, _ in fields]
+    paths = [(column, source) for column, source in fields if source and not source.startswith(("$", "#"))]
+    hashes = [(column, source) for column, source in fields if source and source.startswith("#")]
+
+    def parse(record, flight_date, airport_icao):
+        rec = {column: get_value(record, path) for column, path in paths}
+        rec["flight_date"] = flight_date
+        rec["airport_icao"] = airport_icao
+        for column, source in hashes:
+            rec[column] = hash_record(source, rec)
+        return tuple(rec.get(col) for col in columns)
+
+    return parse
+
+def synthetic_movement(i: int) -> dict:
+    """One AeroDataBox-shaped movement with the nesting depth of a real response."""
+    hour = i % 24
+    return {
+        "number": f"LH {1000 + i % 9000}",
+        "callSign": f"DLH{i % 999}" if i % 7 else None,
+        "status": random.choice(["Departed", "Arrived", "Expected", "Delayed"]),
+        "codeshareStatus": random.choice(["IsOperator", "IsCodeshared"]),
+        "isCargo": i % 20 == 0,
+        "aircraft": {"reg": f"D-A{i % 999:03d}", "modeS": f"3C{i % 9999:04X}", "model": "Airbus A320"},
+        "airline": {"name": "Lufthansa", "iata": "LH", "icao": "DLH"},
+        "departure": {
+            "airport": {"icao": "EDDF", "iata": "FRA", "name": "Frankfurt-am-Main", "timeZone": "Europe/Berlin"},
+            "scheduledTime": {"utc": f"2025-01-02 {hour:02d}:00Z", "local": f"2025-01-02 {hour:02d}:00+01:00"},
+            "revisedTime": {"utc": f"2025-01-02 {hour:02d}:05Z", "local": f"2025-01-02 {hour:02d}:05+01:00"},
+            "terminal": "1", "runway": "25C",
+        },
+        "arrival": {
+            "airport": {"icao": "LFPG", "iata": "CDG", "name": "Paris Charles de Gaulle", "timeZone": "Europe/Paris"},
+            "scheduledTime": {"utc": f"2025-01-02 {hour:02d}:55Z", "local": f"2025-01-02 {hour:02d}:55+01:00"},
+            "terminal": "2F", "gate": "F22", "baggageBelt": "6",
+        },
+    }
+
+def load_records(payload_path: str, n_records: int) -> list:
+    if payload_path:
+        with open(payload_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Accept either a raw API response or a plain list of movements
+        records = data.get("departures", []) + data.get("arrivals", []) if isinstance(data, dict) else data
+        # Repeat the recorded movements until the requested volume is reached
+        return [records[i % len(records)] for i in range(max(n_records, len(records)))]
+    return [synthetic_movement(i) for i in range(n_records)]
+
+def bench(parse, records, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for record in records:
+            parse(record, "2025-01-02", "EDDF")
+        best = min(best, time.perf_counter() - start)
+    return len(records) / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", help="Recorded AeroDataBox response (JSON) to replay.")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    records = load_records(args.payload, args.records)
+
+    for label, schema, mode in (
+        ("departures", AIRPORT_DEPARTURES, WRITE_MODE_APPEND),
+        ("departures", AIRPORT_DEPARTURES, WRITE_MODE_MERGE),
+        ("arrivals", AIRPORT_ARRIVALS, WRITE_MODE_APPEND),
+        ("arrivals", AIRPORT_ARRIVALS, WRITE_MODE_MERGE),
+    ):
+        fields = schema.write_fields(mode)
+        legacy = legacy_parser(fields)
+        compiled = compile_extractor(fields, ("flight_date", "airport_icao"), f"parse_{label}_{mode}")
+
+        # Both paths must agree before their speed is worth comparing
+        sample = records[:1000]
+        assert [legacy(r, "2025-01-02", "EDDF") for r in sample] == [compiled(r, "2025-01-02", "EDDF") for r in sample]
+
+        before = bench(legacy, records, args.repeats)
+        after = bench(compiled, records, args.repeats)
+        print(f"{label:<10} {mode:<6} get_value: {before:>12,.0f} rec/s   compiled: {after:>12,.0f} rec/s   speedup: {after / before:.1f}x")
+
+if __name__ == "__main__":
+    main()
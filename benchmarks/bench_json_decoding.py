@@ -0,0 +1,125 @@
+"""
+Benchmark for decoding API payloads into row tuples.
+
+Compares the previous path (`response.json()` dict trees, then row extraction) against
+PayloadDecoder with every installed backend (msgspec typed structs, orjson, json),
+reporting the best parse time and the peak traced memory of one decode.
+
+Usage:
+    python benchmarks/bench_json_decoding.py [--payload recorded_response.json] [--records 50000]
+"""
+import sys, os
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_field_extraction import synthetic_movement
+from src.arr_dep_ingestion import DEPARTURE_FIELDS, ARRIVAL_FIELDS, parse_departure_record, parse_arrival_record
+from src.raw_schemas import OPENSKY_FLIGHTS
+from utils.fast_json import PayloadDecoder, msgspec, orjson
+
+OPENSKY_COLUMNS = OPENSKY_FLIGHTS.column_names
+
+def synthetic_opensky_flight(i: int) -> dict:
+    """One /flights/all item."""
+    first_seen = 1735776000 + i % 86400
+    return {
+        "icao24": f"{i % 0xFFFFFF:06x}",
+        "firstSeen": first_seen,
+        "estDepartureAirport": random.choice(["EDDF", "LFPG", "LSZH", None]),
+        "lastSeen": first_seen + 3600,
+        "estArrivalAirport": random.choice(["OMDB", "EDDM", None]),
+        "callsign": f"DLH{i % 999:<5}",
+        "estDepartureAirportHorizDistance": random.randint(0, 5000),
+        "estDepartureAirportVertDistance": random.randint(0, 500),
+        "estArrivalAirportHorizDistance": random.randint(0, 5000),
+        "estArrivalAirportVertDistance": random.randint(0, 500),
+        "departureAirportCandidatesCount": random.randint(0, 3),
+        "arrivalAirportCandidatesCount": random.randint(0, 3),
+    }
+
+def aerodatabox_payload(payload_path: str, n_records: int) -> bytes:
+    if payload_path:
+        with open(payload_path, 'rb') as f:
+            return f.read()
+    half = n_records // 2
+    return json.dumps({
+        "departures": [synthetic_movement(i) for i in range(half)],
+        "arrivals": [synthetic_movement(i) for i in range(half, n_records)],
+    }).encode()
+
+def legacy_aerodatabox(content: bytes):
+    data = json.loads(content)
+    return (
+        [parse_departure_record(d, "2025-01-02", "EDDF") for d in data.get("departures", [])],
+        [parse_arrival_record(a, "2025-01-02", "EDDF") for a in data.get("arrivals", [])],
+    )
+
+def legacy_opensky(content: bytes):
+    data = json.loads(content)
+    return ([tuple(item.get(col) for col in OPENSKY_COLUMNS[0:-1]) + ("2025-01-02",) for item in data],)
+
+def measure(decode, content: bytes, repeats: int):
+    """Returns (best seconds, peak traced bytes) of decode(content)."""
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        decode(content)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = decode(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", help="Recorded AeroDataBox response (JSON) to replay.")
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = ["json"] + [name for name, module in (("orjson", orjson), ("msgspec", msgspec)) if module is not None]
+
+    aerodatabox_decoders = {
+        backend: PayloadDecoder([("departures", DEPARTURE_FIELDS), ("arrivals", ARRIVAL_FIELDS)],
+                                ("flight_date", "airport_icao"), "aerodatabox", backend)
+        for backend in backends
+    }
+    opensky_decoders = {
+        backend: PayloadDecoder([(None, OPENSKY_FLIGHTS.fields)], ("record_date",), "opensky", backend)
+        for backend in backends
+    }
+
+    cases = (
+        ("aerodatabox", aerodatabox_payload(args.payload, args.records), legacy_aerodatabox,
+         lambda decoder: lambda content: decoder.decode(content, "2025-01-02", "EDDF"), aerodatabox_decoders),
+        ("opensky", json.dumps([synthetic_opensky_flight(i) for i in range(args.records)]).encode(), legacy_opensky,
+         lambda decoder: lambda content: decoder.decode(content, "2025-01-02"), opensky_decoders),
+    )
+
+    for label, content, legacy, bind, decoders in cases:
+        print(f"{label}: {len(content) / 1e6:.1f} MB payload")
+        expected = legacy(content)
+        before, before_peak = measure(legacy, content, args.repeats)
+        print(f"  {'response.json()':<16} {before * 1000:>9.1f} ms   peak {before_peak / 1e6:>8.1f} MB")
+
+        for backend, decoder in decoders.items():
+            decode = bind(decoder)
+            # All paths must give identical rows before their speed is worth comparing
+            assert decode(content) == expected, f"{backend} rows differ from the previous path"
+            seconds, peak = measure(decode, content, args.repeats)
+            print(f"  {backend:<16} {seconds * 1000:>9.1f} ms   peak {peak / 1e6:>8.1f} MB   "
+                  f"speedup: {before / seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
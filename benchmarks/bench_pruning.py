@@ -0,0 +1,241 @@
+"""
+Micro-partitions scanned by the staging models' filters on the raw tables, before and after sorted loads.
+
+Offline (default), every day's AeroDataBox and OpenSky rows are fetched the way the ingestion does, from
+benchmarks/replay_server.py (fixtures or synthetic payloads), and cut into micro-partitions the way the
+loaders create them: each load batch gets its own partitions of at most --partition-rows rows, which keep
+the min/max of the filtered columns like Snowflake's partition metadata. A filter scans the partitions
+whose ranges overlap it. "unsorted" keeps the rows in fetch order, as loaded before, "sorted" applies
+utils.record_buffer.sort_rows on the clustering keys of src/raw_schemas.py first.
+
+With --snowflake the filters run against the real raw tables instead; partitions scanned and total come
+from the TableScan operator statistics of each query, next to SYSTEM$CLUSTERING_INFORMATION. Save a run
+with --save and pass it as --compare to a later one (e.g. after the clustering key was set and the
+tables reclustered) to see both side by side.
+
+Filters (the incremental staging models read whole days, the per-airport views one airport of a day):
+    day          flight_date / record_date = last day
+    lookback     flight_date / record_date >= last day - --lookback-days
+    airport_day  flight_date = last day AND airport_icao = <airport>, averaged over --sample-airports
+
+Usage:
+    python benchmarks/bench_pruning.py [--airports 100] [--days 5] [--fixtures DIR] [--partition-rows 100000]
+    python benchmarks/bench_pruning.py --snowflake [--date 2025-01-05] [--save before.json] [--compare before.json]
+"""
+import sys, os
+import json
+import logging
+import argparse
+import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_end_to_end import airport_codes
+from benchmarks.replay_server import replay_server_process, DEFAULT_MOVEMENTS_PER_AIRPORT
+from src.arr_dep_ingestion import fetch_aerodatabox_data
+from src.flights_ingestion import fetch_opensky_flight_data
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS
+from utils.http_session import close_session
+from utils.parallel_loader import DEFAULT_INITIAL_BATCH_ROWS
+from utils.record_buffer import sort_rows
+
+RAW_SCHEMAS = [AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS]
+
+# Snowflake micro-partitions hold 50-500 MB uncompressed, roughly this many raw rows at most
+DEFAULT_PARTITION_ROWS = 100_000
+
+def date_column(schema) -> str:
+    return schema.cluster_by[0]
+
+def table_filters(schema, last_date: str, lookback_days: int, airports: list) -> dict:
+    """Filters of one raw table as {name: [{column: (low, high)}, ...]}, one range set per query."""
+    column = date_column(schema)
+    first_date = (datetime.datetime.strptime(last_date, "%Y-%m-%d") - datetime.timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+
+    filters = {
+        "day": [{column: (last_date, last_date)}],
+        "lookback": [{column: (first_date, "9999-12-31")}],
+    }
+    if "airport_icao" in schema.cluster_by:
+        filters["airport_day"] = [{column: (last_date, last_date), "airport_icao": (airport, airport)} for airport in airports]
+    return filters
+
+class PartitionedTable:
+    """Min/max metadata of the micro-partitions that the loads of one raw table created."""
+
+    def __init__(self, schema, columns: list):
+        self.positions = {name: schema.column_names.index(name) for name in columns}
+        self.partitions = []
+
+    def load(self, rows, batch_rows: int, partition_rows: int):
+        """Appends the partitions of one load, batch by batch like utils.parallel_loader.load_in_batches."""
+        for batch_start in range(0, len(rows), batch_rows):
+            batch = rows[batch_start:batch_start + batch_rows]
+            for start in range(0, len(batch), partition_rows):
+                partition = batch[start:start + partition_rows]
+                self.partitions.append({
+                    name: (min(values), max(values)) if values else (None, None)
+                    for name, position in self.positions.items()
+                    for values in [[row[position] for row in partition if row[position] is not None]]
+                })
+
+    def scanned(self, ranges: dict) -> int:
+        """Partitions whose min/max overlap every range of the filter."""
+        return sum(
+            1 for partition in self.partitions
+            if all(partition[name][0] is not None and partition[name][0] <= high and low <= partition[name][1]
+                   for name, (low, high) in ranges.items())
+        )
+
+def offline_report(args) -> dict:
+    """Fetches the days from the replay server and simulates the partitions of unsorted and sorted loads."""
+    airports = airport_codes(args.airports, args.fixtures)
+    start = datetime.datetime.strptime(args.start, "%Y-%m-%d")
+    dates = [(start + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(args.days)]
+
+    tables = {
+        (schema.name, order): PartitionedTable(schema, schema.cluster_by)
+        for schema in RAW_SCHEMAS for order in ("unsorted", "sorted")
+    }
+
+    with replay_server_process(fixtures=args.fixtures, movements=args.movements,
+                               opensky_flights=args.airports * args.opensky_flights_per_airport) as url:
+        os.environ["OPENSKY_AUTH_URL"] = f"{url}/auth/token"
+        close_session()
+
+        for date in dates:
+            _, _, departures, arrivals = fetch_aerodatabox_data(None, f"{url}/aerodatabox", "flights/airports/", airports, date)
+            flights, _ = fetch_opensky_flight_data(OPENSKY_FLIGHTS.column_names, None, f"{url}/opensky", "/flights/all", date)
+
+            for schema, rows in ((AIRPORT_DEPARTURES, departures), (AIRPORT_ARRIVALS, arrivals), (OPENSKY_FLIGHTS, flights)):
+                rows = list(rows)
+                tables[(schema.name, "unsorted")].load(rows, args.batch_rows, args.partition_rows)
+                sort_rows(rows, schema.cluster_indices(schema.column_names))
+                tables[(schema.name, "sorted")].load(rows, args.batch_rows, args.partition_rows)
+            print(f"{date}: {len(departures):,} departures, {len(arrivals):,} arrivals, {len(flights):,} flights fetched", flush=True)
+
+    sample = airports[:args.sample_airports]
+    results = {}
+    for schema in RAW_SCHEMAS:
+        for name, queries in table_filters(schema, dates[-1], args.lookback_days, sample).items():
+            results.setdefault(schema.name, {})[name] = {
+                order: {
+                    "scanned": sum(tables[(schema.name, order)].scanned(ranges) for ranges in queries) / len(queries),
+                    "total": len(tables[(schema.name, order)].partitions),
+                }
+                for order in ("unsorted", "sorted")
+            }
+    return results
+
+def _sql_predicate(ranges: dict) -> str:
+    return " AND ".join(
+        f"{name} = '{low}'" if low == high else f"{name} >= '{low}'"
+        for name, (low, high) in ranges.items()
+    )
+
+def snowflake_report(args) -> dict:
+    """Runs the filters against the raw tables and reads their pruning statistics."""
+    from snowflake_handler import get_connection_pool
+
+    connection = get_connection_pool().acquire()
+    results = {}
+    try:
+        with connection.cursor() as cursor:
+            # Cached results skip the scan, and so its statistics
+            cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+            for schema in RAW_SCHEMAS:
+                column = date_column(schema)
+                last_date = args.date or str(cursor.execute(f"SELECT MAX({column}) FROM {schema.name}").fetchone()[0])
+                airports = []
+                if "airport_icao" in schema.cluster_by:
+                    airports = [row[0] for row in cursor.execute(
+                        f"SELECT DISTINCT airport_icao FROM {schema.name} WHERE {column} = %s ORDER BY 1 LIMIT %s",
+                        (last_date, args.sample_airports)).fetchall()]
+
+                clustering = json.loads(cursor.execute(
+                    f"SELECT SYSTEM$CLUSTERING_INFORMATION('{schema.name}', '({', '.join(schema.cluster_by)})')"
+                ).fetchone()[0])
+                print(f"{schema.name}: {clustering.get('total_partition_count')} partitions, "
+                      f"average depth {clustering.get('average_depth')}, average overlaps {clustering.get('average_overlaps')}")
+
+                for name, queries in table_filters(schema, last_date, args.lookback_days, airports).items():
+                    scanned, total = 0, 0
+                    for ranges in queries:
+                        # An aggregate over a non-key column can't be answered from partition metadata
+                        cursor.execute(f"SELECT SUM(LENGTH(icao24 || callsign)) FROM {schema.name} WHERE {_sql_predicate(ranges)}"
+                                       if schema is OPENSKY_FLIGHTS else
+                                       f"SELECT SUM(LENGTH(number || status)) FROM {schema.name} WHERE {_sql_predicate(ranges)}")
+                        stats = cursor.execute(
+                            "SELECT operator_statistics:pruning:partitions_scanned::INT, "
+                            "operator_statistics:pruning:partitions_total::INT "
+                            "FROM TABLE(GET_QUERY_OPERATOR_STATS(LAST_QUERY_ID())) WHERE operator_type = 'TableScan'"
+                        ).fetchone()
+                        scanned += stats[0] or 0
+                        total = max(total, stats[1] or 0)
+                    results.setdefault(schema.name, {})[name] = {
+                        "current": {"scanned": scanned / max(len(queries), 1), "total": total}
+                    }
+    finally:
+        connection.close()
+    return results
+
+def print_report(results: dict, compare: dict = None):
+    columns = list(next(iter(next(iter(results.values())).values())))
+    if compare:
+        columns = ["before"] + columns
+
+    print(f"\n{'table':<20} {'filter':<12} " + " ".join(f"{column + ' scanned/total':>24}" for column in columns)
+          + f" {'pruned':>8}")
+    for table, filters in results.items():
+        for name, orders in filters.items():
+            if compare:
+                # A saved --snowflake run has its "current" numbers, an offline one is compared by its sorted loads
+                previous = compare.get(table, {}).get(name, {})
+                orders = dict(orders, before=previous.get("current") or previous.get("sorted"))
+            cells = []
+            for column in columns:
+                value = orders.get(column)
+                cells.append(f"{value['scanned']:>12,.1f} / {value['total']:<9,}" if value else f"{'-':>24}")
+            last = orders[columns[-1]]
+            print(f"{table:<20} {name:<12} " + " ".join(cells)
+                  + f" {1 - last['scanned'] / last['total'] if last['total'] else 0:>8.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snowflake", action="store_true", help="Measure the real raw tables instead of simulating.")
+    parser.add_argument("--airports", type=int, default=100)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--start", default="2025-01-02", help="First simulated day (YYYY-MM-DD).")
+    parser.add_argument("--date", help="Day the --snowflake filters use, the newest loaded day by default.")
+    parser.add_argument("--fixtures", help="Fixture directory replayed by the server (see replay_server.py).")
+    parser.add_argument("--movements", type=int, default=DEFAULT_MOVEMENTS_PER_AIRPORT,
+                        help="Synthetic AeroDataBox movements per airport and day.")
+    parser.add_argument("--opensky-flights-per-airport", type=int, default=100)
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_INITIAL_BATCH_ROWS, help="Rows per load batch.")
+    parser.add_argument("--partition-rows", type=int, default=DEFAULT_PARTITION_ROWS)
+    parser.add_argument("--lookback-days", type=int, default=3)
+    parser.add_argument("--sample-airports", type=int, default=10)
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Results JSON of an earlier run, shown as 'before'.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    for source in ("AERODATABOX", "OPENSKY"):
+        os.environ[f"{source}_RATE_PER_SECOND"] = "1000"
+        os.environ[f"{source}_BURST"] = "1000"
+
+    results = snowflake_report(args) if args.snowflake else offline_report(args)
+
+    compare = None
+    if args.compare:
+        with open(args.compare) as f:
+            compare = json.load(f)
+    print_report(results, compare)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
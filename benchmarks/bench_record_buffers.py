@@ -0,0 +1,93 @@
+"""
+Peak RSS benchmark for the parse -> load hand-off of AeroDataBox rows.
+
+Simulates a full day for a country-filtered airport list: every (airport, window) unit is
+parsed into row tuples and collected, either into plain lists (previous hand-off) or into
+ColumnarBuffers. Each variant runs in its own process, so its peak RSS is measured alone.
+
+Usage:
+    python benchmarks/bench_record_buffers.py [--airports 60] [--movements 900]
+"""
+import sys, os
+import random
+import resource
+import argparse
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_field_extraction import synthetic_movement
+from src.arr_dep_ingestion import DEPARTURE_COLUMNS, ARRIVAL_COLUMNS, parse_departure_record, parse_arrival_record
+from utils.record_buffer import ColumnarBuffer
+
+WINDOWS_PER_AIRPORT = 2
+
+def unit_rows(airport_index: int, window: int, movements: int):
+    """Parsed (departure_rows, arrival_rows) of one unit, with per-airport names and codes."""
+    rng = random.Random(airport_index * 100 + window)
+    airport_icao = f"ED{airport_index:02d}"
+
+    departures, arrivals = [], []
+    for i in range(movements // WINDOWS_PER_AIRPORT):
+        movement = synthetic_movement(rng.randrange(1_000_000))
+        movement["departure"]["airport"]["icao"] = airport_icao
+        movement["arrival"]["airport"]["icao"] = f"LF{rng.randrange(80):02d}"
+        movement["airline"]["name"] = f"Airline {rng.randrange(150)}"
+        target = departures if i % 2 else arrivals
+        parse = parse_departure_record if i % 2 else parse_arrival_record
+        target.append(parse(movement, "2025-01-02", airport_icao))
+    return departures, arrivals
+
+def run_variant(variant: str, airports: int, movements: int):
+    if variant == "lists":
+        departure_records, arrival_records = [], []
+    else:
+        departure_records, arrival_records = ColumnarBuffer(DEPARTURE_COLUMNS), ColumnarBuffer(ARRIVAL_COLUMNS)
+
+    for airport_index in range(airports):
+        for window in range(WINDOWS_PER_AIRPORT):
+            departure_rows, arrival_rows = unit_rows(airport_index, window, movements)
+            departure_records.extend(departure_rows)
+            arrival_records.extend(arrival_rows)
+
+    # The loader reads the rows back batch by batch
+    for records in (departure_records, arrival_records):
+        for start in range(0, len(records), 10000):
+            records[start:start + 10000]
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{variant} {len(departure_records) + len(arrival_records)} {peak_kb}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--airports", type=int, default=60)
+    parser.add_argument("--movements", type=int, default=900, help="Movements per airport and day.")
+    parser.add_argument("--variant", choices=("baseline", "lists", "buffers"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant == "baseline":
+        # Interpreter and imports only, subtracted from both variants
+        print(f"baseline 0 {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}")
+        return
+    if args.variant:
+        run_variant(args.variant, args.airports, args.movements)
+        return
+
+    results = {}
+    for variant in ("baseline", "lists", "buffers"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--airports", str(args.airports),
+             "--movements", str(args.movements)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        results[variant] = (int(output[1]), int(output[2]))
+
+    base_kb = results["baseline"][1]
+    lists_mb = (results["lists"][1] - base_kb) / 1024
+    buffers_mb = (results["buffers"][1] - base_kb) / 1024
+    print(f"{results['lists'][0]:,} rows for {args.airports} airports")
+    print(f"  list of tuples   peak RSS above baseline: {lists_mb:>8.1f} MB")
+    print(f"  ColumnarBuffer   peak RSS above baseline: {buffers_mb:>8.1f} MB   reduction: {lists_mb / buffers_mb:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Local HTTP server replaying AeroDataBox and OpenSky responses, for offline ingestion benchmarks.
+
+Routes (any path prefix is accepted, so the base URLs can point at it unchanged):
+    POST .../token                          OpenSky token endpoint (OPENSKY_AUTH_URL)
+    GET  .../flights/all?begin=..&end=..    OpenSky /flights/all
+    GET  .../icao/<ICAO>/<from>/<to>        AeroDataBox airport departures and arrivals
+
+Responses are replayed from a fixture directory when one is given:
+    <fixtures>/aerodatabox/<date>/<ICAO>.json   {"departures": [...], "arrivals": [...]} of the whole day
+    <fixtures>/opensky/<date>.json              [flight, ...] of the whole day
+and cut down to the requested window, like the APIs do (benchmarks/synthetic_data.py writes this
+layout). Airports and days without fixtures get synthetic payloads. Every response is delayed by --latency-ms plus a random share of --jitter-ms.
+AeroDataBox windows longer than --slow-window-minutes are delayed by another --slow-window-ms, like the
+API answering large windows slowly. With --fail-first N every AeroDataBox window and OpenSky interval is
+answered with --fail-status (503) N times before it is served, like a throttled or flaky API.
+
+Usage:
+    python benchmarks/replay_server.py [--port 8080] [--fixtures DIR] [--latency-ms 150] [--jitter-ms 50]
+                                       [--slow-window-minutes 360 --slow-window-ms 5000]
+                                       [--fail-first 2 --fail-status 503]
+"""
+import sys, os
+import json
+import time
+import random
+import argparse
+import datetime
+import functools
+import threading
+import subprocess
+import urllib.parse
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_field_extraction import synthetic_movement
+from benchmarks.bench_json_decoding import synthetic_opensky_flight
+
+DEFAULT_MOVEMENTS_PER_AIRPORT = 600
+DEFAULT_OPENSKY_FLIGHTS = 20000
+
+# Synthetic airports share this many pre-rendered payloads, with their ICAO code filled in per request
+SYNTHETIC_VARIANTS = 16
+AIRPORT_PLACEHOLDER = "@@@@"
+
+# Remaining-credit headers are set high, so the rate limiters never slow down for the quota
+REMAINING_CREDITS = "1000000"
+
+def _utc_minute(value: str) -> str:
+    """'2025-01-02 13:05Z' -> '2025-01-02T13:05', the format of the AeroDataBox window bounds."""
+    return value[:16].replace(" ", "T") if value else None
+
+def _window_minutes(time_from: str, time_to: str) -> float:
+    """Length of an AeroDataBox window ('2025-01-02T00:00' bounds) in minutes."""
+    start, end = (datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M") for value in (time_from, time_to))
+    return (end - start).total_seconds() / 60
+
+def _in_window(moment: str, time_from: str, time_to: str) -> bool:
+    # Windows are half-open, except the last minute of the day which closes the last window
+    return moment is not None and (time_from <= moment < time_to or (moment == time_to and time_to.endswith("T23:59")))
+
+def synthetic_aerodatabox_day(date: str, movements: int, variant: int = 0) -> dict:
+    """Departures and arrivals of one airport-day, spread evenly over the day, for AIRPORT_PLACEHOLDER."""
+    day = datetime.datetime.strptime(date, "%Y-%m-%d")
+    departures, arrivals = [], []
+
+    for i in range(movements):
+        movement = synthetic_movement(variant * 1_000_000 + i)
+        slot = day + datetime.timedelta(minutes=i * 1440 // max(movements, 1))
+        is_departure = i % 2 == 0
+
+        # The queried airport is the departure airport of departures and the arrival airport of arrivals
+        departure_time, arrival_time = (slot, slot + datetime.timedelta(minutes=55)) if is_departure \
+            else (slot - datetime.timedelta(minutes=55), slot)
+        movement["departure"]["scheduledTime"] = {"utc": departure_time.strftime("%Y-%m-%d %H:%MZ"),
+                                                  "local": departure_time.strftime("%Y-%m-%d %H:%M+01:00")}
+        movement["arrival"]["scheduledTime"] = {"utc": arrival_time.strftime("%Y-%m-%d %H:%MZ"),
+                                                "local": arrival_time.strftime("%Y-%m-%d %H:%M+01:00")}
+        movement["departure" if is_departure else "arrival"]["airport"]["icao"] = AIRPORT_PLACEHOLDER
+
+        (departures if is_departure else arrivals).append(movement)
+
+    return {"departures": departures, "arrivals": arrivals}
+
+def cut_aerodatabox_window(day: dict, time_from: str, time_to: str) -> dict:
+    """Movements of an airport-day whose scheduled time at the queried airport falls in the window."""
+    return {
+        "departures": [m for m in day.get("departures", [])
+                       if _in_window(_utc_minute(m.get("departure", {}).get("scheduledTime", {}).get("utc")), time_from, time_to)],
+        "arrivals": [m for m in day.get("arrivals", [])
+                     if _in_window(_utc_minute(m.get("arrival", {}).get("scheduledTime", {}).get("utc")), time_from, time_to)],
+    }
+
+def synthetic_opensky_window(begin_ts: int, end_ts: int, flights_per_day: int) -> list:
+    """The flights of a synthetic day with firstSeen in [begin_ts, end_ts), spread evenly over the day."""
+    day_start = begin_ts - begin_ts % 86400
+    first = -(-(begin_ts - day_start) * flights_per_day // 86400)
+    last = -(-(end_ts - day_start) * flights_per_day // 86400)
+
+    flights = []
+    for i in range(first, min(last, flights_per_day)):
+        flight = synthetic_opensky_flight(i)
+        flight["firstSeen"] = day_start + i * 86400 // flights_per_day
+        flight["lastSeen"] = flight["firstSeen"] + 3600
+        flights.append(flight)
+    return flights
+
+class ReplayData:
+    """Builds the response body of one request from fixtures or synthetic data."""
+
+    def __init__(self, fixtures_dir: str = None, movements: int = DEFAULT_MOVEMENTS_PER_AIRPORT,
+                 opensky_flights: int = DEFAULT_OPENSKY_FLIGHTS):
+        self.fixtures_dir = fixtures_dir
+        self.movements = movements
+        self.opensky_flights = opensky_flights
+
+    def _fixture_path(self, *parts) -> str:
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, *parts)
+        return path if os.path.exists(path) else None
+
+    @functools.lru_cache(maxsize=32)
+    def _load_fixture(self, path: str):
+        with open(path, 'rb') as f:
+            return json.load(f)
+
+    @functools.lru_cache(maxsize=4 * SYNTHETIC_VARIANTS)
+    def _synthetic_aerodatabox_window(self, variant: int, date: str, time_from: str, time_to: str) -> bytes:
+        day = synthetic_aerodatabox_day(date, self.movements, variant)
+        return json.dumps(cut_aerodatabox_window(day, time_from, time_to)).encode()
+
+    def aerodatabox_window(self, airport_icao: str, time_from: str, time_to: str) -> bytes:
+        """Response body of one airport window, or None when it has no movements (HTTP 204)."""
+        date = time_from[:10]
+        path = self._fixture_path("aerodatabox", date, f"{airport_icao}.json")
+
+        if path:
+            window = cut_aerodatabox_window(self._load_fixture(path), time_from, time_to)
+            if not window["departures"] and not window["arrivals"]:
+                return None
+            return json.dumps(window).encode()
+
+        variant = sum(airport_icao.encode()) % SYNTHETIC_VARIANTS
+        body = self._synthetic_aerodatabox_window(variant, date, time_from, time_to)
+        if body == b'{"departures": [], "arrivals": []}':
+            return None
+        return body.replace(AIRPORT_PLACEHOLDER.encode(), airport_icao.encode())
+
+    def opensky_window(self, begin_ts: int, end_ts: int) -> bytes:
+        """Response body of one /flights/all interval, or None when it has no flights (HTTP 404)."""
+        date = datetime.datetime.fromtimestamp(begin_ts, datetime.timezone.utc).strftime("%Y-%m-%d")
+        path = self._fixture_path("opensky", f"{date}.json")
+
+        if path:
+            flights = [f for f in self._load_fixture(path) if begin_ts <= f.get("firstSeen", -1) < end_ts]
+        else:
+            flights = synthetic_opensky_window(begin_ts, end_ts, self.opensky_flights)
+        return json.dumps(flights).encode() if flights else None
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs behind the pooled session
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        latency_ms = self.server.latency_ms + random.uniform(0, self.server.jitter_ms)
+        time.sleep(latency_ms / 1000)
+
+    def _fail_first(self) -> bool:
+        """Answers with the failure status while this request has failed fewer than fail_first times."""
+        if not self.server.fail_first:
+            return False
+        with self.server.failures_lock:
+            failures = self.server.failures.get(self.path, 0)
+            if failures >= self.server.fail_first:
+                return False
+            self.server.failures[self.path] = failures + 1
+        self._respond(self.server.fail_status)
+        return True
+
+    def _respond(self, status: int, body: bytes = b""):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Rate-Limit-Remaining", REMAINING_CREDITS)
+        self.send_header("X-RateLimit-Requests-Remaining", REMAINING_CREDITS)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self._delay()
+
+        if urllib.parse.urlsplit(self.path).path.rstrip("/").endswith("/token"):
+            self._respond(200, json.dumps({"access_token": "replay-token", "expires_in": 1800,
+                                           "token_type": "Bearer"}).encode())
+        else:
+            self._respond(404)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        segments = [urllib.parse.unquote(s) for s in url.path.split("/") if s]
+        self._delay()
+
+        if url.path.rstrip("/").endswith("/flights/all"):
+            if self._fail_first():
+                return
+            query = urllib.parse.parse_qs(url.query)
+            body = self.server.data.opensky_window(int(query["begin"][0]), int(query["end"][0]))
+            if body:
+                self._respond(200, body)
+            else:
+                self._respond(404)
+
+        elif len(segments) >= 4 and segments[-4] == "icao":
+            airport_icao, time_from, time_to = segments[-3:]
+            if self._fail_first():
+                return
+            if self.server.slow_window_minutes and _window_minutes(time_from, time_to) > self.server.slow_window_minutes:
+                time.sleep(self.server.slow_window_ms / 1000)
+            body = self.server.data.aerodatabox_window(airport_icao, time_from, time_to)
+            if body:
+                self._respond(200, body)
+            else:
+                self._respond(204)
+
+        else:
+            self._respond(404)
+
+def make_server(port: int = 0, fixtures_dir: str = None, latency_ms: float = 0, jitter_ms: float = 0,
+                movements: int = DEFAULT_MOVEMENTS_PER_AIRPORT,
+                opensky_flights: int = DEFAULT_OPENSKY_FLIGHTS,
+                slow_window_minutes: float = 0, slow_window_ms: float = 0,
+                fail_first: int = 0, fail_status: int = 503) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), ReplayHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.jitter_ms = jitter_ms
+    server.slow_window_minutes = slow_window_minutes
+    server.slow_window_ms = slow_window_ms
+    server.fail_first = fail_first
+    server.fail_status = fail_status
+    # Failures answered so far per request path (including the query)
+    server.failures = {}
+    server.failures_lock = threading.Lock()
+    server.data = ReplayData(fixtures_dir, movements, opensky_flights)
+    return server
+
+@contextmanager
+def replay_server_process(**options):
+    """
+    Runs the server in a child process, so building responses doesn't compete with the benchmarked
+    code for the GIL, and yields its base URL. Options are the command line flags without dashes.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--port", "0"]
+    for name, value in options.items():
+        if value is not None:
+            command += [f"--{name.replace('_', '-')}", str(value)]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("Serving on "):
+            raise RuntimeError(f"Replay server failed to start: {line!r}")
+        yield line.split()[-1]
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port.")
+    parser.add_argument("--fixtures", help="Fixture directory to replay (see above).")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--movements", type=int, default=DEFAULT_MOVEMENTS_PER_AIRPORT,
+                        help="Synthetic AeroDataBox movements per airport and day.")
+    parser.add_argument("--opensky-flights", type=int, default=DEFAULT_OPENSKY_FLIGHTS,
+                        help="Synthetic OpenSky flights per day.")
+    parser.add_argument("--slow-window-minutes", type=float, default=0,
+                        help="AeroDataBox windows longer than this are delayed by --slow-window-ms (0 disables).")
+    parser.add_argument("--slow-window-ms", type=float, default=0)
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Fail every AeroDataBox window and OpenSky interval this many times before serving it.")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.fixtures, args.latency_ms, args.jitter_ms, args.movements, args.opensky_flights,
+                         args.slow_window_minutes, args.slow_window_ms, args.fail_first, args.fail_status)
+    print(f"Serving on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+"""
+Synthetic AeroDataBox and OpenSky data for scale testing.
+
+Simulates the scheduled traffic of a set of airports. Every operated flight departs from one airport
+of the set and lands at another one (or at an airport outside the set), is listed as a departure at
+its origin and as an arrival at its destination, may carry codeshare listings, and is seen by OpenSky
+as one /flights/all record. Everything derives from --seed and the date, so fixtures are reproducible
+and consecutive days line up (flights landing after midnight are arrivals of the next day).
+
+Writes replayable fixtures in the layout read by benchmarks/replay_server.py:
+    <out>/aerodatabox/<date>/<ICAO>.json    {"departures": [...], "arrivals": [...]} of the airport-day
+    <out>/opensky/<date>.json               /flights/all records of the day
+    <out>/airports.csv                      rows of the airports table
+and with --raw, the rows the ingestion would load (decoded by the same PayloadDecoder), as gzipped CSV:
+    <out>/raw/<table>/<date>.csv.gz         airport_departures, airport_arrivals and flights
+
+Usage:
+    python benchmarks/synthetic_data.py --out fixtures [--airports 100] [--flights-per-airport 600]
+        [--start 2025-01-02] [--days 1] [--codeshare-ratio 0.3] [--cargo-ratio 0.03]
+        [--null-callsign-rate 0.05] [--null-modes-rate 0.1] [--raw]
+"""
+import sys, os
+import csv
+import gzip
+import json
+import random
+import argparse
+import datetime
+import functools
+import itertools
+from typing import NamedTuple
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, OPENSKY_FLIGHTS
+from utils.fast_json import PayloadDecoder
+
+DEFAULT_AIRPORTS = 100
+DEFAULT_FLIGHTS_PER_AIRPORT = 600   # operated departures + arrivals per airport and day
+DEFAULT_CODESHARE_RATIO = 0.3       # share of passenger listings that are codeshares
+DEFAULT_CARGO_RATIO = 0.03          # share of operated flights that are cargo flights
+DEFAULT_NULL_CALLSIGN_RATE = 0.05
+DEFAULT_NULL_MODES_RATE = 0.1
+
+# Share of flights between two airports of the set, the others fly to or from outside it
+INTERNAL_SHARE = 0.75
+EXTERNAL_AIRPORTS = 200
+
+# OpenSky also sees traffic that no airport of the set lists (general aviation, overflights)
+OPENSKY_BACKGROUND_SHARE = 0.25
+
+MAX_CODESHARES = 4
+
+# (country, ICAO prefix, time zone, UTC offset in minutes, latitude range, longitude range)
+COUNTRIES = [
+    ("DE", "ED", "Europe/Berlin", 60, (47.5, 54.8), (6.0, 14.8)),
+    ("FR", "LF", "Europe/Paris", 60, (43.0, 50.9), (-4.5, 7.5)),
+    ("CH", "LS", "Europe/Zurich", 60, (45.9, 47.7), (6.1, 10.4)),
+    ("AE", "OM", "Asia/Dubai", 240, (22.7, 26.0), (51.6, 56.3)),
+    ("GB", "EG", "Europe/London", 0, (50.0, 58.6), (-6.2, 1.7)),
+    ("ES", "LE", "Europe/Madrid", 60, (36.1, 43.7), (-9.2, 3.2)),
+    ("IT", "LI", "Europe/Rome", 60, (37.0, 46.8), (7.0, 18.4)),
+    ("NL", "EH", "Europe/Amsterdam", 60, (51.0, 53.4), (3.4, 7.1)),
+]
+EXTERNAL_COUNTRIES = [
+    ("US", "KJ", "America/New_York", -300, (25.0, 45.0), (-90.0, -70.0)),
+    ("IN", "VI", "Asia/Kolkata", 330, (8.0, 32.0), (70.0, 88.0)),
+    ("JP", "RJ", "Asia/Tokyo", 540, (31.0, 43.0), (130.0, 145.0)),
+    ("ZA", "FA", "Africa/Johannesburg", 120, (-34.0, -23.0), (18.0, 31.0)),
+]
+
+# The largest carriers keep their real codes, the long tail is synthetic
+KNOWN_AIRLINES = [
+    ("Lufthansa", "LH", "DLH"), ("Air France", "AF", "AFR"), ("Swiss", "LX", "SWR"), ("Emirates", "EK", "UAE"),
+    ("easyJet", "U2", "EZY"), ("Ryanair", "FR", "RYR"), ("KLM", "KL", "KLM"), ("British Airways", "BA", "BAW"),
+    ("Eurowings", "EW", "EWG"), ("Iberia", "IB", "IBE"), ("ITA Airways", "AZ", "ITY"), ("Vueling", "VY", "VLG"),
+]
+KNOWN_CARGO_AIRLINES = [
+    ("Lufthansa Cargo", "LH", "GEC"), ("DHL", "D0", "DHK"), ("FedEx", "FX", "FDX"), ("UPS Airlines", "5X", "UPS"),
+]
+SYNTHETIC_AIRLINES = 110
+
+AIRCRAFT_MODELS = [
+    "Airbus A320", "Airbus A321", "Airbus A319", "Boeing 737-800", "Boeing 737 MAX 8", "Embraer 190",
+    "Bombardier CRJ900", "ATR 72", "Airbus A350-900", "Boeing 777-300ER", "Boeing 787-9", "Airbus A330-300",
+]
+CARGO_MODELS = ["Boeing 777F", "Boeing 767-300F", "Airbus A300-600F", "Boeing 747-8F"]
+
+# Relative departure frequency per UTC hour (morning and evening banks)
+HOURLY_WEIGHTS = [1, 0.5, 0.3, 0.3, 0.6, 2, 6, 8, 8, 7, 6, 6, 6, 6, 6, 6, 7, 8, 8, 7, 6, 4, 3, 2]
+HOURLY_CUM_WEIGHTS = list(itertools.accumulate(HOURLY_WEIGHTS))
+
+SYLLABLES = ["ber", "lin", "mar", "sel", "tou", "lou", "zu", "rich", "gen", "eva", "dub", "ai", "ham", "burg",
+             "lyo", "nan", "tes", "bas", "el", "mun", "ich", "fra", "kfu", "stu", "tt", "ga", "rt", "nic", "ce"]
+
+class Airport(NamedTuple):
+    icao: str
+    iata: str
+    name: str
+    city: str
+    country: str
+    timezone: str
+    utc_offset: int
+    latitude: float
+    longitude: float
+    elevation_ft: float
+
+class Aircraft(NamedTuple):
+    reg: str
+    mode_s: str
+    model: str
+
+class Airline(NamedTuple):
+    name: str
+    iata: str
+    icao: str
+    fleet: tuple
+
+class Flight(NamedTuple):
+    """One operated flight. Times are minutes since the Unix epoch (UTC)."""
+    airline: Airline
+    number: str
+    callsign: str
+    aircraft: Aircraft
+    hide_mode_s: bool
+    is_cargo: bool
+    origin: Airport
+    destination: Airport
+    departure: int
+    arrival: int
+    departure_delay: int
+    arrival_delay: int
+    status_roll: float
+    has_runway_times: bool
+    departure_terminal: str
+    arrival_terminal: str
+    gate: str
+    baggage_belt: str
+    departure_runway: str
+    arrival_runway: str
+    codeshares: tuple
+    opensky_seed: int
+
+def _letters(index: int, length: int) -> str:
+    """Base-26 letters of an index, e.g. 0 -> 'AA' for length 2."""
+    letters = []
+    for _ in range(length):
+        letters.append(chr(65 + index % 26))
+        index //= 26
+    return "".join(reversed(letters))
+
+def _place_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+def _minutes_to_datetime(minutes: int) -> datetime.datetime:
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(minutes=minutes)
+
+def _day_start(date: str) -> int:
+    return int((datetime.datetime.strptime(date, "%Y-%m-%d") - datetime.datetime(1970, 1, 1)).total_seconds()) // 60
+
+def _time(minutes: int, airport: Airport) -> dict:
+    """AeroDataBox time object: UTC and the airport's local time with its offset."""
+    return _time_object(minutes, airport.utc_offset)
+
+@functools.lru_cache(maxsize=65536)
+def _time_object(minutes: int, utc_offset: int) -> dict:
+    # Schedules repeat the same few thousand minutes, so formatted times are shared (never mutated)
+    utc = _minutes_to_datetime(minutes)
+    local = utc + datetime.timedelta(minutes=utc_offset)
+    sign = "+" if utc_offset >= 0 else "-"
+    offset = abs(utc_offset)
+    return {
+        "utc": utc.strftime("%Y-%m-%d %H:%MZ"),
+        "local": local.strftime("%Y-%m-%d %H:%M") + f"{sign}{offset // 60:02d}:{offset % 60:02d}",
+    }
+
+def _airport_object(airport: Airport) -> dict:
+    return {
+        "icao": airport.icao,
+        "iata": airport.iata,
+        "name": airport.name,
+        "shortName": airport.city,
+        "municipalityName": airport.city,
+        "location": {"lat": airport.latitude, "lon": airport.longitude},
+        "countryCode": airport.country,
+        "timeZone": airport.timezone,
+    }
+
+class SyntheticTraffic:
+    """
+    Deterministic traffic model of `airports` airports. Flights of a day are generated per origin
+    airport from (seed, date, airport), so any day can be rebuilt on its own.
+    """
+
+    def __init__(self, airports: int = DEFAULT_AIRPORTS, flights_per_airport: int = DEFAULT_FLIGHTS_PER_AIRPORT,
+                 codeshare_ratio: float = DEFAULT_CODESHARE_RATIO, cargo_ratio: float = DEFAULT_CARGO_RATIO,
+                 null_callsign_rate: float = DEFAULT_NULL_CALLSIGN_RATE, null_modes_rate: float = DEFAULT_NULL_MODES_RATE,
+                 seed: int = 42):
+        if airports > 26 * 26 * len(COUNTRIES):
+            raise ValueError(f"At most {26 * 26 * len(COUNTRIES)} airports can be generated.")
+
+        self.flights_per_airport = flights_per_airport
+        self.codeshare_ratio = codeshare_ratio
+        self.cargo_ratio = cargo_ratio
+        self.null_callsign_rate = null_callsign_rate
+        self.null_modes_rate = null_modes_rate
+        self.seed = seed
+
+        rng = random.Random(f"{seed}:world")
+        self.airports = [self._make_airport(i, COUNTRIES, rng) for i in range(airports)]
+        self.external_airports = [self._make_airport(i, EXTERNAL_COUNTRIES, rng) for i in range(EXTERNAL_AIRPORTS)]
+        self.airlines, self.airline_weights = self._make_airlines(KNOWN_AIRLINES, SYNTHETIC_AIRLINES, AIRCRAFT_MODELS, rng)
+        self.cargo_airlines, self.cargo_weights = self._make_airlines(KNOWN_CARGO_AIRLINES, 0, CARGO_MODELS, rng)
+
+    @staticmethod
+    def _make_airport(index: int, countries: list, rng: random.Random) -> Airport:
+        country, prefix, timezone, utc_offset, latitudes, longitudes = countries[index % len(countries)]
+        city = _place_name(rng)
+        # IATA codes are spread over all three-letter codes, 7919 is coprime with 26^3
+        iata = _letters((index * 7919 + (0 if countries is COUNTRIES else 9973)) % 26 ** 3, 3)
+        return Airport(
+            icao=prefix + _letters(index // len(countries), 4 - len(prefix)),
+            iata=iata,
+            name=f"{city} {rng.choice(['International', 'Airport', 'Regional', 'City'])}",
+            city=city,
+            country=country,
+            timezone=timezone,
+            utc_offset=utc_offset,
+            latitude=round(rng.uniform(*latitudes), 4),
+            longitude=round(rng.uniform(*longitudes), 4),
+            elevation_ft=float(rng.randint(0, 2500)),
+        )
+
+    @staticmethod
+    def _make_airlines(known: list, synthetic: int, models: list, rng: random.Random):
+        codes = list(known)
+        for i in range(synthetic):
+            # Digit-first IATA codes and a reserved ICAO range never collide with the known carriers
+            codes.append((f"{_place_name(rng)} {rng.choice(['Airways', 'Air', 'Airlines', 'Jet'])}",
+                          f"{i // 26}{_letters(i % 26, 1)}", _letters(i + 5000, 3)))
+
+        airlines, weights = [], []
+        for rank, (name, iata, icao) in enumerate(codes):
+            weight = 1 / (rank + 1)  # Zipf-like: a few large carriers and a long tail
+            fleet = tuple(
+                Aircraft(
+                    reg=f"{rng.choice(['D-A', 'F-H', 'HB-J', 'A6-E', 'G-E', 'EC-M'])}{_letters(rng.randrange(26 ** 3), 3)}",
+                    mode_s=f"{rng.randrange(0x1000000):06X}",
+                    model=rng.choice(models),
+                )
+                for _ in range(max(3, int(200 * weight)))
+            )
+            airlines.append(Airline(name, iata, icao, fleet))
+            weights.append(weight)
+        # Cumulative weights, so rng.choices doesn't sum them up on every draw
+        return airlines, list(itertools.accumulate(weights))
+
+    def _make_flight(self, rng: random.Random, origin: Airport, destination: Airport, day_start: int) -> Flight:
+        is_cargo = rng.random() < self.cargo_ratio
+        airline = rng.choices(self.cargo_airlines if is_cargo else self.airlines,
+                              cum_weights=self.cargo_weights if is_cargo else self.airline_weights)[0]
+
+        flight_number = rng.randint(1, 9999)
+        hour = rng.choices(range(24), cum_weights=HOURLY_CUM_WEIGHTS)[0]
+        departure = day_start + hour * 60 + rng.randrange(0, 60, 5)
+        duration = int(min(rng.lognormvariate(4.8, 0.5), 840)) + 35
+
+        # Delays are mostly small with a long tail, arrivals recover a few minutes in the air
+        departure_delay = int(rng.expovariate(1 / 14)) - 5
+        arrival_delay = departure_delay - rng.randint(0, 10)
+
+        codeshares = []
+        if not is_cargo:
+            while len(codeshares) < MAX_CODESHARES and rng.random() < self.codeshare_ratio:
+                partner = rng.choices(self.airlines, cum_weights=self.airline_weights)[0]
+                if partner.iata != airline.iata:
+                    codeshares.append((partner, f"{partner.iata} {rng.randint(1000, 9999)}"))
+
+        return Flight(
+            airline=airline,
+            number=f"{airline.iata} {flight_number}",
+            callsign=None if rng.random() < self.null_callsign_rate
+                     else f"{airline.icao}{flight_number}{rng.choice(['', '', '', 'A', 'K', 'X'])}",
+            aircraft=rng.choice(airline.fleet),
+            hide_mode_s=rng.random() < self.null_modes_rate,
+            is_cargo=is_cargo,
+            origin=origin,
+            destination=destination,
+            departure=departure,
+            arrival=departure + duration,
+            departure_delay=departure_delay,
+            arrival_delay=arrival_delay,
+            status_roll=rng.random(),
+            has_runway_times=rng.random() < 0.6,
+            departure_terminal=rng.choice(["1", "2", "2F", "A", None]),
+            arrival_terminal=rng.choice(["1", "2", "B", "M", None]),
+            gate=rng.choice([f"{_letters(rng.randrange(6), 1)}{rng.randint(1, 60)}", None]),
+            baggage_belt=rng.choice([str(rng.randint(1, 12)), None]),
+            departure_runway=rng.choice(["07L", "25C", "26R", "08", "14", None]),
+            arrival_runway=rng.choice(["07R", "25L", "26L", "09", "32", None]),
+            codeshares=tuple(codeshares),
+            opensky_seed=rng.randrange(1 << 30),
+        )
+
+    def day_flights(self, date: str) -> list[Flight]:
+        """All flights departing on `date`: from every airport of the set, plus inbound flights from outside."""
+        day_start = _day_start(date)
+        departures_per_airport = self.flights_per_airport // 2
+        flights = []
+
+        for origin in self.airports:
+            rng = random.Random(f"{self.seed}:{date}:{origin.icao}")
+            others = [airport for airport in self.airports if airport is not origin] if len(self.airports) > 1 else []
+            for _ in range(departures_per_airport):
+                if others and rng.random() < INTERNAL_SHARE:
+                    destination = rng.choice(others)
+                else:
+                    destination = rng.choice(self.external_airports)
+                flights.append(self._make_flight(rng, origin, destination, day_start))
+
+        # Arrivals from outside the set, so each airport also lands about departures_per_airport flights
+        inbound_share = 1 - INTERNAL_SHARE if len(self.airports) > 1 else 1
+        for destination in self.airports:
+            rng = random.Random(f"{self.seed}:{date}:{destination.icao}:inbound")
+            for _ in range(round(departures_per_airport * inbound_share)):
+                flights.append(self._make_flight(rng, rng.choice(self.external_airports), destination, day_start))
+
+        return flights
+
+    # --- AeroDataBox ---
+
+    @staticmethod
+    def _listings(flight: Flight) -> list:
+        """(airline, number, codeshareStatus) of the operating flight and its codeshares."""
+        listings = [(flight.airline, flight.number, "IsOperator")]
+        listings += [(airline, number, "IsCodeshared") for airline, number in flight.codeshares]
+        return listings
+
+    @staticmethod
+    def _common(flight: Flight, airline: Airline, number: str, codeshare_status: str, status: str) -> dict:
+        aircraft = {"reg": flight.aircraft.reg, "modeS": flight.aircraft.mode_s, "model": flight.aircraft.model}
+        if flight.hide_mode_s:
+            del aircraft["modeS"]
+
+        movement = {
+            "number": number,
+            "status": status,
+            "codeshareStatus": codeshare_status,
+            "isCargo": flight.is_cargo,
+            "aircraft": aircraft,
+            "airline": {"name": airline.name, "iata": airline.iata, "icao": airline.icao},
+        }
+        if flight.callsign is not None:
+            movement["callSign"] = flight.callsign
+        return movement
+
+    @staticmethod
+    def _times(flight: Flight, airport: Airport, scheduled: int, delay: int, taxi: int, canceled: bool) -> dict:
+        times = {"scheduledTime": _time(scheduled, airport)}
+        if not canceled:
+            times["revisedTime"] = _time(scheduled + delay, airport)
+            if flight.has_runway_times:
+                times["runwayTime"] = _time(scheduled + delay + taxi, airport)
+        return times
+
+    def departure_movements(self, flight: Flight) -> list[dict]:
+        """The flight as listed in its origin airport's departures."""
+        canceled = flight.status_roll < 0.02
+        status = "Canceled" if canceled else ("Unknown" if flight.status_roll < 0.03 else "Departed")
+
+        departure = {**self._times(flight, flight.origin, flight.departure, flight.departure_delay, 12, canceled),
+                     "terminal": flight.departure_terminal, "runway": flight.departure_runway,
+                     "quality": ["Basic", "Live"]}
+        arrival = {"airport": _airport_object(flight.destination),
+                   **self._times(flight, flight.destination, flight.arrival, flight.arrival_delay, -6, canceled),
+                   "terminal": flight.arrival_terminal, "gate": flight.gate, "baggageBelt": flight.baggage_belt,
+                   "quality": ["Basic"]}
+
+        return [{**self._common(flight, airline, number, codeshare_status, status), "departure": departure, "arrival": arrival}
+                for airline, number, codeshare_status in self._listings(flight)]
+
+    def arrival_movements(self, flight: Flight) -> list[dict]:
+        """The flight as listed in its destination airport's arrivals."""
+        canceled = flight.status_roll < 0.02
+        status = "Canceled" if canceled else ("Diverted" if flight.status_roll < 0.025 else "Arrived")
+
+        departure = {"airport": _airport_object(flight.origin),
+                     **self._times(flight, flight.origin, flight.departure, flight.departure_delay, 12, canceled),
+                     "terminal": flight.departure_terminal, "quality": ["Basic"]}
+        arrival = {**self._times(flight, flight.destination, flight.arrival, flight.arrival_delay, -6, canceled),
+                   "terminal": flight.arrival_terminal, "gate": flight.gate, "baggageBelt": flight.baggage_belt,
+                   "runway": flight.arrival_runway, "quality": ["Basic", "Live"]}
+
+        return [{**self._common(flight, airline, number, codeshare_status, status), "departure": departure, "arrival": arrival}
+                for airline, number, codeshare_status in self._listings(flight)]
+
+    # --- OpenSky ---
+
+    @staticmethod
+    def opensky_record(flight: Flight) -> dict:
+        """The /flights/all record of an operated flight, seen from takeoff to landing."""
+        rng = random.Random(flight.opensky_seed)
+        departure_known = rng.random() < 0.85
+        arrival_known = rng.random() < 0.9
+        first_seen = (flight.departure + flight.departure_delay + 12) * 60 + rng.randint(0, 59)
+        last_seen = (flight.arrival + flight.arrival_delay - 6) * 60 + rng.randint(0, 59)
+
+        return {
+            "icao24": flight.aircraft.mode_s.lower(),
+            "firstSeen": first_seen,
+            "estDepartureAirport": flight.origin.icao if departure_known else None,
+            "lastSeen": max(last_seen, first_seen + 600),
+            "estArrivalAirport": flight.destination.icao if arrival_known else None,
+            # OpenSky pads callsigns to 8 characters
+            "callsign": f"{flight.callsign:<8}" if flight.callsign else None,
+            "estDepartureAirportHorizDistance": rng.randint(50, 6000) if departure_known else None,
+            "estDepartureAirportVertDistance": rng.randint(0, 600) if departure_known else None,
+            "estArrivalAirportHorizDistance": rng.randint(50, 6000) if arrival_known else None,
+            "estArrivalAirportVertDistance": rng.randint(0, 600) if arrival_known else None,
+            "departureAirportCandidatesCount": rng.randint(0, 3) if departure_known else 0,
+            "arrivalAirportCandidatesCount": rng.randint(0, 3) if arrival_known else 0,
+        }
+
+    def opensky_background(self, date: str, count: int) -> list[dict]:
+        """Flights OpenSky tracks without any airport of the set listing them."""
+        rng = random.Random(f"{self.seed}:{date}:opensky")
+        day_start = _day_start(date) * 60
+        records = []
+        for _ in range(count):
+            first_seen = day_start + rng.randrange(86400)
+            records.append({
+                "icao24": f"{rng.randrange(0x1000000):06x}",
+                "firstSeen": first_seen,
+                "estDepartureAirport": rng.choice([None, None, rng.choice(self.external_airports).icao]),
+                "lastSeen": first_seen + rng.randint(600, 20000),
+                "estArrivalAirport": rng.choice([None, rng.choice(self.external_airports).icao]),
+                "callsign": rng.choice([None, f"{_letters(rng.randrange(26 ** 5), 5):<8}"]),
+                "estDepartureAirportHorizDistance": None,
+                "estDepartureAirportVertDistance": None,
+                "estArrivalAirportHorizDistance": rng.randint(50, 9000),
+                "estArrivalAirportVertDistance": rng.randint(0, 900),
+                "departureAirportCandidatesCount": 0,
+                "arrivalAirportCandidatesCount": rng.randint(0, 2),
+            })
+        return records
+
+def _write_json(path: str, payload) -> bytes:
+    content = json.dumps(payload, separators=(",", ":")).encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return content
+
+class RawTableWriter:
+    """Writes decoded rows of one raw table and day to <out>/raw/<table>/<date>.csv.gz, in DDL column order."""
+
+    def __init__(self, out_dir: str, schema, date: str, defaults: dict):
+        path = os.path.join(out_dir, "raw", schema.name, f"{date}.csv.gz")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([column.name for column in schema.columns])
+
+        # Loaded columns come from the row, the others are the values Snowflake's defaults would fill in
+        loaded = {name: i for i, name in enumerate(schema.column_names)}
+        self.sources = [(loaded.get(column.name), defaults.get(column.name)) for column in schema.columns]
+        self.rows = 0
+
+    @staticmethod
+    def _csv(value):
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        return value
+
+    def write(self, rows):
+        for row in rows:
+            self.writer.writerow([self._csv(row[index]) if index is not None else default
+                                  for index, default in self.sources])
+        self.rows += len(rows)
+
+    def close(self):
+        self.file.close()
+
+def write_fixtures(traffic: SyntheticTraffic, out_dir: str, dates: list[str], raw: bool = False) -> dict:
+    """Writes the fixtures of consecutive `dates` and returns row counts per kind."""
+    counts = defaultdict(int)
+    aerodatabox_decoder = PayloadDecoder([("departures", AIRPORT_DEPARTURES.fields), ("arrivals", AIRPORT_ARRIVALS.fields)],
+                                         ("flight_date", "airport_icao"), "aerodatabox")
+    opensky_decoder = PayloadDecoder([(None, OPENSKY_FLIGHTS.fields)], ("record_date",), "opensky")
+
+    previous_date = (datetime.datetime.strptime(dates[0], "%Y-%m-%d") - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    previous_flights = traffic.day_flights(previous_date)
+
+    for date in dates:
+        flights = traffic.day_flights(date)
+        day_start = _day_start(date)
+        in_day = lambda minutes: day_start <= minutes < day_start + 1440
+
+        departures = defaultdict(list)
+        arrivals = defaultdict(list)
+        for flight in flights:
+            departures[flight.origin.icao].append(flight)
+        # Flights that departed the day before and land after midnight are arrivals of this day
+        for flight in previous_flights + flights:
+            if in_day(flight.arrival):
+                arrivals[flight.destination.icao].append(flight)
+
+        writers = {}
+        if raw:
+            ingested_at = (datetime.datetime.strptime(date, "%Y-%m-%d") + datetime.timedelta(days=1, hours=2)).strftime("%Y-%m-%d %H:%M:%S")
+            aerodatabox_defaults = {"ingestion_timestamp": ingested_at, "data_source": "AeroDataBox"}
+            writers = {
+                "departures": RawTableWriter(out_dir, AIRPORT_DEPARTURES, date, aerodatabox_defaults),
+                "arrivals": RawTableWriter(out_dir, AIRPORT_ARRIVALS, date, aerodatabox_defaults),
+                "flights": RawTableWriter(out_dir, OPENSKY_FLIGHTS, date, {"ingestion_timestamp": ingested_at}),
+            }
+
+        try:
+            for airport in traffic.airports:
+                payload = {
+                    "departures": [movement for flight in sorted(departures[airport.icao], key=lambda f: (f.departure, f.number))
+                                   for movement in traffic.departure_movements(flight)],
+                    "arrivals": [movement for flight in sorted(arrivals[airport.icao], key=lambda f: (f.arrival, f.number))
+                                 for movement in traffic.arrival_movements(flight)],
+                }
+                content = _write_json(os.path.join(out_dir, "aerodatabox", date, f"{airport.icao}.json"), payload)
+                counts["departures"] += len(payload["departures"])
+                counts["arrivals"] += len(payload["arrivals"])
+
+                if raw:
+                    departure_rows, arrival_rows = aerodatabox_decoder.decode(content, date, airport.icao)
+                    writers["departures"].write(departure_rows)
+                    writers["arrivals"].write(arrival_rows)
+
+            # OpenSky sees every flight that actually took off on this day
+            records = [traffic.opensky_record(flight) for flight in previous_flights + flights
+                       if flight.status_roll >= 0.02 and in_day(flight.departure + flight.departure_delay + 12)]
+            records += traffic.opensky_background(date, int(len(records) * OPENSKY_BACKGROUND_SHARE))
+            records.sort(key=lambda record: record["firstSeen"])
+            content = _write_json(os.path.join(out_dir, "opensky", f"{date}.json"), records)
+            counts["opensky"] += len(records)
+
+            if raw:
+                flight_rows, = opensky_decoder.decode(content, date)
+                writers["flights"].write(flight_rows)
+
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        previous_flights = flights
+        print(f"{date}: {counts['departures']:,} departures, {counts['arrivals']:,} arrivals, "
+              f"{counts['opensky']:,} OpenSky flights written so far", flush=True)
+
+    return dict(counts)
+
+def write_airports(traffic: SyntheticTraffic, out_dir: str):
+    """Rows of the airports table, for the airport lookup and stg_airports."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "airports.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["airport", "country", "state", "city", "icao", "iata", "elevation_ft", "latitude", "longitude"])
+        for airport in traffic.airports + traffic.external_airports:
+            writer.writerow([airport.name, airport.country, None, airport.city, airport.icao, airport.iata,
+                             airport.elevation_ft, airport.latitude, airport.longitude])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Fixture directory to write.")
+    parser.add_argument("--airports", type=int, default=DEFAULT_AIRPORTS)
+    parser.add_argument("--flights-per-airport", type=int, default=DEFAULT_FLIGHTS_PER_AIRPORT,
+                        help="Operated departures + arrivals per airport and day, before codeshare listings.")
+    parser.add_argument("--start", default="2025-01-02", help="First day (YYYY-MM-DD).")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--codeshare-ratio", type=float, default=DEFAULT_CODESHARE_RATIO)
+    parser.add_argument("--cargo-ratio", type=float, default=DEFAULT_CARGO_RATIO)
+    parser.add_argument("--null-callsign-rate", type=float, default=DEFAULT_NULL_CALLSIGN_RATE)
+    parser.add_argument("--null-modes-rate", type=float, default=DEFAULT_NULL_MODES_RATE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--raw", action="store_true", help="Also write the decoded raw table rows as CSV.")
+    args = parser.parse_args()
+
+    traffic = SyntheticTraffic(args.airports, args.flights_per_airport, args.codeshare_ratio, args.cargo_ratio,
+                               args.null_callsign_rate, args.null_modes_rate, args.seed)
+    start = datetime.datetime.strptime(args.start, "%Y-%m-%d")
+    dates = [(start + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(args.days)]
+
+    write_airports(traffic, args.out)
+    counts = write_fixtures(traffic, args.out, dates, args.raw)
+    print(f"Wrote {sum(counts.values()):,} records for {args.airports} airports and {args.days} day(s) to {args.out}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+In-process stand-in for a Snowflake connection, for benchmarks that must not touch the warehouse.
+
+Implements the connection surface used by utils.transaction_cursor.transaction, the loaders
+(utils.bulk_loader, utils.parallel_loader, utils.upsert) and snowflake_handler's AsyncQuery /
+AsyncQueryExecutor: cursor(), commit(), rollback(), close(), execute(), executemany(),
+execute_async() with sfqid, query status polling, get_results_from_sfqid() and fetchall().
+
+Statements are not executed. Each one is classified, takes a simulated duration and updates
+per-table row counts (staged files are read on PUT), so a benchmark can check how many rows
+were loaded. There is no transactional isolation: commits and rollbacks are only counted.
+"""
+import os
+import re
+import glob
+import gzip
+import time
+import uuid
+import threading
+from collections import Counter
+
+# Simulated warehouse costs
+DEFAULT_STATEMENT_SECONDS = 0.05               # round trip + compilation of any statement
+DEFAULT_COPY_ROWS_PER_SECOND = 1_000_000       # COPY INTO from staged files
+DEFAULT_INSERT_ROWS_PER_SECOND = 20_000        # executemany INSERT
+DEFAULT_PUT_BYTES_PER_SECOND = 50 * 1024 * 1024
+
+RUNNING = "RUNNING"
+SUCCESS = "SUCCESS"
+
+_TABLE_NAME = r"([\w$.]+)"
+_CREATE_TABLE = re.compile(rf"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:TRANSIENT\s+|TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?{_TABLE_NAME}", re.I)
+_DROP_TABLE = re.compile(rf"^DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?{_TABLE_NAME}", re.I)
+_PUT = re.compile(r"^PUT\s+'file://([^']+)'\s+'([^']+)'", re.I)
+_COPY = re.compile(rf"^COPY\s+INTO\s+{_TABLE_NAME}.*?\bFROM\s+'([^']+)'", re.I | re.S)
+_INSERT_SELECT = re.compile(rf"^INSERT\s+INTO\s+{_TABLE_NAME}\b.*?\bSELECT\b.*?\bFROM\s+{_TABLE_NAME}", re.I | re.S)
+_INSERT = re.compile(rf"^INSERT\s+INTO\s+{_TABLE_NAME}", re.I)
+_MERGE = re.compile(rf"^MERGE\s+INTO\s+{_TABLE_NAME}.*?\bFROM\s+{_TABLE_NAME}", re.I | re.S)
+
+class StubWarehouse:
+    """Shared state of all stand-in connections: row counts per table, staged files and submitted queries."""
+
+    def __init__(self, statement_seconds: float = DEFAULT_STATEMENT_SECONDS,
+                 copy_rows_per_second: float = DEFAULT_COPY_ROWS_PER_SECOND,
+                 insert_rows_per_second: float = DEFAULT_INSERT_ROWS_PER_SECOND,
+                 put_bytes_per_second: float = DEFAULT_PUT_BYTES_PER_SECOND,
+                 database: str = None, schema: str = "RAW"):
+        self.statement_seconds = statement_seconds
+        self.copy_rows_per_second = copy_rows_per_second
+        self.insert_rows_per_second = insert_rows_per_second
+        self.put_bytes_per_second = put_bytes_per_second
+
+        # A fresh database name per warehouse, so the process-wide table cache doesn't skip its DDL
+        self.database = database or f"BENCH_{uuid.uuid4().hex[:8].upper()}"
+        self.schema = schema
+
+        self.tables = {}
+        self.staged = {}
+        self.statements = Counter()
+        self.simulated_seconds = 0.0
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    def connect(self) -> "StubConnection":
+        """Opens a new stand-in connection, usable as a connection_factory."""
+        return StubConnection(self)
+
+    def row_count(self, table_name: str) -> int:
+        with self._lock:
+            return self.tables.get(table_name.upper(), 0)
+
+    def run(self, query: str, rows: int = None) -> float:
+        """Applies one statement to the row counts and returns its simulated duration in seconds."""
+        query = query.strip()
+        seconds = self.statement_seconds
+
+        put_match = _PUT.match(query) if rows is None else None
+        if put_match:
+            # The files are only on disk until the loader's PUT returns, so they are read now
+            staged_rows, staged_bytes = 0, 0
+            for path in glob.glob(put_match.group(1)):
+                with gzip.open(path, 'rb') as f:
+                    staged_rows += sum(1 for _ in f)
+                staged_bytes += os.path.getsize(path)
+
+        with self._lock:
+            if rows is not None:
+                kind = "INSERT"
+                table_name = _INSERT.match(query).group(1).upper()
+                self.tables[table_name] = self.tables.get(table_name, 0) + rows
+                seconds += rows / self.insert_rows_per_second
+
+            elif put_match:
+                kind = "PUT"
+                stage_path = put_match.group(2)
+                self.staged[stage_path] = self.staged.get(stage_path, 0) + staged_rows
+                seconds += staged_bytes / self.put_bytes_per_second
+
+            elif match := _COPY.match(query):
+                kind = "COPY"
+                table_name = match.group(1).upper()
+                row_count = self.staged.pop(match.group(2), 0)
+                self.tables[table_name] = self.tables.get(table_name, 0) + row_count
+                seconds += row_count / self.copy_rows_per_second
+
+            elif match := (_INSERT_SELECT.match(query) or _MERGE.match(query)):
+                kind = query.split(None, 1)[0].upper()
+                table_name, source_table = match.group(1).upper(), match.group(2).upper()
+                row_count = self.tables.get(source_table, 0)
+                self.tables[table_name] = self.tables.get(table_name, 0) + row_count
+                seconds += row_count / self.copy_rows_per_second
+
+            elif match := _CREATE_TABLE.match(query):
+                kind = "CREATE"
+                self.tables.setdefault(match.group(1).upper(), 0)
+
+            elif match := _DROP_TABLE.match(query):
+                kind = "DROP"
+                self.tables.pop(match.group(1).upper(), None)
+
+            else:
+                kind = query.split(None, 1)[0].upper() if query else "EMPTY"
+
+            self.statements[kind] += 1
+            self.simulated_seconds += seconds
+
+        return seconds
+
+    def submit(self, query: str) -> str:
+        """Starts a statement in the background and returns its query id."""
+        seconds = self.run(query)
+        query_id = uuid.uuid4().hex
+        with self._lock:
+            self._queries[query_id] = time.monotonic() + seconds
+        return query_id
+
+    def query_status(self, query_id: str) -> str:
+        with self._lock:
+            finishes_at = self._queries[query_id]
+        return RUNNING if time.monotonic() < finishes_at else SUCCESS
+
+class StubCursor:
+    def __init__(self, connection: "StubConnection"):
+        self.connection = connection
+        self.sfqid = None
+        self._rows = []
+
+    def execute(self, query: str, params=None):
+        time.sleep(self.connection.warehouse.run(query))
+        self.sfqid = uuid.uuid4().hex
+        self._rows = []
+        return self
+
+    def executemany(self, query: str, seq_of_params):
+        rows = seq_of_params if hasattr(seq_of_params, "__len__") else list(seq_of_params)
+        time.sleep(self.connection.warehouse.run(query, rows=len(rows)))
+        self._rows = []
+        return self
+
+    def execute_async(self, query: str, params=None):
+        self.sfqid = self.connection.warehouse.submit(query)
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, query_id: str):
+        self.sfqid = query_id
+        self._rows = []
+
+    def fetchall(self) -> list:
+        return list(self._rows)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class StubConnection:
+    """Stand-in for snowflake.connector.SnowflakeConnection, backed by a StubWarehouse."""
+
+    def __init__(self, warehouse: StubWarehouse):
+        self.warehouse = warehouse
+        self.database = warehouse.database
+        self.schema = warehouse.schema
+        self._closed = False
+
+    def cursor(self) -> StubCursor:
+        return StubCursor(self)
+
+    def commit(self):
+        time.sleep(self.warehouse.run("COMMIT"))
+
+    def rollback(self):
+        time.sleep(self.warehouse.run("ROLLBACK"))
+
+    def get_query_status_throw_if_error(self, query_id: str) -> str:
+        return self.warehouse.query_status(query_id)
+
+    def is_still_running(self, status: str) -> bool:
+        return status == RUNNING
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self._closed = True
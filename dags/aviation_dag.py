@@ -5,9 +5,11 @@ from dotenv import load_dotenv
 import os
 
 from src.flights_ingestion import extract_load_opensky_data
-from src.arr_dep_ingestion import extract_load_aerodatabox_data
-from snowflake_handler import SnowflakeHandler
+from src.arr_dep_ingestion import extract_load_aerodatabox_data, submit_aerodatabox_ddl
+from src.raw_schemas import OPENSKY_FLIGHTS
+from snowflake_handler import get_connection_pool, AsyncQueryExecutor
 from utils.logging import setup_logger
+from utils.metrics import reset_metrics, export_run_metrics
 
 # Initialize paths
 dbt_env_path = os.path.join(os.environ['AIRFLOW_HOME'], 'dbt_project', 'dbt.env')
@@ -30,15 +32,13 @@ profile_config = ProfileConfig(
 schema = os.environ.get('SCHEMA')
 
 def get_snowflake_connection(logger):
-    """Reusable Snowflake connection initializer."""
-    handler = SnowflakeHandler()
-
-    if not handler.conn:
-        logger.info("Connecting to Snowflake...")
-        handler.connect()
-
-    connection = handler.conn
-    cursor = handler.conn.cursor()
+    """
+    Reusable Snowflake connection initializer.
+    Connections come from the process-wide pool, closing one hands it back for reuse.
+    """
+    logger.info("Connecting to Snowflake...")
+    connection = get_connection_pool().acquire()
+    cursor = connection.cursor()
     
     return connection, cursor
 
@@ -64,30 +64,29 @@ def aviation_platform():
 
         execution_date = context["ds"]  # YYYY-MM-DD string
 
-        columns = [
-            'icao24', 'firstSeen', 'estDepartureAirport', 'lastSeen',
-            'estArrivalAirport', 'callsign', 'estDepartureAirportHorizDistance',
-            'estDepartureAirportVertDistance', 'estArrivalAirportHorizDistance',
-            'estArrivalAirportVertDistance', 'departureAirportCandidatesCount',
-            'arrivalAirportCandidatesCount', 'record_date'
-        ]
+        columns = OPENSKY_FLIGHTS.column_names
 
         opensky_credentials = "credentials/opensky_credentials.json"
         OPENSKY_API = "https://opensky-network.org/api"
         endpoint = "/flights/all"
         table_name = "flights"
 
+        reset_metrics()
         connection, _ = get_snowflake_connection(logger)
 
-        extract_load_opensky_data(
-            columns,
-            opensky_credentials,
-            OPENSKY_API,
-            execution_date,
-            endpoint,
-            table_name,
-            connection
-        )
+        try:
+            extract_load_opensky_data(
+                columns,
+                opensky_credentials,
+                OPENSKY_API,
+                execution_date,
+                endpoint,
+                table_name,
+                connection
+            )
+        finally:
+            connection.close()
+            export_run_metrics("opensky", context["run_id"])
 
     # -----------------------------------------------------
     # AeroDataBox Task
@@ -101,31 +100,47 @@ def aviation_platform():
         AERODATABOX_API = "https://prod.api.market/api/v1/aedbx/aerodatabox"
         endpoint = "flights/airports/"
 
-        connection, cursor = get_snowflake_connection(logger)
-        
-        logger.info("Executing query to fetch the airports.....")
-        airports_query = "SELECT icao FROM airports WHERE COUNTRY IN ('DE', 'FR', 'CH','AE')"
-        cursor.execute(airports_query)
+        reset_metrics()
+        connection, _ = get_snowflake_connection(logger)
         
-        # Fetch all rows (each row is a tuple)
-        rows = cursor.fetchall()
-    
-        # Extract only the airport values into a list
-        airports_to_fetch = [row[0] for row in rows]
+        try:
+            executor = AsyncQueryExecutor(connection)
+            
+            logger.info("Executing query to fetch the airports.....")
+            airports_query = "SELECT icao FROM airports WHERE COUNTRY IN ('DE', 'FR', 'CH','AE')"
+            airports_lookup = executor.submit(airports_query)
+            
+            # The raw tables are created while the lookup runs and the API is fetched
+            pending_ddl = submit_aerodatabox_ddl(executor)
+            
+            # Fetch all rows (each row is a tuple)
+            rows = airports_lookup.result()
         
-        if len(airports_to_fetch) > 0:
-            logger.info(f"Fetched all airports' icao codes. \n airport: {airports_to_fetch}")
-            extract_load_aerodatabox_data(
-                aerodatabox_key_path,
-                AERODATABOX_API,
-                endpoint,
-                airports_to_fetch,
-                execution_date,
-                connection
-            )
-        else:
-            logger.error("No airports were fetched from snowflake.")
-            raise Exception ("noAirportsData")
+            # Extract only the airport values into a list
+            airports_to_fetch = [row[0] for row in rows]
+            
+            if len(airports_to_fetch) > 0:
+                logger.info(f"Fetched all airports' icao codes. \n airport: {airports_to_fetch}")
+                extract_load_aerodatabox_data(
+                    aerodatabox_key_path,
+                    AERODATABOX_API,
+                    endpoint,
+                    airports_to_fetch,
+                    execution_date,
+                    connection,
+                    # Departures and arrivals are loaded concurrently on pooled connections
+                    connection_factory=get_connection_pool().acquire,
+                    pending_ddl=pending_ddl
+                )
+            else:
+                # Let the table creation finish before the connection goes back to the pool
+                for query in pending_ddl:
+                    query.result()
+                logger.error("No airports were fetched from snowflake.")
+                raise Exception ("noAirportsData")
+        finally:
+            connection.close()
+            export_run_metrics("aerodatabox", context["run_id"])
     
     dbt_stg_airports = DbtTaskGroup(
         group_id="airports_data",
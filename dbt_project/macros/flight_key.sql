@@ -0,0 +1,31 @@
+{#
+    Source filter of the base models for raw rows loaded before the ingestion computed flight_key.
+    Those get a warehouse hash of the same columns, which doesn't match the keys of later loads,
+    so a later load of their airport and day supersedes them. The filter is only rendered when the
+    days read (see changed_dates) include any, which a probe query checks when the model runs.
+#}
+{% macro legacy_flight_key_filter(raw_relation, dates) -%}
+    {%- set has_legacy_rows = false -%}
+    {%- if execute -%}
+        {%- set probe -%}
+            SELECT 1 FROM {{ raw_relation }}
+            WHERE flight_key IS NULL AND {{ in_dates('flight_date', dates) }}
+            LIMIT 1
+        {%- endset -%}
+        {%- set has_legacy_rows = run_query(probe) | length > 0 -%}
+    {%- endif -%}
+    {%- if has_legacy_rows -%}
+        (
+            flight_key IS NOT NULL
+            OR NOT EXISTS (
+                SELECT 1
+                FROM {{ raw_relation }} AS hashed
+                WHERE hashed.flight_key IS NOT NULL
+                    AND hashed.flight_date = raw.flight_date
+                    AND hashed.airport_icao = raw.airport_icao
+            )
+        )
+    {%- else -%}
+        TRUE
+    {%- endif -%}
+{%- endmacro %}
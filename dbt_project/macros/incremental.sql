@@ -0,0 +1,56 @@
+{#
+    Days the incremental staging models rebuild: the days of `date_column` that received raw rows
+    since the last build, i.e. with an ingestion_timestamp newer than the newest one in the model,
+    however old the day is (backfills, DAG runs cleared for an earlier date). The models replace
+    whole flight_date partitions (delete+insert on flight_date), so nothing else needs reading.
+    Returns a list of YYYY-MM-DD strings, or none on full builds, to pass to in_dates().
+#}
+{% macro changed_dates(raw_relation, date_column) -%}
+    {%- if not is_incremental() -%}
+        {%- do return(none) -%}
+    {%- endif -%}
+    {%- set dates = [] -%}
+    {%- if execute -%}
+        {%- set query -%}
+            SELECT DISTINCT {{ date_column }}
+            FROM {{ raw_relation }}
+            WHERE ingestion_timestamp > (
+                SELECT COALESCE(MAX(ingestion_timestamp), CAST('1900-01-01' AS TIMESTAMP)) FROM {{ this }}
+            )
+            ORDER BY 1
+        {%- endset -%}
+        {%- for day in run_query(query).columns[0].values() if day is not none -%}
+            {%- do dates.append((day | string)[:10]) -%}
+        {%- endfor -%}
+    {%- endif -%}
+    {%- do return(dates) -%}
+{%- endmacro %}
+
+{#
+    Filter on the days returned by changed_dates(), widened by `days_around` days on either side.
+    The days are rendered as literals, so the warehouse prunes the raw tables' partitions on them.
+#}
+{% macro in_dates(date_column, dates, days_around=0) -%}
+    {%- if dates is none -%}
+        TRUE
+    {%- else -%}
+        {%- set widened = [] -%}
+        {%- for day in dates -%}
+            {%- for offset in range(-days_around, days_around + 1) -%}
+                {%- set widened_day = (modules.datetime.date.fromisoformat(day) + modules.datetime.timedelta(days=offset)).isoformat() -%}
+                {%- if widened_day not in widened -%}
+                    {%- do widened.append(widened_day) -%}
+                {%- endif -%}
+            {%- endfor -%}
+        {%- endfor -%}
+        {%- if widened -%}
+            {{ date_column }} IN (
+                {%- for day in widened | sort -%}
+                    CAST('{{ day }}' AS DATE){{ ", " if not loop.last }}
+                {%- endfor -%}
+            )
+        {%- else -%}
+            FALSE
+        {%- endif -%}
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,70 @@
+{#
+    Snowflake functions and types used by the staging models, with DuckDB equivalents for the
+    local `duckdb` target (profiles.yml). The default implementations render the Snowflake SQL
+    unchanged. TRY_CAST and QUALIFY need no shim, DuckDB supports both.
+#}
+
+{# Position of substring in string, 1-based, 0 when not found #}
+{% macro charindex(substring, string) %}
+    {{ return(adapter.dispatch('charindex')(substring, string)) }}
+{% endmacro %}
+
+{% macro default__charindex(substring, string) -%}
+    CHARINDEX({{ substring }}, {{ string }})
+{%- endmacro %}
+
+{% macro duckdb__charindex(substring, string) -%}
+    STRPOS({{ string }}, {{ substring }})
+{%- endmacro %}
+
+{# Integer type for casts, Snowflake NUMBER(38, 0) #}
+{% macro number_type() %}
+    {{ return(adapter.dispatch('number_type')()) }}
+{% endmacro %}
+
+{% macro default__number_type() -%}
+    number
+{%- endmacro %}
+
+{% macro duckdb__number_type() -%}
+    bigint
+{%- endmacro %}
+
+{# Timestamp without time zone from epoch seconds #}
+{% macro epoch_to_timestamp(seconds) %}
+    {{ return(adapter.dispatch('epoch_to_timestamp')(seconds)) }}
+{% endmacro %}
+
+{% macro default__epoch_to_timestamp(seconds) -%}
+    to_timestamp({{ seconds }})
+{%- endmacro %}
+
+{% macro duckdb__epoch_to_timestamp(seconds) -%}
+    make_timestamp(({{ seconds }}) * 1000000)
+{%- endmacro %}
+
+{# Current time of the session #}
+{% macro session_timestamp() %}
+    {{ return(adapter.dispatch('session_timestamp')()) }}
+{% endmacro %}
+
+{% macro default__session_timestamp() -%}
+    current_timestamp()
+{%- endmacro %}
+
+{% macro duckdb__session_timestamp() -%}
+    current_timestamp
+{%- endmacro %}
+
+{# Signed 64-bit hash of several columns, NULLs included #}
+{% macro hash64(columns) %}
+    {{ return(adapter.dispatch('hash64')(columns)) }}
+{% endmacro %}
+
+{% macro default__hash64(columns) -%}
+    HASH({{ columns | join(', ') }})
+{%- endmacro %}
+
+{% macro duckdb__hash64(columns) -%}
+    CAST(hash({{ columns | join(', ') }}) >> 1 AS BIGINT)
+{%- endmacro %}
@@ -1,5 +1,5 @@
 {{ config(
-    materialized = "view"
+    materialized = "table"
 ) }}
 
 WITH source as (
@@ -24,7 +24,7 @@ renamed as (
         TRY_CAST(latitude::string AS FLOAT) AS latitude,
         TRY_CAST(longitude::string AS FLOAT) AS longitude,
 
-        current_timestamp() as record_loaded_at,
+        {{ session_timestamp() }} as record_loaded_at,
         'airports' as source_table
 
     FROM 
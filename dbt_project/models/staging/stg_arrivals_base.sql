@@ -1,17 +1,30 @@
 {{ config(
-    materialized = "view"
+    materialized = "incremental",
+    incremental_strategy = "delete+insert",
+    unique_key = "flight_date",
+    on_schema_change = "append_new_columns"
 ) }}
 
+{%- set rebuilt_dates = changed_dates(source('raw_layer', 'airport_arrivals'), 'flight_date') %}
+
 WITH source AS (
     SELECT
         *
     FROM
-        {{source('raw_layer', 'airport_arrivals')}}
+        {{source('raw_layer', 'airport_arrivals')}} AS raw
+    WHERE
+        {{ in_dates('flight_date', rebuilt_dates) }}
+        AND {{ legacy_flight_key_filter(source('raw_layer', 'airport_arrivals'), rebuilt_dates) }}
 ),
 -- Exclude records where iscargo = TRUE and not the flights that have different scheduled date to flight_date
 filtered AS (
     SELECT
         -- Core Flight Identifiers
+        -- flight_key is hashed at ingestion, rows loaded before it existed get a warehouse hash of the same columns
+        COALESCE(
+            flight_key,
+            {{ hash64(['number', 'flight_date', 'departure_airport_icao', 'departure_scheduledtime_utc', 'airport_icao', 'arrival_scheduledtime_utc']) }}
+        ) AS flight_key,
         number AS flight_number,
         TRY_CAST(flight_date AS DATE) AS flight_date,
         UPPER(callSign) AS callsign,
@@ -55,6 +68,7 @@ filtered AS (
         arrival_runwaytime_local AS arrival_runway_local,
 
         ingestion_timestamp,
+        content_hash,
         data_source
     FROM
         source
@@ -68,13 +82,7 @@ latest_records AS (
         *
     FROM filtered
     QUALIFY ROW_NUMBER() OVER (
-        PARTITION BY 
-            flight_number,
-            flight_date,
-            departure_airport_icao,
-            departure_scheduled_utc,
-            airport_icao,
-            arrival_scheduled_utc
+        PARTITION BY flight_key
         ORDER BY ingestion_timestamp DESC
     ) = 1
 )
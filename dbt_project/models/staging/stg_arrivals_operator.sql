@@ -24,11 +24,11 @@ ranked AS (
     FROM base
 ),
 
-primary AS (
+primary_record AS (
     SELECT * FROM ranked WHERE rn = 1
 ),
 
-secondary AS (
+secondary_record AS (
     SELECT * FROM ranked WHERE rn = 2
 ),
 merged AS (
@@ -48,7 +48,7 @@ merged AS (
         COALESCE(p.airline_name, s.airline_name) AS airline_name,
         COALESCE(
             p.airline_iata,
-            LEFT(p.flight_number, CHARINDEX(' ', p.flight_number) - 1)
+            LEFT(p.flight_number, {{ charindex("' '", 'p.flight_number') }} - 1)
         ) AS airline_iata,
         COALESCE(
             p.airline_icao,
@@ -76,8 +76,8 @@ merged AS (
         p.ingestion_timestamp,
         p.data_source
 
-    FROM primary p
-    LEFT JOIN secondary s
+    FROM primary_record p
+    LEFT JOIN secondary_record s
         ON p.flight_date = s.flight_date
         AND p.callsign = s.callsign
         AND p.aircraft_mode_s = s.aircraft_mode_s
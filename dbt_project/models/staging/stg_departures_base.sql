@@ -1,17 +1,30 @@
 {{ config(
-    materialized = "view"
+    materialized = "incremental",
+    incremental_strategy = "delete+insert",
+    unique_key = "flight_date",
+    on_schema_change = "append_new_columns"
 ) }}
 
+{%- set rebuilt_dates = changed_dates(source('raw_layer', 'airport_departures'), 'flight_date') %}
+
 WITH source AS (
     SELECT
         *
     FROM
-        {{source('raw_layer', 'airport_departures')}}
+        {{source('raw_layer', 'airport_departures')}} AS raw
+    WHERE
+        {{ in_dates('flight_date', rebuilt_dates) }}
+        AND {{ legacy_flight_key_filter(source('raw_layer', 'airport_departures'), rebuilt_dates) }}
 ),
 -- Exclude records where iscargo = TRUE and has scheduled date not flight_date
 filtered AS (
     SELECT
         -- Core Flight Identifiers
+        -- flight_key is hashed at ingestion, rows loaded before it existed get a warehouse hash of the same columns
+        COALESCE(
+            flight_key,
+            {{ hash64(['number', 'flight_date', 'UPPER(callSign)', 'aircraft_modeS', 'airport_icao']) }}
+        ) AS flight_key,
         number AS flight_number,
         TRY_CAST(flight_date AS DATE) AS flight_date,
         UPPER(callSign) AS callsign,
@@ -55,6 +68,7 @@ filtered AS (
         arrival_runwaytime_local AS arrival_runway_local,
 
         ingestion_timestamp,
+        content_hash,
         data_source
     FROM
         source
@@ -62,36 +76,26 @@ filtered AS (
         isCargo = FALSE
         AND DATE(departure_scheduledtime_utc) = flight_date
 ),
+-- latest load of every flight and schedule (departure time, destination and arrival time)
 latest_records AS (
-    -- keeping the latest record per full flight identity
-    SELECT 
-        *
+    SELECT *
     FROM filtered
     QUALIFY ROW_NUMBER() OVER (
-        PARTITION BY 
-            flight_number,
-            flight_date,
-            callsign,
-            aircraft_mode_s,
-            airport_icao,
+        PARTITION BY
+            flight_key,
             departure_scheduled_utc,
             arrival_airport_icao,
             arrival_scheduled_utc
         ORDER BY ingestion_timestamp DESC
     ) = 1
 ),
-
 final_dedup AS (
-    -- dedupe further using aircraft + callsign identifiers
+    -- one record per flight (number, date, callsign, aircraft and airport): the most complete of
+    -- its latest schedules, the latest load among equally complete ones
     SELECT *
     FROM latest_records
     QUALIFY ROW_NUMBER() OVER (
-        PARTITION BY 
-            flight_number,
-            flight_date,
-            callsign,
-            aircraft_mode_s,
-            airport_icao
+        PARTITION BY flight_key
         ORDER BY 
             -- Push records with null to end (so they are dropped)
             CASE 
@@ -101,7 +105,8 @@ final_dedup AS (
                 WHEN arrival_revised_utc IS NULL THEN 1
                 WHEN arrival_runway_utc IS NULL THEN 1
                 ELSE 0
-            END
+            END,
+            ingestion_timestamp DESC
     ) = 1
 )
 
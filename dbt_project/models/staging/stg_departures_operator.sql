@@ -55,7 +55,7 @@ merged AS (
         p.airline_name,
         COALESCE(
             p.airline_iata,
-            LEFT(p.flight_number, CHARINDEX(' ', p.flight_number) - 1)
+            LEFT(p.flight_number, {{ charindex("' '", 'p.flight_number') }} - 1)
         ) AS airline_iata,
         COALESCE(
             p.airline_icao,
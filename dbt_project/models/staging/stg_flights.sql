@@ -1,12 +1,20 @@
 {{ config(
-    materialized = "view"
+    materialized = "incremental",
+    incremental_strategy = "delete+insert",
+    unique_key = "flight_date"
 ) }}
 
+{%- set rebuilt_dates = changed_dates(source('raw_layer', 'flights'), 'record_date') %}
+
+-- A flight is reported under at most two neighbouring record dates (e.g. crossing midnight), so the
+-- days next to a changed one are rebuilt too, deduplicated against the days next to those
 WITH source as (
     SELECT
         *
     FROM
         {{ source('raw_layer', 'flights') }}
+    WHERE
+        {{ in_dates('record_date', rebuilt_dates, days_around=2) }}
 ),
 renamed as (
     SELECT
@@ -14,16 +22,16 @@ renamed as (
         upper(TRIM(callsign)) as callsign,
         upper(estdepartureairport) as est_departure_airport,
         upper(estarrivalairport) as est_arrival_airport,
-        try_cast(firstseen as number) as first_seen,
-        try_cast(lastseen as number) as last_seen,
-        to_timestamp(try_cast(firstseen as number)) as first_seen_ts,
-        to_timestamp(try_cast(lastseen as number)) as last_seen_ts,
-        try_cast(estdepartureairporthorizdistance as number) as dep_airport_horiz_distance,
-        try_cast(estdepartureairportvertdistance as number) as dep_airport_vert_distance,
-        try_cast(estarrivalairporthorizdistance as number) as arr_airport_horiz_distance,
-        try_cast(estarrivalairportvertdistance as number) as arr_airport_vert_distance,
-        try_cast(departureairportcandidatescount as number) as departure_airport_candidates_count,
-        try_cast(arrivalairportcandidatescount as number) as arrival_airport_candidates_count,
+        try_cast(firstseen as {{ number_type() }}) as first_seen,
+        try_cast(lastseen as {{ number_type() }}) as last_seen,
+        {{ epoch_to_timestamp('try_cast(firstseen as ' ~ number_type() ~ ')') }} as first_seen_ts,
+        {{ epoch_to_timestamp('try_cast(lastseen as ' ~ number_type() ~ ')') }} as last_seen_ts,
+        try_cast(estdepartureairporthorizdistance as {{ number_type() }}) as dep_airport_horiz_distance,
+        try_cast(estdepartureairportvertdistance as {{ number_type() }}) as dep_airport_vert_distance,
+        try_cast(estarrivalairporthorizdistance as {{ number_type() }}) as arr_airport_horiz_distance,
+        try_cast(estarrivalairportvertdistance as {{ number_type() }}) as arr_airport_vert_distance,
+        try_cast(departureairportcandidatescount as {{ number_type() }}) as departure_airport_candidates_count,
+        try_cast(arrivalairportcandidatescount as {{ number_type() }}) as arrival_airport_candidates_count,
         try_cast(record_date as date) as flight_date,
         ingestion_timestamp,
     FROM
@@ -42,4 +50,5 @@ deduplicated as (
     ) = 1
 )
 
-select * from deduplicated
\ No newline at end of file
+select * from deduplicated
+where {{ in_dates('flight_date', rebuilt_dates, days_around=1) }}
\ No newline at end of file
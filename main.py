@@ -1,19 +1,14 @@
 from src.flights_ingestion import extract_load_opensky_data
-from src.arr_dep_ingestion import extract_load_aerodatabox_data
+from src.arr_dep_ingestion import extract_load_aerodatabox_data, submit_aerodatabox_ddl
+from src.raw_schemas import OPENSKY_FLIGHTS
 from utils.logging import setup_logger
-from snowflake_handler import SnowflakeHandler
+from snowflake_handler import SnowflakeHandler, AsyncQueryExecutor
 
 logger = setup_logger('opensky_ingestion.log')
 
 def main():
     
-    columns = [
-        'icao24', 'firstSeen', 'estDepartureAirport', 'lastSeen',
-        'estArrivalAirport', 'callsign', 'estDepartureAirportHorizDistance',
-        'estDepartureAirportVertDistance', 'estArrivalAirportHorizDistance',
-        'estArrivalAirportVertDistance', 'departureAirportCandidatesCount',
-        'arrivalAirportCandidatesCount', 'record_date'
-    ]
+    columns = OPENSKY_FLIGHTS.column_names
     
     opensky_cred_file = "credentials/opensky_credentials.json"
     
@@ -28,7 +23,8 @@ def main():
         logger.info("Connecting to Snowflake...")
         snowflake_handler.connect()
         
-    cursor = snowflake_handler.conn.cursor()
+    connection = snowflake_handler.conn
+    executor = AsyncQueryExecutor(connection)
     
     #extract_load_opensky_data(columns, opensky_cred_file, OPENSKY_API_BASE_URL, date, connection)
     
@@ -37,10 +33,13 @@ def main():
     endpoint = "flights/airports/"
     
     airports_query = "SELECT DISTINCT icao FROM airports"
-    cursor.execute(airports_query)
+    airports_lookup = executor.submit(airports_query)
+    
+    # The raw tables are created while the lookup runs and the API is fetched
+    pending_ddl = submit_aerodatabox_ddl(executor)
     
     # Fetch all rows (each row is a tuple)
-    rows = cursor.fetchall()
+    rows = airports_lookup.result()
 
     # Extract only the airport values into a list
     airports_to_fetch = [row[0] for row in rows]
@@ -53,7 +52,8 @@ def main():
             endpoint,
             airports_to_fetch,
             date,
-            connection
+            connection,
+            pending_ddl=pending_ddl
         )
     else:
         logger.error("No airports were fetched from snowflake.")
@@ -1,11 +1,37 @@
 import os
+import time
+import atexit
+import functools
+import threading
 import snowflake.connector
 from typing import Dict
 import logging
 from dotenv import load_dotenv
 from cryptography.hazmat.primitives import serialization
 
+from utils.local_state import env_flag
+
 load_dotenv()
+
+# Idle connections kept by the connection pool for reuse
+DEFAULT_POOL_SIZE = 4
+
+# Polling of asynchronously submitted statements backs off from the first to the max interval
+DEFAULT_POLL_INTERVAL_SECONDS = 0.2
+MAX_POLL_INTERVAL_SECONDS = 2.0
+
+# Sessions whose connection parameters already passed the probe query in this process
+_validated_sessions = set()
+_validated_sessions_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def load_private_key(private_key_str: str, private_key_passphrase: str):
+    """Deserializes the PEM private key once per process, every later connect reuses it."""
+    return serialization.load_pem_private_key(
+        private_key_str.encode(),
+        password=private_key_passphrase.encode() if private_key_passphrase else None
+    )
+
 class SnowflakeHandler:
     def __init__(self):
         """
@@ -36,13 +62,10 @@ class SnowflakeHandler:
         private_key_str  = self.sf_options["sfprivate_key"]  # This comes directly from ENV
         private_key_passphrase = self.sf_options["sfprivate_key_passphrase"]
 
-        # Convert string to bytes
-        private_key_bytes = private_key_str.encode()
+        p_key = load_private_key(private_key_str, private_key_passphrase)
         
-        p_key = serialization.load_pem_private_key(
-            private_key_bytes,
-            password=private_key_passphrase.encode()
-        )
+        # Heartbeats keep the session token valid while the connection sits idle in the pool
+        keep_alive = env_flag('SNOWFLAKE_KEEPALIVE')
         
         if not self.conn:
             self.conn = snowflake.connector.connect(
@@ -52,17 +75,29 @@ class SnowflakeHandler:
                 warehouse=self.sf_options['sfWarehouse'],
                 database=self.sf_options['sfDatabase'],
                 schema=self.sf_options['sfSchema'],
-                role=self.sf_options['sfRole']
+                role=self.sf_options['sfRole'],
+                client_session_keep_alive=keep_alive
             )
             
             if not self.conn:
                 logging.error("Not yet connected.")
                 raise NotImplementedError("Not connected but tried to connect.")
             
-            # Simple test query
+            # Simple test query, once per process for the same account, user and role
+            session_key = (self.sf_options['sfAccount'], self.sf_options['sfUser'], self.sf_options['sfRole'])
+            with _validated_sessions_lock:
+                validated = session_key in _validated_sessions
+            
+            if validated:
+                logging.info("Connected to Snowflake (session already validated in this process).")
+                return
+            
             with self.conn.cursor() as cur:
                 cur.execute("SELECT CURRENT_VERSION()")
                 logging.info(f"Connected to Snowflake: {cur.fetchone()[0]}")
+            
+            with _validated_sessions_lock:
+                _validated_sessions.add(session_key)
 
     def validate_connection(self):
         """Validate that all required parameters are present"""
@@ -88,4 +123,122 @@ class SnowflakeHandler:
         if self.conn:
             self.conn.close()
             logging.info("Snowflake connection closed.")
-            self.conn = None
\ No newline at end of file
+            self.conn = None
+
+class PooledConnection:
+    """
+    Connection handed out by SnowflakeConnectionPool. Behaves like the underlying
+    snowflake connection, but close() gives it back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, handler: SnowflakeHandler):
+        self._pool = pool
+        self._handler = handler
+
+    def __getattr__(self, name):
+        return getattr(self._handler.conn, name)
+
+    def close(self):
+        if self._handler is not None:
+            self._pool.release(self._handler)
+            self._handler = None
+
+class SnowflakeConnectionPool:
+    """
+    Process-wide pool of connected SnowflakeHandlers, so concurrent loaders and
+    consecutive steps of a run reuse authenticated sessions instead of logging in again.
+    Up to `max_idle` (SNOWFLAKE_POOL_SIZE) idle connections are kept, acquire() never blocks.
+    """
+
+    def __init__(self, max_idle: int = None):
+        self.max_idle = max_idle or int(os.getenv('SNOWFLAKE_POOL_SIZE', DEFAULT_POOL_SIZE))
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> PooledConnection:
+        """Returns an idle connection, or a new one when none is available."""
+        with self._lock:
+            while self._idle:
+                handler = self._idle.pop()
+                # A validated, kept-alive session needs no probe query before it's reused
+                if handler.conn and not handler.conn.is_closed():
+                    logging.info("Reusing pooled Snowflake connection.")
+                    return PooledConnection(self, handler)
+
+        handler = SnowflakeHandler()
+        handler.connect()
+        return PooledConnection(self, handler)
+
+    def release(self, handler: SnowflakeHandler):
+        if not handler.conn or handler.conn.is_closed():
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(handler)
+                return
+        handler.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for handler in idle:
+            handler.close()
+
+class AsyncQuery:
+    """A statement submitted with execute_async, polled on its connection until it completes."""
+
+    def __init__(self, connection, query_id: str, query: str):
+        self.connection = connection
+        self.query_id = query_id
+        self.query = query
+
+    def done(self) -> bool:
+        """True once the statement finished, raises the statement's error if it failed."""
+        status = self.connection.get_query_status_throw_if_error(self.query_id)
+        return not self.connection.is_still_running(status)
+
+    def result(self, timeout: float = None) -> list:
+        """Waits for the statement to finish and returns its result rows."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        interval = float(os.getenv('SNOWFLAKE_POLL_INTERVAL_SECONDS', DEFAULT_POLL_INTERVAL_SECONDS))
+
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Query {self.query_id} still running after {timeout}s.")
+            time.sleep(interval)
+            interval = min(interval * 1.5, MAX_POLL_INTERVAL_SECONDS)
+
+        with self.connection.cursor() as cursor:
+            cursor.get_results_from_sfqid(self.query_id)
+            return cursor.fetchall()
+
+class AsyncQueryExecutor:
+    """
+    Submits statements without waiting for them (the connector's execute_async), so DDL,
+    lookups and COPY INTO run in Snowflake while the caller fetches or prepares the next batch.
+    Several statements may be in flight on the same connection, call result() to wait for one.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def submit(self, query: str, params=None) -> AsyncQuery:
+        with self.connection.cursor() as cursor:
+            cursor.execute_async(query, params)
+            query_id = cursor.sfqid
+
+        logging.info(f"Submitted query {query_id}: {' '.join(query.split())[:80]}")
+        return AsyncQuery(self.connection, query_id, query)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool() -> SnowflakeConnectionPool:
+    """Returns the process-wide connection pool, closing its connections at interpreter exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SnowflakeConnectionPool()
+            atexit.register(_pool.close_all)
+        return _pool
\ No newline at end of file
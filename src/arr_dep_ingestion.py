@@ -1,25 +1,47 @@
 import sys, os
 import logging
 import requests
+import time
 import urllib.parse
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.json_reader import json_reader
 from utils.date_ranges import date_string_to_day_range_epoch
-from utils.transaction_cursor import transaction
+from utils.http_session import get_session
+from utils.rate_limiter import get_limiter
+from utils.response_cache import get_cached_response, store_response, log_cache_stats
+from utils.field_extraction import compile_extractor
+from utils.fast_json import PayloadDecoder
+from utils.parallel_loader import load_tables
+from utils.window_planner import WindowPlanner
+from utils.checkpoints import UnitCheckpoint
+from utils.record_buffer import ColumnarBuffer, sort_rows
+from utils.metrics import track_request, record_retry, record_parse, record_load
+from utils.upsert import WRITE_MODE_APPEND, WRITE_MODE_MERGE, resolve_write_mode
+from snowflake_handler import AsyncQueryExecutor
+from src.raw_schemas import AIRPORT_DEPARTURES, AIRPORT_ARRIVALS, submit_table_ddl
 
 load_dotenv()
+
+# Number of airport/window requests that are allowed to be in flight at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Seconds to wait for a window's response, slower windows are bisected (see _fetch_airport_window_adaptive)
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 60
+
 class AeroDataBoxAPIError(Exception):
     """Custom exception for AeroDataBox API errors."""
     pass
 
 def make_aerodatabox_request(api_key: str, base_url: str, endpoint: str, code_type: str,
-                             code: str, time_from: str, time_to: str, timeout: int = 60):
+                             code: str, time_from: str, time_to: str, timeout: int = 60, retry_reads: bool = True):
     """
     Makes a request to the AeroDataBox API for flight arrivals/departures.
-
+    With retry_reads=False a read timeout is raised on the first occurrence instead of being retried.
     """
     encoded_from = urllib.parse.quote(time_from)
     encoded_to = urllib.parse.quote(time_to)
@@ -33,12 +55,22 @@ def make_aerodatabox_request(api_key: str, base_url: str, endpoint: str, code_ty
 
     full_url = f"{base_url}/{endpoint}/{code_type}/{code}/{encoded_from}/{encoded_to}"
 
+    cached_response = get_cached_response("aerodatabox", endpoint, code, time_from, time_to)
+    if cached_response is not None:
+        logging.info(f"Serving ICAO: {code} ({time_from} - {time_to}) from the response cache.")
+        return cached_response
+
     logging.info(f"Sending API request for ICAO: {code}")
     logging.debug(f"Full URL: {full_url}")
 
     try:
-        response = requests.get(full_url, params=params, headers=headers, timeout=timeout)
+        # Shared quota-aware pacing and adaptive concurrency for all AeroDataBox workers
+        with get_limiter("aerodatabox").request() as observe, track_request("aerodatabox") as track:
+            response = get_session(retry_reads).get(full_url, params=params, headers=headers, timeout=timeout)
+            observe(response)
+            track(response, code)
         response.raise_for_status()  # Raises HTTPError for 4xx/5xx
+        store_response("aerodatabox", endpoint, code, time_from, time_to, response)
         return response
 
     except requests.exceptions.HTTPError as errh:
@@ -76,98 +108,184 @@ def get_value(data, path, default=None):
             return default
     return data
 
-def fetch_aerodatabox_data(api_key_file_path: str, base_url: str, endpoint: str, airports_icao: list[str], date: str):
+# --- Field maps: (column, source path) in table column order, see src/raw_schemas.py ---
+
+DEPARTURE_FIELDS = AIRPORT_DEPARTURES.fields
+ARRIVAL_FIELDS = AIRPORT_ARRIVALS.fields
+
+DEPARTURE_COLUMNS = AIRPORT_DEPARTURES.column_names
+ARRIVAL_COLUMNS = AIRPORT_ARRIVALS.column_names
+
+# Natural flight keys used to MERGE reruns into the raw tables (RAW_WRITE_MODE=merge)
+DEPARTURE_KEY_COLUMNS = AIRPORT_DEPARTURES.key_columns
+ARRIVAL_KEY_COLUMNS = AIRPORT_ARRIVALS.key_columns
+
+# Compiled once at import time, each call returns a row tuple in column order
+parse_departure_record = compile_extractor(DEPARTURE_FIELDS, ("flight_date", "airport_icao"), "parse_departure_record")
+parse_arrival_record = compile_extractor(ARRIVAL_FIELDS, ("flight_date", "airport_icao"), "parse_arrival_record")
+
+# Decode a response body straight into (departure_rows, arrival_rows), see JSON_DECODER. One per write
+# mode, the append one leaves content_hash NULL rather than hashing records no MERGE compares
+AERODATABOX_DECODERS = {
+    mode: PayloadDecoder(
+        [("departures", AIRPORT_DEPARTURES.write_fields(mode)), ("arrivals", AIRPORT_ARRIVALS.write_fields(mode))],
+        ("flight_date", "airport_icao"), f"aerodatabox_{mode}"
+    )
+    for mode in (WRITE_MODE_APPEND, WRITE_MODE_MERGE)
+}
+
+def _is_read_timeout(error: BaseException) -> bool:
+    """
+    True when a read timeout caused the error. requests raises ReadTimeout directly, or, once the
+    session's retries are used up, a ConnectionError wrapping urllib3's MaxRetryError(ReadTimeoutError).
+    """
+    seen = set()
+    pending = [error]
+    while pending:
+        error = pending.pop()
+        if error is None or id(error) in seen:
+            continue
+        seen.add(id(error))
+        if isinstance(error, (requests.exceptions.ReadTimeout, urllib3.exceptions.ReadTimeoutError)):
+            return True
+        pending += [error.__cause__, error.__context__, getattr(error, "reason", None)]
+        pending += [arg for arg in error.args if isinstance(arg, BaseException)]
+    return False
+
+def _fetch_airport_window(api_key: str, base_url: str, endpoint: str, airport_icao: str, date: str,
+                          time_from: str, time_to: str, retry_reads: bool = True):
+    """
+    Fetches a single (airport, time window) unit from AeroDataBox.
+    Returns the parsed (departure_rows, arrival_rows), both empty when the API has no content.
+    """
+    timeout = float(os.getenv('AERODATABOX_REQUEST_TIMEOUT_SECONDS', DEFAULT_REQUEST_TIMEOUT_SECONDS))
+    response = make_aerodatabox_request(api_key, base_url, endpoint, "icao", airport_icao, time_from, time_to,
+                                        timeout, retry_reads)
+    half_name = f"{time_from} - {time_to}"
+
+    if response.status_code == 200:
+        parse_start = time.perf_counter()
+        departures, arrivals = AERODATABOX_DECODERS[resolve_write_mode()].decode(response.content, date, airport_icao)
+        record_parse("aerodatabox", len(departures) + len(arrivals), time.perf_counter() - parse_start)
+        logging.info(f"Retrieved flight data for {airport_icao} ({half_name}).")
+
+        if not departures:
+            logging.warning(f"No departures found for {airport_icao} ({half_name}).")
+        if not arrivals:
+            logging.warning(f"No arrivals found for {airport_icao} ({half_name}).")
+
+        return departures, arrivals
+
+    elif response.status_code == 204:
+        logging.warning(f"No content for {airport_icao} in {half_name}.")
+        return [], []
+    else:
+        logging.error(f"AeroDataBox API error {response.status_code}: {response.text}")
+        raise RuntimeError(f"AeroDataBox API error {response.status_code}: {response.text}")
+
+def _fetch_airport_window_adaptive(api_key: str, base_url: str, endpoint: str, airport_icao: str, date: str,
+                                   time_from: str, time_to: str, planner: WindowPlanner):
+    """
+    Fetches one planned window, bisecting it recursively when the request times out or
+    the response reaches the record cap. Returns the parsed (departure_rows, arrival_rows) for the whole window.
+
+    Windows that can still be split are fetched without read retries, so a slow window is split
+    after one timeout instead of after all retries; windows at the minimum size keep the retries.
+    """
+    sub_windows = planner.bisect(time_from, time_to)
+    start = time.perf_counter()
+    try:
+        departures, arrivals = _fetch_airport_window(
+            api_key, base_url, endpoint, airport_icao, date, time_from, time_to, retry_reads=sub_windows is None
+        )
+    except AeroDataBoxAPIError as e:
+        if sub_windows is None or not _is_read_timeout(e):
+            raise
+        logging.warning(f"Window {time_from} - {time_to} timed out for {airport_icao}, splitting it in two.")
+        record_retry("aerodatabox", airport_icao, "bisect")
+        planner.observe(airport_icao, planner.large_records, planner.slow_seconds + 1)
+        departures, arrivals = [], []
+    else:
+        elapsed = time.perf_counter() - start
+        record_count = len(departures) + len(arrivals)
+        planner.observe(airport_icao, record_count, elapsed)
+
+        if sub_windows is None or not planner.is_truncated(len(departures), len(arrivals)):
+            return departures, arrivals
+
+        logging.warning(f"Window {time_from} - {time_to} looks truncated for {airport_icao} "
+                        f"({len(departures)} departures, {len(arrivals)} arrivals), splitting it in two.")
+        record_retry("aerodatabox", airport_icao, "bisect")
+        departures, arrivals = [], []
+
+    for sub_from, sub_to in sub_windows:
+        sub_departures, sub_arrivals = _fetch_airport_window_adaptive(
+            api_key, base_url, endpoint, airport_icao, date, sub_from, sub_to, planner
+        )
+        departures.extend(sub_departures)
+        arrivals.extend(sub_arrivals)
+
+    return departures, arrivals
+
+def _fetch_airport_unit(api_key: str, base_url: str, endpoint: str, airport_icao: str, date: str,
+                        time_from: str, time_to: str, planner: WindowPlanner, checkpoint: UnitCheckpoint):
+    """
+    Fetches and parses one planned (airport, window) unit, reusing its checkpoint when a previous
+    attempt of the same run already completed it. Returns (departure_rows, arrival_rows).
+
+    Reused units are fed to the planner by record count, so the retry plans the airport's
+    remaining windows the way the failed attempt did.
+    """
+    unit_key = f"{airport_icao}_{time_from}_{time_to}"
+
+    saved = checkpoint.load(unit_key)
+    if saved is not None:
+        logging.info(f"Reusing checkpointed rows for {airport_icao} ({time_from} - {time_to}).")
+        planner.observe(airport_icao, len(saved[0]) + len(saved[1]), 0)
+        return saved
+
+    departure_rows, arrival_rows = _fetch_airport_window_adaptive(
+        api_key, base_url, endpoint, airport_icao, date, time_from, time_to, planner
+    )
+
+    checkpoint.save(unit_key, departure_rows, arrival_rows)
+    return departure_rows, arrival_rows
+
+def _fetch_airport_day(api_key: str, base_url: str, endpoint: str, airport_icao: str, date: str,
+                       start_str: str, end_str: str, planner: WindowPlanner, checkpoint: UnitCheckpoint):
+    """
+    Fetches one airport's day window after window. Each window is planned when the previous one
+    finished, so its size already reflects what the planner observed. Returns (departure_rows, arrival_rows).
+    """
+    departures, arrivals = [], []
+    for time_from, time_to in planner.windows(airport_icao, start_str, end_str):
+        departure_rows, arrival_rows = _fetch_airport_unit(
+            api_key, base_url, endpoint, airport_icao, date, time_from, time_to, planner, checkpoint
+        )
+        departures.extend(departure_rows)
+        arrivals.extend(arrival_rows)
+
+    return departures, arrivals
+
+def fetch_aerodatabox_data(api_key_file_path: str, base_url: str, endpoint: str, airports_icao: list[str], date: str,
+                           max_workers: int = None):
     """
     Fetch arrivals and departures data from AeroDataBox for a given airport and date.
-    Returns tuples of (departures, arrivals) with column order preserved.
+    Returns the departure and arrival rows as ColumnarBuffers, with column order preserved.
+
+    Airports are fetched concurrently through a bounded thread pool of `max_workers` threads
+    (defaults to AERODATABOX_MAX_WORKERS or DEFAULT_MAX_WORKERS), each airport's windows one
+    after another. Results are always collected in airport order, so the output is identical
+    to fetching the airports one after another.
+
+    Window sizes come from a WindowPlanner: quiet airports use the widest window the API
+    allows, busy or slow airports get smaller windows for the rest of the day and the next
+    runs, and windows that time out or reach the record cap are bisected.
+
+    Every completed (airport, window) unit is checkpointed with its parsed rows, so a retry
+    of a failed run only fetches the units that did not complete.
     """
 
-    # --- Helper functions ---
-
-    def base_flight_fields(record: dict, airport_icao: str) -> dict:
-        """Fields shared by both arrivals and departures."""
-        return {
-            "number": get_value(record, "number"),
-            "flight_date": date,
-            "callSign": get_value(record, "callSign"),
-            "status": get_value(record, "status"),
-            "codeshareStatus": get_value(record, "codeshareStatus"),
-            "isCargo": get_value(record, "isCargo"),
-            "aircraft_reg": get_value(record, "aircraft.reg"),
-            "aircraft_modeS": get_value(record, "aircraft.modeS"),
-            "aircraft_model": get_value(record, "aircraft.model"),
-            "airline_name": get_value(record, "airline.name"),
-            "airline_iata": get_value(record, "airline.iata"),
-            "airline_icao": get_value(record, "airline.icao"),
-            "airport_icao": airport_icao
-            #"ingestion_timestamp": None,   Will be defualt while table creation
-            #"data_source": "AeroDataBox"  Will be defualt while table creation
-        }
-
-    def parse_departure_record(dep: dict, airport_icao: str) -> dict:
-        rec = base_flight_fields(dep, airport_icao)
-        rec.update({
-            # Current airport = departure
-            "departure_scheduledtime_utc": get_value(dep, "departure.scheduledTime.utc"),
-            "departure_scheduledtime_local": get_value(dep, "departure.scheduledTime.local"),
-            "departure_revisedtime_utc": get_value(dep, "departure.revisedTime.utc"),
-            "departure_revisedtime_local": get_value(dep, "departure.revisedTime.local"),
-            "departure_runwaytime_utc": get_value(dep, "departure.runwayTime.utc"),
-            "departure_runwaytime_local": get_value(dep, "departure.runwayTime.local"),
-            "departure_terminal": get_value(dep, "departure.terminal"),
-            "departure_runway": get_value(dep, "departure.runway"),
-            #"departure_quality": get_value(dep, "departure.quality"), Having problem with the list while uploading
-            # Destination airport info
-            "arrival_airport_icao": get_value(dep, "arrival.airport.icao"),
-            "arrival_airport_iata": get_value(dep, "arrival.airport.iata"),
-            "arrival_airport_name": get_value(dep, "arrival.airport.name"),
-            "arrival_airport_timezone": get_value(dep, "arrival.airport.timeZone"),
-            "arrival_scheduledtime_utc": get_value(dep, "arrival.scheduledTime.utc"),
-            "arrival_scheduledtime_local": get_value(dep, "arrival.scheduledTime.local"),
-            "arrival_revisedtime_utc": get_value(dep, "arrival.revisedTime.utc"),
-            "arrival_revisedtime_local": get_value(dep, "arrival.revisedTime.local"),
-            "arrival_runwaytime_utc": get_value(dep, "arrival.runwayTime.utc"),
-            "arrival_runwaytime_local": get_value(dep, "arrival.runwayTime.local"),
-            "arrival_terminal": get_value(dep, "arrival.terminal"),
-            "arrival_gate": get_value(dep, "arrival.gate"),
-            "arrival_baggagebelt": get_value(dep, "arrival.baggageBelt"),
-            #"arrival_quality": get_value(dep, "arrival.quality")
-        })
-
-        return rec
-
-    def parse_arrival_record(arr: dict, airport_icao: str) -> dict:
-        rec = base_flight_fields(arr, airport_icao)
-        rec.update({
-            # Origin airport info (note: fixed path naming bug)
-            "departure_airport_icao": get_value(arr, "departure.airport.icao"),
-            "departure_airport_iata": get_value(arr, "departure.airport.iata"),
-            "departure_airport_name": get_value(arr, "departure.airport.name"),
-            "departure_airport_timezone": get_value(arr, "departure.airport.timeZone"),
-            "departure_scheduledtime_utc": get_value(arr, "departure.scheduledTime.utc"),
-            "departure_scheduledtime_local": get_value(arr, "departure.scheduledTime.local"),
-            "departure_revisedtime_utc": get_value(arr, "departure.revisedTime.utc"),
-            "departure_revisedtime_local": get_value(arr, "departure.revisedTime.local"),
-            "departure_runwaytime_utc": get_value(arr, "departure.runwayTime.utc"),
-            "departure_runwaytime_local": get_value(arr, "departure.runwayTime.local"),
-            "departure_terminal": get_value(arr, "departure.terminal"),
-            "departure_runway": get_value(arr, "departure.runway"),
-            #"departure_quality": get_value(arr, "departure.quality"),
-            # Current airport = arrival
-            "arrival_scheduledtime_utc": get_value(arr, "arrival.scheduledTime.utc"),
-            "arrival_scheduledtime_local": get_value(arr, "arrival.scheduledTime.local"),
-            "arrival_revisedtime_utc": get_value(arr, "arrival.revisedTime.utc"),
-            "arrival_revisedtime_local": get_value(arr, "arrival.revisedTime.local"),
-            "arrival_runwaytime_utc": get_value(arr, "arrival.runwayTime.utc"),
-            "arrival_runwaytime_local": get_value(arr, "arrival.runwayTime.local"),
-            "arrival_terminal": get_value(arr, "arrival.terminal"),
-            "arrival_runway": get_value(arr, "arrival.runway"),
-            "arrival_gate": get_value(arr, "arrival.gate"),
-            "arrival_baggagebelt": get_value(arr, "arrival.baggageBelt"),
-            #"arrival_quality": get_value(arr, "arrival.quality")
-        })
-        return rec
-    
     aerodatabox_api_key = os.getenv('AERODATABOX_API_KEY')
     
     if not aerodatabox_api_key:
@@ -176,163 +294,113 @@ def fetch_aerodatabox_data(api_key_file_path: str, base_url: str, endpoint: str,
     
     api_key = aerodatabox_api_key or credentials['key']
     
-    _, _, start_str, mid_str, end_str = date_string_to_day_range_epoch(date)
+    _, _, start_str, _, end_str = date_string_to_day_range_epoch(date)
     
-    # --- API calls in two halves ---
-    halves = [
-        ("first_half", start_str, mid_str),
-        ("second_half", mid_str, end_str)
-    ]
+    # --- API calls in planned windows per airport ---
+    planner = WindowPlanner()
+    checkpoint = UnitCheckpoint("aerodatabox", date)
 
-    departure_records, arrival_records = [], []
+    max_workers = max_workers or int(os.getenv('AERODATABOX_MAX_WORKERS', DEFAULT_MAX_WORKERS))
 
-    for half_name, time_from, time_to in halves:
-        
-        for airport_icao in airports_icao:
-            response = make_aerodatabox_request(api_key, base_url, endpoint, "icao", airport_icao, time_from, time_to)
-            
-            if response.status_code == 200:
-                data = response.json()
-                logging.info(f"Retrieved flight data for {airport_icao} ({half_name}).")
-
-                departures = data.get("departures", [])
-                arrivals = data.get("arrivals", [])
-
-                departure_records.extend(parse_departure_record(d, airport_icao) for d in departures)
-                arrival_records.extend(parse_arrival_record(a, airport_icao) for a in arrivals)
-
-                if not departures:
-                    logging.warning(f"No departures found for {airport_icao} ({half_name}).")
-                if not arrivals:
-                    logging.warning(f"No arrivals found for {airport_icao} ({half_name}).")
-
-            elif response.status_code == 204:
-                logging.warning(f"No content for {airport_icao} in {half_name}.")
-                continue
-            else:
-                logging.error(f"AeroDataBox API error {response.status_code}: {response.text}")
-                raise RuntimeError(f"AeroDataBox API error {response.status_code}: {response.text}")
+    logging.info(f"Fetching {len(airports_icao)} airports with up to {max_workers} concurrent requests.....")
+
+    # Compact hand-off to the loaders, the per-unit row lists are released as soon as they're copied in
+    departure_records = ColumnarBuffer(DEPARTURE_COLUMNS)
+    arrival_records = ColumnarBuffer(ARRIVAL_COLUMNS)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aerodatabox") as executor:
+        futures = [
+            executor.submit(_fetch_airport_day, api_key, base_url, endpoint,
+                            airport_icao, date, start_str, end_str, planner, checkpoint)
+            for airport_icao in airports_icao
+        ]
+
+        try:
+            # Consume in submission order to keep the output deterministic
+            for i, future in enumerate(futures):
+                departure_rows, arrival_rows = future.result()
+                futures[i] = None  # a finished future holds on to its result
+
+                departure_records.extend(departure_rows)
+                arrival_records.extend(arrival_rows)
 
-    # Safely derive schema
-    departure_columns = list(departure_records[0].keys()) if departure_records else []
-    arrival_columns = list(arrival_records[0].keys()) if arrival_records else []
+        except Exception:
+            # Don't keep spending API calls once the run is already failing
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
-    all_departures = [tuple(rec.get(col) for col in departure_columns) for rec in departure_records]
-    all_arrivals = [tuple(rec.get(col) for col in arrival_columns) for rec in arrival_records]
+    planner.save_hints()
+
+    # Records are already row tuples in column order
+    departure_columns = list(DEPARTURE_COLUMNS) if departure_records else []
+    arrival_columns = list(ARRIVAL_COLUMNS) if arrival_records else []
     
     logging.info("All departures and arrivals data are ready for the given airports.")
+    log_cache_stats("AeroDataBox")
 
-    return arrival_columns, departure_columns, all_departures, all_arrivals
+    return arrival_columns, departure_columns, departure_records, arrival_records
     
-def _ingest_aerodatabox_data(cursor, data, table_name, column_names, specific_cols_sql):
-    """Handles table creation and data insertion for a single AeroDataBox dataset."""
-    if not data:
-        logging.warning(f"Skipping loading, because {table_name} data is empty.")
-        return
-
-    # Base columns common to both AeroDataBox tables
-    base_columns_sql = """
-        number VARCHAR(20), flight_date DATE NOT NULL, callSign VARCHAR(20),
-        status VARCHAR(50), codeshareStatus VARCHAR(50), isCargo BOOLEAN, aircraft_reg VARCHAR(20),
-        aircraft_modeS VARCHAR(20), aircraft_model VARCHAR(100), airline_name VARCHAR(100),
-        airline_iata VARCHAR(10), airline_icao VARCHAR(10), airport_icao VARCHAR(10) NOT NULL,
-        ingestion_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
-        data_source VARCHAR(50) DEFAULT 'AeroDataBox'
+def submit_aerodatabox_ddl(executor: AsyncQueryExecutor) -> list:
     """
-
-    # Create Table
-    logging.info(f"Creating AeroDataBox table: {table_name} or checking its existence.....")
-    # Using an f-string for table/column names is generally safe here as they are controlled internally.
-    create_table_query = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} ({base_columns_sql}, {specific_cols_sql})
+    Submits the CREATE TABLE IF NOT EXISTS of both AeroDataBox tables without waiting for them,
+    so they run in Snowflake while the API is fetched. Tables already checked by this process
+    are skipped. Returns the pending queries, call result() on each before loading.
     """
-    cursor.execute(create_table_query)
-    logging.info(f"Created {table_name} table or it already existed.")
+    return submit_table_ddl(executor, AIRPORT_DEPARTURES) + submit_table_ddl(executor, AIRPORT_ARRIVALS)
     
-    # Insert Data
-    placeholders = ', '.join(['%s'] * len(column_names))
-    column_str = ', '.join(column_names)
-    insert_query = f"""
-        INSERT INTO {table_name} ({column_str})
-        VALUES ({placeholders})
+def extract_load_aerodatabox_data(aerodatabox_api_key_path, BASE_URL, endpoint, airports_icao, date, connection,
+                                  connection_factory=None, pending_ddl=None):
     """
+    Fetches AeroDataBox departures and arrivals for the given airports and date and loads them.
 
-    logging.info(f"Loading {len(data)} rows into {table_name}.....")
-    # Using executemany with placeholders (%s) prevents SQL injection.
-    cursor.executemany(insert_query, data)
-    logging.info(f"Finished {table_name} data ingestion process.")
-    
-def extract_load_aerodatabox_data(aerodatabox_api_key_path, BASE_URL, endpoint, airports_icao, date, connection):
+    When `connection_factory` (a callable returning a new Snowflake connection) is given, the two
+    tables are loaded concurrently on separate connections and published together in one transaction.
+
+    The tables are created asynchronously while the API is fetched. Callers that already submitted
+    the DDL (see submit_aerodatabox_ddl) pass the pending queries as `pending_ddl`.
+    """
     
     logging.info(f"Started AeroDataBox arrivals and departures retrieval and loading process for the date : {date}.............")
     
+    if pending_ddl is None:
+        pending_ddl = submit_aerodatabox_ddl(AsyncQueryExecutor(connection))
+    
     # Fetch Data
     _, _, departures, arrivals = fetch_aerodatabox_data(
         aerodatabox_api_key_path, BASE_URL, endpoint, airports_icao, date
     )
 
-    # Define column details for Departures
-    adbox_departure_cols_sql = """
-        departure_scheduledtime_utc TIMESTAMP, departure_scheduledtime_local TIMESTAMP,
-        departure_revisedtime_utc TIMESTAMP, departure_revisedtime_local TIMESTAMP,
-        departure_runwaytime_utc TIMESTAMP, departure_runwaytime_local TIMESTAMP,
-        departure_terminal VARCHAR(10), departure_runway VARCHAR(10), 
-        arrival_airport_icao VARCHAR(10), arrival_airport_iata VARCHAR(10), 
-        arrival_airport_name VARCHAR(100), arrival_airport_timezone VARCHAR(50),
-        arrival_scheduledtime_utc TIMESTAMP, arrival_scheduledtime_local TIMESTAMP,
-        arrival_revisedtime_utc TIMESTAMP, arrival_revisedtime_local TIMESTAMP,
-        arrival_runwaytime_utc TIMESTAMP, arrival_runwaytime_local TIMESTAMP,
-        arrival_terminal VARCHAR(10), arrival_gate VARCHAR(10), arrival_baggagebelt VARCHAR(20)
-    """
-    departure_cols = [
-        # Common
-        'number', 'flight_date', 'callSign', 'status', 'codeshareStatus', 'isCargo', 'aircraft_reg', 'aircraft_modeS', 'aircraft_model',
-        'airline_name', 'airline_iata', 'airline_icao', 'airport_icao',
-        # Departure Specific
-        'departure_scheduledtime_utc', 'departure_scheduledtime_local', 'departure_revisedtime_utc', 'departure_revisedtime_local',
-        'departure_runwaytime_utc', 'departure_runwaytime_local', 'departure_terminal', 'departure_runway',
-        # Arrival Info (destination)
-        'arrival_airport_icao', 'arrival_airport_iata', 'arrival_airport_name', 'arrival_airport_timezone',
-        'arrival_scheduledtime_utc', 'arrival_scheduledtime_local', 'arrival_revisedtime_utc', 'arrival_revisedtime_local',
-        'arrival_runwaytime_utc', 'arrival_runwaytime_local', 'arrival_terminal', 'arrival_gate', 'arrival_baggagebelt'
-    ]
-
-    # Define column details for Arrivals
-    adbox_arrival_cols_sql = """
-        departure_airport_icao VARCHAR(10), departure_airport_iata VARCHAR(10), 
-        departure_airport_name VARCHAR(100), departure_airport_timezone VARCHAR(50),
-        departure_scheduledtime_utc TIMESTAMP, departure_scheduledtime_local TIMESTAMP,
-        departure_revisedtime_utc TIMESTAMP, departure_revisedtime_local TIMESTAMP,
-        departure_runwaytime_utc TIMESTAMP, departure_runwaytime_local TIMESTAMP,
-        departure_terminal VARCHAR(10), departure_runway VARCHAR(10),
-        arrival_scheduledtime_utc TIMESTAMP, arrival_scheduledtime_local TIMESTAMP,
-        arrival_revisedtime_utc TIMESTAMP, arrival_revisedtime_local TIMESTAMP,
-        arrival_runwaytime_utc TIMESTAMP, arrival_runwaytime_local TIMESTAMP,
-        arrival_terminal VARCHAR(10), arrival_runway VARCHAR(10), 
-        arrival_gate VARCHAR(10), arrival_baggagebelt VARCHAR(20)
-    """
-    arrival_cols = [
-        # Common
-        'number', 'flight_date', 'callSign', 'status', 'codeshareStatus', 'isCargo', 'aircraft_reg', 'aircraft_modeS', 'aircraft_model',
-        'airline_name', 'airline_iata', 'airline_icao', 'airport_icao',
-        # Departure Info (origin)
-        'departure_airport_icao', 'departure_airport_iata', 'departure_airport_name', 'departure_airport_timezone',
-        'departure_scheduledtime_utc', 'departure_scheduledtime_local', 'departure_revisedtime_utc', 'departure_revisedtime_local',
-        'departure_runwaytime_utc', 'departure_runwaytime_local', 'departure_terminal', 'departure_runway',
-        # Arrival Specific
-        'arrival_scheduledtime_utc', 'arrival_scheduledtime_local', 'arrival_revisedtime_utc', 'arrival_revisedtime_local',
-        'arrival_runwaytime_utc', 'arrival_runwaytime_local', 'arrival_terminal', 'arrival_runway', 'arrival_gate', 'arrival_baggagebelt'
-    ]
-    
-    # Ingest Data within a Transaction
+    # Ingest Data: wait for the tables, then load them in batches (all-or-nothing for the run)
     try:
-        with transaction(connection) as cursor:
-            _ingest_aerodatabox_data(cursor, departures, 'airport_departures', departure_cols, adbox_departure_cols_sql)
-            _ingest_aerodatabox_data(cursor, arrivals, 'airport_arrivals', arrival_cols, adbox_arrival_cols_sql)
+        for query in pending_ddl:
+            query.result()
+        logging.info("AeroDataBox tables are created or already existed.")
+
+        loads = []
+        for schema, data in ((AIRPORT_DEPARTURES, departures), (AIRPORT_ARRIVALS, arrivals)):
+            if not data:
+                logging.warning(f"Skipping loading, because {schema.name} data is empty.")
+                continue
+            # flight_date is the run's date, so this groups the rows by airport: few micro-partitions each
+            sort_rows(data, schema.cluster_indices(schema.column_names))
+            loads.append((schema.name, schema.column_names, data, schema.key_columns, schema.column_types))
+
+        for table_name, _, data, _, _ in loads:
+            logging.info(f"Loading {len(data)} rows into {table_name}.....")
+
+        load_start = time.perf_counter()
+        load_tables(connection, loads, connection_factory)
+        # The tables are loaded concurrently and published together, so they share the elapsed time
+        load_seconds = time.perf_counter() - load_start
+        for table_name, _, data, _, _ in loads:
+            record_load(table_name, len(data), load_seconds)
 
     except Exception as e:
         # Transaction manager handles rollback/logging; re-raise if necessary
         logging.error(f"AeroDataBox data ingestion failed.")
         raise e
+
+    # The run is loaded, its unit checkpoints are no longer needed by retries
+    UnitCheckpoint("aerodatabox", date).clear()
         
     logging.info("Completed ingesting both AeroDataBox arrivals and departures data.")
\ No newline at end of file
@@ -1,6 +1,11 @@
 import sys, os
+import time
 import logging
+import tempfile
+import threading
+import functools
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,13 +13,37 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.json_reader import json_reader
 from utils.date_ranges import date_string_to_day_range_epoch
 from utils.transaction_cursor import transaction
+from utils.http_session import get_session
+from utils.rate_limiter import get_limiter
+from utils.response_cache import get_cached_response, store_response, log_cache_stats
+from utils.parallel_loader import load_table
+from utils.token_manager import TokenManager
+from utils.fast_json import PayloadDecoder
+from snowflake_handler import AsyncQueryExecutor
+from src.raw_schemas import OPENSKY_FLIGHTS, submit_table_ddl
+from utils.metrics import track_request, record_retry, record_parse, record_load
 
 load_dotenv()
 
+# Token endpoint, overridable through OPENSKY_AUTH_URL (e.g. to point at a local replay server)
 AUTH_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
 
-def get_access_token(file_path):
-    """Requests a new access token from the OpenSky auth server."""
+# /flights/all accepts intervals of at most two hours
+DEFAULT_WINDOW_SECONDS = 2 * 3600
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_WINDOW_RETRIES = 2
+
+# Natural flight key, also the table's declared primary key (used when RAW_WRITE_MODE=merge)
+OPENSKY_KEY_COLUMNS = OPENSKY_FLIGHTS.key_columns
+
+# Tokens are shared between workers and task processes through this file
+TOKEN_CACHE_PATH = os.getenv('OPENSKY_TOKEN_CACHE_PATH', os.path.join(tempfile.gettempdir(), "opensky_token_cache.json"))
+
+_token_managers = {}
+_token_managers_lock = threading.Lock()
+
+def request_access_token(file_path):
+    """Requests a new access token from the OpenSky auth server and returns the token response."""
     
     logging.info("Loading OpenSky Network credentials....")
     opensky_client_id = os.getenv('OPENSKY_CLIENT_ID')
@@ -41,29 +70,49 @@ def get_access_token(file_path):
     }
     
     try:
-        response = requests.post(AUTH_URL, headers=headers, data=data)
+        response = get_session().post(os.getenv('OPENSKY_AUTH_URL', AUTH_URL), headers=headers, data=data, timeout=30)
         response.raise_for_status()  
         token_data = response.json()
         
         # The token is valid for 'expires_in' seconds (usually 1800 seconds or 30 minutes)
-        access_token = token_data.get("access_token")
-        
         logging.info(f"Successfully retrieved OpenSky Network Access Token.")
-        return access_token
+        return token_data
         
     except requests.exceptions.RequestException as e:
         logging.error(f"Error requesting token: {e}")
         raise e
+
+def get_access_token(file_path):
+    """Requests a new access token from the OpenSky auth server."""
+    return request_access_token(file_path).get("access_token")
+
+def get_cached_access_token(file_path, force_refresh=False):
+    """
+    Returns an OpenSky access token, reusing the cached one until shortly before it expires.
+    Pass force_refresh=True when the API rejected the current token.
+    """
+    # Tokens are keyed by the client they were issued to, without having to read the credentials
+    cache_key = os.getenv('OPENSKY_CLIENT_ID') or os.path.abspath(file_path)
+
+    with _token_managers_lock:
+        if cache_key not in _token_managers:
+            _token_managers[cache_key] = TokenManager(
+                lambda: request_access_token(file_path), TOKEN_CACHE_PATH, cache_key
+            )
+        manager = _token_managers[cache_key]
+
+    return manager.get_token(force_refresh=force_refresh)
     
-def make_OpenSky_request(API_BASE_URL, endpoint, date, token):
-    """Makes an API request using the Bearer Token."""
+def make_OpenSky_request(API_BASE_URL, endpoint, date, token, begin_ts=None, end_ts=None):
+    """Makes an API request using the Bearer Token, for the whole day unless begin_ts/end_ts are given."""
     if not token:
         logging.error("Error: No valid token available.")
         raise "notValidTokenError"
     
     url = f"{API_BASE_URL}{endpoint}"
     
-    begin_ts, end_ts, _, _, _ = date_string_to_day_range_epoch(date)
+    if begin_ts is None or end_ts is None:
+        begin_ts, end_ts, _, _, _ = date_string_to_day_range_epoch(date)
     
     params = {
         "begin": begin_ts,
@@ -75,11 +124,22 @@ def make_OpenSky_request(API_BASE_URL, endpoint, date, token):
     }
     
     logging.info(f"params: {params}")
+    
+    cached_response = get_cached_response("opensky", endpoint, None, begin_ts, end_ts)
+    if cached_response is not None:
+        logging.info(f"Serving {url} ({begin_ts} - {end_ts}) from the response cache.")
+        return cached_response
+    
     logging.info(f"Making API request to {url}...")
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout= 120)
+        # Paced by the remaining-credit header and adaptive concurrency shared by all OpenSky workers
+        with get_limiter("opensky").request() as observe, track_request("opensky") as track:
+            response = get_session().get(url, params=params, headers=headers, timeout= 120)
+            observe(response)
+            track(response)
         response.raise_for_status() 
+        store_response("opensky", endpoint, None, begin_ts, end_ts, response)
         
         remaining_credits = response.headers.get('X-Rate-Limit-Remaining')
         if remaining_credits is not None:
@@ -95,9 +155,15 @@ def make_OpenSky_request(API_BASE_URL, endpoint, date, token):
             logging.error(f"Resource not found (404) for URL: {response.url}.")
             raise ConnectionError (e)
         
+        elif response.status_code == 401:
+            # Let the caller refresh the token and try again
+            logging.warning("401 received, the access token was rejected.")
+            return response
+        
         elif '429 Client Error' in str(e):
             
-            logging.error(f"429 error received. Reached request limit. Stopping the script execution.")
+            # The shared session already backed off and retried, so the quota is really exhausted
+            logging.error(f"429 error received after retries. Reached request limit. Stopping the script execution.")
             raise Exception ("Reached Request limit!")
         
         else:
@@ -109,101 +175,153 @@ def make_OpenSky_request(API_BASE_URL, endpoint, date, token):
         logging.error(f"Error making API request: {e}")
         raise e
     
-def fetch_opensky_flight_data(columns, opensky_cred_file, api_base_url, endpoint, date):
-    """Fetches flight data for multiple airports with retry and token refresh logic."""
+def plan_opensky_windows(date, window_seconds=None):
+    """
+    Splits the day into consecutive [begin, end] intervals of `window_seconds`
+    (OPENSKY_WINDOW_SECONDS, by default the 2 hour maximum of /flights/all).
+    """
+    window_seconds = window_seconds or int(os.getenv('OPENSKY_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS))
+    begin_ts, end_ts, _, _, _ = date_string_to_day_range_epoch(date)
+
+    windows = []
+    while begin_ts < end_ts:
+        window_end = min(begin_ts + window_seconds, end_ts)
+        windows.append((begin_ts, window_end))
+        begin_ts = window_end
+    return windows
+
+@functools.lru_cache(maxsize=None)
+def get_opensky_decoder(columns):
+    """
+    Decoder turning a /flights/all response straight into row tuples, built once per column list.
+    Field sources come from the OPENSKY_FLIGHTS schema, record_date is filled from the date.
+    """
+    return PayloadDecoder([(None, OPENSKY_FLIGHTS.select_fields(columns))], ("record_date",), "opensky")
+
+def _fetch_opensky_window(decoder, opensky_cred_file, api_base_url, endpoint, date, begin_ts, end_ts):
+    """Fetches and parses one interval, with its own token refresh and retry handling."""
     
-    # Initialize variables
-    token = get_access_token(opensky_cred_file)
-    all_records = []
+    token = get_cached_access_token(opensky_cred_file)
     MAX_RETRIES = 2
+    window_retries = int(os.getenv('OPENSKY_WINDOW_RETRIES', DEFAULT_WINDOW_RETRIES))
 
     retry = 0
+    attempt = 0
     while retry < MAX_RETRIES:
         
-        response = make_OpenSky_request(api_base_url, endpoint, date, token)
         try:
-            if response.status_code == 200:
-                data = response.json()
-                logging.info(f"Successfully retrieved opensky records on date: {date}.")
-                logging.info("Parsing the results.....")
-                records = [tuple(item.get(col) for col in columns[0:-1]) + (date,) for item in data]
-                
-                all_records.extend(records)
-                
-                logging.info("Results were added to global records variable.")
-                retry = MAX_RETRIES # Success, break out of while loop
-
-            elif response.status_code == 401:
-                logging.warning("Token might have expired. Requesting new token...")
-                token = get_access_token(opensky_cred_file)
-                
-                retry += 1
-                
-                if retry == MAX_RETRIES:
-                    logging.error(f"Failed to refresh token after {MAX_RETRIES} attempts.")
-                    raise ConnectionError ("Token Error.")
-                
-            else:
-                logging.error(f"Status Code: {response.status_code}. Response: {response.text}")
-                # log the error and break the while loop to continue with other icaos
-                raise Exception (f"Status Code: {response.status_code}. Response: {response.text}")
+            response = make_OpenSky_request(api_base_url, endpoint, date, token, begin_ts, end_ts)
+        except ConnectionError:
+            # OpenSky answers 404 for intervals without any flights
+            logging.warning(f"No OpenSky flights found for {begin_ts} - {end_ts} on date: {date}.")
+            return []
+        except requests.exceptions.RequestException as e:
+            # Only this interval is retried, the others are already fetched or in flight
+            attempt += 1
+            record_retry("opensky", reason="window")
+            if attempt > window_retries:
+                raise
+            logging.warning(f"Retrying OpenSky interval {begin_ts} - {end_ts} (attempt {attempt}): {e}")
+            continue
+
+        if response.status_code == 200:
+            logging.info(f"Successfully retrieved opensky records for {begin_ts} - {end_ts} on date: {date}.")
+            try:
+                parse_start = time.perf_counter()
+                records, = decoder.decode(response.content, date)
+                record_parse("opensky", len(records), time.perf_counter() - parse_start)
+                return records
+            except Exception as e:
+                logging.error("Failed while parsing the response.")
+                raise Exception ("Failed while parsing the response.") from e
+
+        elif response.status_code == 401:
+            logging.warning("Token might have expired. Requesting new token...")
+            token = get_cached_access_token(opensky_cred_file, force_refresh=True)
+            
+            retry += 1
             
-        except:
-            logging.error("Failed while parsing the response.")
-            raise Exception ("Failed while parsing the response.")
+            if retry == MAX_RETRIES:
+                logging.error(f"Failed to refresh token after {MAX_RETRIES} attempts.")
+                raise ConnectionError ("Token Error.")
+            
+        else:
+            logging.error(f"Status Code: {response.status_code}. Response: {response.text}")
+            raise Exception (f"Status Code: {response.status_code}. Response: {response.text}")
+
+def fetch_opensky_flight_data(columns, opensky_cred_file, api_base_url, endpoint, date, max_workers=None):
+    """
+    Fetches all flights of a day with retry and token refresh logic.
 
+    The day is split into intervals (see plan_opensky_windows) that are fetched concurrently
+    by up to `max_workers` threads (OPENSKY_MAX_WORKERS). Flights reported by two adjacent
+    intervals are de-duplicated on (icao24, firstSeen), keeping interval order.
+    """
+    
+    max_workers = max_workers or int(os.getenv('OPENSKY_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    windows = plan_opensky_windows(date)
+    
+    decoder = get_opensky_decoder(tuple(columns))
+    icao24_index = columns.index('icao24')
+    first_seen_index = columns.index('firstSeen')
+    
+    logging.info(f"Fetching {len(windows)} OpenSky intervals with up to {max_workers} concurrent requests.....")
+    
+    all_records = []
+    seen_flights = set()
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="opensky") as executor:
+        futures = [
+            executor.submit(_fetch_opensky_window, decoder, opensky_cred_file, api_base_url,
+                            endpoint, date, begin_ts, end_ts)
+            for begin_ts, end_ts in windows
+        ]
+        
+        try:
+            for future in futures:
+                for record in future.result():
+                    flight_key = (record[icao24_index], record[first_seen_index])
+                    if flight_key not in seen_flights:
+                        seen_flights.add(flight_key)
+                        all_records.append(record)
+        
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    logging.info(f"Results were merged: {len(all_records)} unique flights on date: {date}.")
+    log_cache_stats("OpenSky")
     return all_records, columns
 
-def _ingest_opensky_data(cursor, data, table_name, opensky_columns):
-    """Handles table creation and data insertion for a single OpenSky dataset."""
+def _ingest_opensky_data(cursor, data, table_name, opensky_columns, pending_ddl):
+    """Waits for the table creation and handles data insertion for a single OpenSky dataset."""
+    
+    # Wait for the table even when there is nothing to load, so DDL errors still surface
+    for query in pending_ddl:
+        query.result()
+    logging.info(f"Table '{table_name}' is created or existed.")
     
     if not data:
         logging.warning(f"Skipping loading, because {table_name} data is empty .")
         return
 
     logging.info(f"Started ingestion for OpenSky {table_name}...")
-    
-    # Create Table
-    logging.info(f"Creating OpenSky table: {table_name} or checking its existence....")
-    cursor.execute(f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            icao24 VARCHAR(10),
-            firstSeen BIGINT,
-            estDepartureAirport VARCHAR(10),
-            lastSeen BIGINT,
-            estArrivalAirport VARCHAR(10),
-            callsign VARCHAR(20),
-            estDepartureAirportHorizDistance INT,
-            estDepartureAirportVertDistance INT,
-            estArrivalAirportHorizDistance INT,
-            estArrivalAirportVertDistance INT,
-            departureAirportCandidatesCount INT,
-            arrivalAirportCandidatesCount INT,
-            record_date DATE,
-            ingestion_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
-            PRIMARY KEY (icao24, firstSeen)
-        )
-    """)
-    logging.info(f"Table '{table_name}' is created or existed.")
 
-    # Insert Data
-    placeholders = ', '.join(['%s'] * len(opensky_columns))
-    column_str = ', '.join(opensky_columns)
-    
-    insert_sql = f"""
-        INSERT INTO {table_name} ({column_str})
-        VALUES ({placeholders})
-    """
-    
+    # Insert Data in batches (COPY INTO for large batches, executemany otherwise), MERGE on the key in merge mode
     logging.info(f"Inserting {len(data)} rows into table '{table_name}'...")
-    # Using executemany with placeholders (%s) prevents SQL injection.
-    cursor.executemany(insert_sql, data)
+    load_start = time.perf_counter()
+    load_table(cursor, table_name, opensky_columns, data, OPENSKY_KEY_COLUMNS,
+               OPENSKY_FLIGHTS.select_types(opensky_columns))
+    record_load(table_name, len(data), time.perf_counter() - load_start)
     logging.info(f"'{table_name}' data ingestion process finished.")
     
 def extract_load_opensky_data(columns, opensky_cred_file, OPENSKY_API_BASE_URL, date, endpoint, table, connection):
     
     logging.info(f"Started OpenSky Network flights data retrieval and loading process for the date: {date}.............")
     
+    # The table is created in Snowflake while the API is being fetched
+    pending_ddl = submit_table_ddl(AsyncQueryExecutor(connection), OPENSKY_FLIGHTS, table)
+    
     # Fetch Data for both directions
     fetched_data = {}
  
@@ -219,7 +337,7 @@ def extract_load_opensky_data(columns, opensky_cred_file, OPENSKY_API_BASE_URL,
             
             table_name = table
             data = fetched_data[table_name]
-            _ingest_opensky_data(cursor, data, table_name, columns)
+            _ingest_opensky_data(cursor, data, table_name, columns, pending_ddl)
     
     except Exception as e:
         # Transaction manager handles rollback/logging; re-raise if necessary
@@ -0,0 +1,309 @@
+"""
+Single source of truth for the raw tables loaded by the ingestion scripts.
+
+Every column is declared once with its Snowflake type and where its value comes from.
+The registry derives the CREATE TABLE statements, the loaded column order, the parser
+field maps (see utils.field_extraction / utils.fast_json), the loader column types and the
+clustering keys the loaders sort their rows on.
+"""
+import logging
+import threading
+from typing import NamedTuple
+
+from utils.upsert import WRITE_MODE_MERGE
+
+class Column(NamedTuple):
+    """
+    name: Column name.
+    sql_type: Snowflake type, including constraints and defaults (e.g. "DATE NOT NULL").
+    source: Dotted path into the API record, "$<arg>" for a value passed to the parser,
+        "#<column>,UPPER(<column>),..." for a 64-bit hash of other loaded columns computed by the parser
+        (see utils.field_extraction.hash_values), or None for columns Snowflake fills on its own (defaults).
+    """
+    name: str
+    sql_type: str
+    source: str = None
+
+class TableSchema:
+    """One raw table: its columns in DDL order, natural key, clustering key and DDL options."""
+
+    def __init__(self, name: str, columns: list, key_columns: list = None, declare_primary_key: bool = False,
+                 cluster_by: list = None, added_columns: list = None, merge_only_columns: list = None):
+        """
+        added_columns: Names of columns declared after the table was first deployed, added to
+            existing tables by add_columns_ddl().
+        merge_only_columns: Loaded columns only RAW_WRITE_MODE=merge reads, loaded as NULL otherwise
+            (see write_fields()).
+        """
+        self.name = name
+        self.columns = list(columns)
+        self.key_columns = list(key_columns or [])
+        self.declare_primary_key = declare_primary_key
+        self.cluster_by = list(cluster_by or [])
+        self.added_columns = list(added_columns or [])
+        self.merge_only_columns = list(merge_only_columns or [])
+
+        loaded = [column for column in self.columns if column.source is not None]
+
+        # Loaded columns in table order, this is also the row tuple order produced by the parsers
+        self.column_names = [column.name for column in loaded]
+        self.fields = [(column.name, column.source) for column in loaded]
+        self.column_types = [column.sql_type.split()[0].split("(")[0].upper() for column in loaded]
+
+    def ddl(self, table_name: str = None) -> str:
+        """CREATE TABLE IF NOT EXISTS statement, optionally under another table name."""
+        definitions = [f"{column.name} {column.sql_type}" for column in self.columns]
+        if self.declare_primary_key and self.key_columns:
+            definitions.append(f"PRIMARY KEY ({', '.join(self.key_columns)})")
+
+        # Using an f-string for table/column names is generally safe here as they are controlled internally.
+        ddl = f"CREATE TABLE IF NOT EXISTS {table_name or self.name} (\n    " + ",\n    ".join(definitions) + "\n)"
+        if self.cluster_by:
+            ddl += f"\nCLUSTER BY ({', '.join(self.cluster_by)})"
+        return ddl
+
+    def add_columns_ddl(self, table_name: str = None) -> str:
+        """
+        ALTER TABLE adding the added_columns to a table created before them (None without any).
+        IF EXISTS makes it a no-op on a table the CREATE TABLE running next to it is about to create.
+        """
+        if not self.added_columns:
+            return None
+        types = {column.name: column.sql_type for column in self.columns}
+        definitions = ", ".join(f"{name} {types[name]}" for name in self.added_columns)
+        return f"ALTER TABLE IF EXISTS {table_name or self.name} ADD COLUMN IF NOT EXISTS {definitions}"
+
+    def cluster_ddl(self, table_name: str = None) -> str:
+        """
+        ALTER TABLE setting the clustering key, for tables created before it was declared (None without one).
+        Like add_columns_ddl() a no-op on a table that doesn't exist yet.
+        """
+        if not self.cluster_by:
+            return None
+        return f"ALTER TABLE IF EXISTS {table_name or self.name} CLUSTER BY ({', '.join(self.cluster_by)})"
+
+    def cluster_indices(self, column_names: list) -> list:
+        """Positions of the clustering key columns in rows of the given loaded columns."""
+        positions = {name.lower(): i for i, name in enumerate(column_names)}
+        return [positions[name.lower()] for name in self.cluster_by if name.lower() in positions]
+
+    def write_fields(self, mode: str) -> list:
+        """Field map of the loaded columns for a write mode, the parsers skip the merge-only columns in append mode."""
+        if mode == WRITE_MODE_MERGE:
+            return self.fields
+        return [(name, None if name in self.merge_only_columns else source) for name, source in self.fields]
+
+    def select_fields(self, column_names: list) -> list:
+        """Field map of the given loaded columns, in the given order."""
+        sources = dict(self.fields)
+        return [(name, sources[name]) for name in column_names]
+
+    def select_types(self, column_names: list) -> list:
+        """Column types of the given loaded columns, in the given order."""
+        types = dict(zip(self.column_names, self.column_types))
+        return [types[name] for name in column_names]
+
+# --- AeroDataBox ---
+
+# Columns shared by both arrivals and departures
+_AERODATABOX_BASE_COLUMNS = [
+    Column("number", "VARCHAR(20)", "number"),
+    Column("flight_date", "DATE NOT NULL", "$flight_date"),
+    Column("callSign", "VARCHAR(20)", "callSign"),
+    Column("status", "VARCHAR(50)", "status"),
+    Column("codeshareStatus", "VARCHAR(50)", "codeshareStatus"),
+    Column("isCargo", "BOOLEAN", "isCargo"),
+    Column("aircraft_reg", "VARCHAR(20)", "aircraft.reg"),
+    Column("aircraft_modeS", "VARCHAR(20)", "aircraft.modeS"),
+    Column("aircraft_model", "VARCHAR(100)", "aircraft.model"),
+    Column("airline_name", "VARCHAR(100)", "airline.name"),
+    Column("airline_iata", "VARCHAR(10)", "airline.iata"),
+    Column("airline_icao", "VARCHAR(10)", "airline.icao"),
+    Column("airport_icao", "VARCHAR(10) NOT NULL", "$airport_icao"),
+    Column("ingestion_timestamp", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP()"),
+    Column("data_source", "VARCHAR(50) DEFAULT 'AeroDataBox'"),
+]
+
+def _movement_columns(side: str, with_airport: bool, with_runway: bool, with_gate: bool) -> list:
+    """Columns of the departure or arrival part of a movement."""
+    columns = []
+    if with_airport:
+        columns += [
+            Column(f"{side}_airport_icao", "VARCHAR(10)", f"{side}.airport.icao"),
+            Column(f"{side}_airport_iata", "VARCHAR(10)", f"{side}.airport.iata"),
+            Column(f"{side}_airport_name", "VARCHAR(100)", f"{side}.airport.name"),
+            Column(f"{side}_airport_timezone", "VARCHAR(50)", f"{side}.airport.timeZone"),
+        ]
+    for time_kind in ("scheduledTime", "revisedTime", "runwayTime"):
+        for zone in ("utc", "local"):
+            columns.append(Column(f"{side}_{time_kind.lower()}_{zone}", "TIMESTAMP", f"{side}.{time_kind}.{zone}"))
+    columns.append(Column(f"{side}_terminal", "VARCHAR(10)", f"{side}.terminal"))
+    if with_runway:
+        columns.append(Column(f"{side}_runway", "VARCHAR(10)", f"{side}.runway"))
+    if with_gate:
+        columns += [
+            Column(f"{side}_gate", "VARCHAR(10)", f"{side}.gate"),
+            Column(f"{side}_baggagebelt", "VARCHAR(20)", f"{side}.baggageBelt"),
+        ]
+    #"<side>_quality": "<side>.quality", Having problem with the list while uploading
+    return columns
+
+def _hash_columns(columns: list, identity: list, key_columns: list) -> list:
+    """
+    flight_key: hash of the flight's identity columns, the staging models deduplicate on it.
+        Columns are normalized (e.g. UPPER(callSign)) the way the staging models compare them.
+    content_hash: hash of the loaded columns outside the natural key, which the MERGE already matched
+        on, tells it whether a reloaded record changed. Timestamps are hashed as the TIMESTAMP
+        columns keep them, not as the API wrote them.
+    """
+    changeable = [
+        f"TIMESTAMP({column.name})" if column.sql_type.startswith("TIMESTAMP") else column.name
+        for column in columns if column.source is not None and column.name not in key_columns
+    ]
+    return [
+        Column("flight_key", "BIGINT", "#" + ",".join(identity)),
+        Column("content_hash", "BIGINT", "#" + ",".join(changeable)),
+    ]
+
+# Added to the AeroDataBox tables after their first deployment
+HASH_COLUMNS = ["flight_key", "content_hash"]
+
+# Only read by the MERGE of RAW_WRITE_MODE=merge, NULL in append mode
+MERGE_ONLY_COLUMNS = ["content_hash"]
+
+_DEPARTURE_COLUMNS = (
+    _AERODATABOX_BASE_COLUMNS
+    # Current airport = departure
+    + _movement_columns("departure", with_airport=False, with_runway=True, with_gate=False)
+    # Destination airport info
+    + _movement_columns("arrival", with_airport=True, with_runway=False, with_gate=True)
+)
+
+_DEPARTURE_KEY_COLUMNS = [
+    'number', 'flight_date', 'airport_icao', 'departure_scheduledtime_utc',
+    'arrival_airport_icao', 'arrival_scheduledtime_utc'
+]
+
+AIRPORT_DEPARTURES = TableSchema(
+    "airport_departures",
+    # One flight per number, callsign and transponder at the departure airport and day (stg_departures_base)
+    _DEPARTURE_COLUMNS + _hash_columns(
+        _DEPARTURE_COLUMNS, ['number', 'flight_date', 'UPPER(callSign)', 'aircraft_modeS', 'airport_icao'],
+        _DEPARTURE_KEY_COLUMNS
+    ),
+    key_columns=_DEPARTURE_KEY_COLUMNS,
+    # The staging models read whole flight_date partitions, per airport downstream
+    cluster_by=['flight_date', 'airport_icao'],
+    added_columns=HASH_COLUMNS,
+    merge_only_columns=MERGE_ONLY_COLUMNS,
+)
+
+_ARRIVAL_COLUMNS = (
+    _AERODATABOX_BASE_COLUMNS
+    # Origin airport info
+    + _movement_columns("departure", with_airport=True, with_runway=True, with_gate=False)
+    # Current airport = arrival
+    + _movement_columns("arrival", with_airport=False, with_runway=True, with_gate=True)
+)
+
+_ARRIVAL_KEY_COLUMNS = [
+    'number', 'flight_date', 'departure_airport_icao', 'departure_scheduledtime_utc',
+    'airport_icao', 'arrival_scheduledtime_utc'
+]
+
+AIRPORT_ARRIVALS = TableSchema(
+    "airport_arrivals",
+    # The natural key is also the flight identity of stg_arrivals_base
+    _ARRIVAL_COLUMNS + _hash_columns(_ARRIVAL_COLUMNS, _ARRIVAL_KEY_COLUMNS, _ARRIVAL_KEY_COLUMNS),
+    key_columns=_ARRIVAL_KEY_COLUMNS,
+    cluster_by=['flight_date', 'airport_icao'],
+    added_columns=HASH_COLUMNS,
+    merge_only_columns=MERGE_ONLY_COLUMNS,
+)
+
+# --- OpenSky ---
+
+OPENSKY_FLIGHTS = TableSchema(
+    "flights",
+    [
+        Column("icao24", "VARCHAR(10)", "icao24"),
+        Column("firstSeen", "BIGINT", "firstSeen"),
+        Column("estDepartureAirport", "VARCHAR(10)", "estDepartureAirport"),
+        Column("lastSeen", "BIGINT", "lastSeen"),
+        Column("estArrivalAirport", "VARCHAR(10)", "estArrivalAirport"),
+        Column("callsign", "VARCHAR(20)", "callsign"),
+        Column("estDepartureAirportHorizDistance", "INT", "estDepartureAirportHorizDistance"),
+        Column("estDepartureAirportVertDistance", "INT", "estDepartureAirportVertDistance"),
+        Column("estArrivalAirportHorizDistance", "INT", "estArrivalAirportHorizDistance"),
+        Column("estArrivalAirportVertDistance", "INT", "estArrivalAirportVertDistance"),
+        Column("departureAirportCandidatesCount", "INT", "departureAirportCandidatesCount"),
+        Column("arrivalAirportCandidatesCount", "INT", "arrivalAirportCandidatesCount"),
+        Column("record_date", "DATE", "$record_date"),
+        Column("ingestion_timestamp", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP()"),
+    ],
+    # Natural flight key, also the table's declared primary key (used when RAW_WRITE_MODE=merge)
+    key_columns=['icao24', 'firstSeen'],
+    declare_primary_key=True,
+    cluster_by=['record_date'],
+)
+
+# --- Table existence, checked once per process ---
+
+_ensured_tables = set()
+_ensured_tables_lock = threading.Lock()
+
+def _table_key(connection, table_name: str) -> tuple:
+    return (getattr(connection, "database", None), getattr(connection, "schema", None), table_name.upper())
+
+class PendingTable:
+    """
+    CREATE TABLE IF NOT EXISTS submitted in the background, remembered as existing once it succeeds.
+    Tables that existed before their added columns or clustering key were declared get them through
+    `columns_query` and `cluster_query`, submitted together with the CREATE TABLE.
+    """
+
+    def __init__(self, query, key: tuple, columns_query=None, cluster_query=None):
+        self.query = query
+        self.key = key
+        self.columns_query = columns_query
+        self.cluster_query = cluster_query
+
+    def result(self):
+        rows = self.query.result()
+
+        # The loads write the added columns, so failing to add them fails the run
+        if self.columns_query:
+            self.columns_query.result()
+
+        if self.cluster_query:
+            # Clustering only speeds up reads, a role that may not alter the table still loads it
+            try:
+                self.cluster_query.result()
+            except Exception as e:
+                logging.warning(f"Could not set the clustering key ({self.cluster_query.query}): {e}")
+
+        with _ensured_tables_lock:
+            _ensured_tables.add(self.key)
+        return rows
+
+def submit_table_ddl(executor, schema: TableSchema, table_name: str = None) -> list:
+    """
+    Submits the table's DDL through an AsyncQueryExecutor, unless this process already
+    created or found the table. The CREATE TABLE and the ALTER TABLEs of columns and clustering
+    key declared later all run at once. Returns the pending PendingTable objects (empty when cached),
+    call result() on each before loading.
+    """
+    table_name = table_name or schema.name
+    key = _table_key(executor.connection, table_name)
+
+    with _ensured_tables_lock:
+        if key in _ensured_tables:
+            logging.info(f"Table {table_name} already checked in this process, skipping its DDL.")
+            return []
+
+    logging.info(f"Creating table {table_name} or checking its existence in the background.....")
+    create_query = executor.submit(schema.ddl(table_name))
+    columns_ddl, cluster_ddl = schema.add_columns_ddl(table_name), schema.cluster_ddl(table_name)
+    return [PendingTable(create_query, key,
+                         executor.submit(columns_ddl) if columns_ddl else None,
+                         executor.submit(cluster_ddl) if cluster_ddl else None)]
@@ -0,0 +1,51 @@
+"""
+Shared setup of the offline tests: the APIs are served by benchmarks/replay_server.py, and nothing
+the tests write (tokens, checkpoints, cached responses, window hints) touches the real run's files.
+"""
+import sys, os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set before the ingestion modules read them at import time
+_test_dir = tempfile.mkdtemp(prefix="aviation_tests_")
+os.environ["OPENSKY_TOKEN_CACHE_PATH"] = os.path.join(_test_dir, "opensky_token_cache.json")
+os.environ["INGESTION_CHECKPOINT_DIR"] = os.path.join(_test_dir, "checkpoints")
+os.environ.pop("API_CACHE_DIR", None)
+os.environ["AERODATABOX_WINDOW_HINTS_PATH"] = ""  # every test starts from the widest windows
+os.environ["AERODATABOX_API_KEY"] = "replay-key"
+os.environ["OPENSKY_CLIENT_ID"] = "replay-client"
+os.environ["OPENSKY_CLIENT_SECRET"] = "replay-secret"
+for source in ("AERODATABOX", "OPENSKY"):
+    os.environ[f"{source}_RATE_PER_SECOND"] = "1000"
+    os.environ[f"{source}_BURST"] = "1000"
+
+import pytest
+
+from benchmarks.synthetic_data import SyntheticTraffic, write_fixtures
+from src.arr_dep_ingestion import fetch_aerodatabox_data
+from utils.http_session import close_session
+from utils.metrics import reset_metrics
+
+DATE = "2025-01-02"
+
+def fetch_day(url: str, airports: list) -> tuple:
+    """AeroDataBox departure and arrival rows of DATE from the replay server at `url`, as lists."""
+    _, _, departures, arrivals = fetch_aerodatabox_data(None, f"{url}/aerodatabox", "flights/airports/", airports, DATE)
+    return list(departures), list(arrivals)
+
+@pytest.fixture(scope="session")
+def fixtures(tmp_path_factory):
+    """Seeded synthetic fixtures of DATE for a few airports, as (fixture directory, airport ICAO codes)."""
+    out_dir = str(tmp_path_factory.mktemp("fixtures"))
+    traffic = SyntheticTraffic(airports=3, flights_per_airport=60, seed=7)
+    write_fixtures(traffic, out_dir, [DATE])
+    return out_dir, sorted(airport.icao for airport in traffic.airports)
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """Every test gets new pooled sessions (its own replay server) and empty metrics."""
+    close_session()
+    reset_metrics()
+    yield
+    close_session()
@@ -0,0 +1,44 @@
+import os
+import glob
+
+from benchmarks.replay_server import replay_server_process
+from utils.checkpoints import UnitCheckpoint
+from utils.metrics import get_metrics, reset_metrics
+from tests.conftest import DATE, fetch_day
+
+def _requests() -> float:
+    return get_metrics().counter_total("ingestion_requests_total", source="aerodatabox")
+
+def test_retried_run_only_fetches_missing_units(fixtures, tmp_path, monkeypatch):
+    fixtures_dir, airports = fixtures
+    monkeypatch.setenv("INGESTION_CHECKPOINT_DIR", str(tmp_path))
+
+    with replay_server_process(fixtures=fixtures_dir) as url:
+        expected = fetch_day(url, airports)
+        units = sorted(glob.glob(os.path.join(UnitCheckpoint("aerodatabox", DATE).directory, "*.json.gz")))
+        assert len(units) == _requests()
+
+        # The first run failed before these two units completed
+        for path in units[:2]:
+            os.remove(path)
+        reset_metrics()
+        assert fetch_day(url, airports) == expected
+        assert _requests() == 2
+
+    # With every unit checkpointed the API isn't needed at all
+    with replay_server_process(fixtures=fixtures_dir, fail_first=100) as url:
+        reset_metrics()
+        assert fetch_day(url, airports) == expected
+        assert _requests() == 0
+
+def test_unreadable_unit_checkpoint_is_fetched_again(tmp_path):
+    checkpoint = UnitCheckpoint("aerodatabox", DATE, base_dir=str(tmp_path))
+    checkpoint.save("EDDF_window", [("LH 400", 1, None)], [])
+    assert checkpoint.load("EDDF_window") == [[("LH 400", 1, None)], []]
+
+    with open(checkpoint._unit_path("EDDF_window"), 'wb') as f:
+        f.write(b"\x1f\x8b truncated")
+    assert checkpoint.load("EDDF_window") is None
+
+    checkpoint.clear()
+    assert not os.path.exists(checkpoint.directory)
@@ -0,0 +1,14 @@
+import pytest
+
+from src.arr_dep_ingestion import DEPARTURE_FIELDS, ARRIVAL_FIELDS
+from utils.fast_json import PayloadDecoder, BACKEND_MSGSPEC, BACKEND_ORJSON, BACKEND_JSON
+from tests.conftest import DATE
+from tests.test_field_extraction import aerodatabox_payloads, legacy_rows
+
+@pytest.mark.parametrize("backend", [BACKEND_MSGSPEC, BACKEND_ORJSON, BACKEND_JSON])
+def test_payload_decoder_gives_the_legacy_rows(fixtures, backend):
+    fixtures_dir, airports = fixtures
+    decoder = PayloadDecoder([("departures", DEPARTURE_FIELDS), ("arrivals", ARRIVAL_FIELDS)],
+                             ("flight_date", "airport_icao"), "test", backend)
+    for airport_icao, content in aerodatabox_payloads(fixtures_dir, airports):
+        assert decoder.decode(content, DATE, airport_icao) == legacy_rows(content, airport_icao)
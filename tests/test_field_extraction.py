@@ -0,0 +1,63 @@
+import os
+import json
+
+from benchmarks.bench_field_extraction import legacy_parser
+from src.arr_dep_ingestion import (
+    DEPARTURE_FIELDS, ARRIVAL_FIELDS, DEPARTURE_COLUMNS, ARRIVAL_COLUMNS, AERODATABOX_DECODERS, parse_departure_record, parse_arrival_record
+)
+from utils.upsert import WRITE_MODE_APPEND, WRITE_MODE_MERGE, CONTENT_HASH_COLUMN
+from tests.conftest import DATE
+
+# Values of unexpected types where the field maps expect objects, and a missing collection
+IRREGULAR_PAYLOAD = {
+    "departures": [
+        {"number": "LH 400", "departure": "not an object", "aircraft": None, "isCargo": "false"},
+        {"movement": {"airport": ["EDDF"]}, "callSign": 42},
+        {},
+    ],
+    "arrivals": None,
+}
+
+def aerodatabox_payloads(fixtures_dir: str, airports: list):
+    """(airport ICAO, response body) of every fixture airport, then an irregular payload."""
+    for airport_icao in airports:
+        with open(os.path.join(fixtures_dir, "aerodatabox", DATE, f"{airport_icao}.json"), 'rb') as f:
+            yield airport_icao, f.read()
+    yield "EDDF", json.dumps(IRREGULAR_PAYLOAD).encode()
+
+def legacy_rows(content: bytes, airport_icao: str) -> tuple:
+    """(departure_rows, arrival_rows) of a response body, parsed like before the compiled extractors."""
+    payload = json.loads(content)
+    return tuple(
+        [parse(record, DATE, airport_icao) for record in payload.get(key) or []]
+        for key, parse in (("departures", legacy_parser(DEPARTURE_FIELDS)), ("arrivals", legacy_parser(ARRIVAL_FIELDS)))
+    )
+
+def test_compiled_extractors_give_the_legacy_rows(fixtures):
+    fixtures_dir, airports = fixtures
+    for airport_icao, content in aerodatabox_payloads(fixtures_dir, airports):
+        payload = json.loads(content)
+        rows = tuple(
+            [parse(record, DATE, airport_icao) for record in payload.get(key) or []]
+            for key, parse in (("departures", parse_departure_record), ("arrivals", parse_arrival_record))
+        )
+        assert rows == legacy_rows(content, airport_icao)
+
+def test_append_mode_leaves_content_hash_null(fixtures):
+    fixtures_dir, airports = fixtures
+    positions = [columns.index(CONTENT_HASH_COLUMN) for columns in (DEPARTURE_COLUMNS, ARRIVAL_COLUMNS)]
+    for airport_icao, content in aerodatabox_payloads(fixtures_dir, airports):
+        merged = AERODATABOX_DECODERS[WRITE_MODE_MERGE].decode(content, DATE, airport_icao)
+        appended = AERODATABOX_DECODERS[WRITE_MODE_APPEND].decode(content, DATE, airport_icao)
+        assert appended == tuple(
+            [row[:i] + (None,) + row[i + 1:] for row in rows] for rows, i in zip(merged, positions)
+        )
+
+def test_content_hash_ignores_timestamp_formatting():
+    content_hash = DEPARTURE_COLUMNS.index(CONTENT_HASH_COLUMN)
+    record = {"number": "LH 400", "departure": {"scheduledTime": {"utc": "2025-01-02 10:00Z", "local": "2025-01-02 11:00+01:00"}}}
+    reformatted = {"number": "LH 400", "departure": {"scheduledTime": {"utc": "2025-01-02T10:00:00Z", "local": "2025-01-02 11:00:00+01:00"}}}
+    delayed = {"number": "LH 400", "departure": {"scheduledTime": {"utc": "2025-01-02 10:05Z", "local": "2025-01-02 11:05+01:00"}}}
+
+    hashes = [parse_departure_record(r, DATE, "EDDF")[content_hash] for r in (record, reformatted, delayed)]
+    assert hashes[0] == hashes[1] != hashes[2]
@@ -0,0 +1,35 @@
+import pytest
+from urllib3.response import HTTPResponse
+
+from benchmarks.replay_server import replay_server_process
+from src.arr_dep_ingestion import AeroDataBoxAPIError
+from utils.http_session import JitteredRetry
+from tests.conftest import fetch_day
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    """Two retries without backoff, and every window fetched again instead of from checkpoints."""
+    monkeypatch.setenv("HTTP_MAX_RETRIES", "2")
+    monkeypatch.setenv("HTTP_BACKOFF_FACTOR", "0")
+    monkeypatch.setenv("INGESTION_CHECKPOINTS", "off")
+
+def test_throttled_windows_are_retried(fixtures, fast_retries):
+    fixtures_dir, airports = fixtures
+    with replay_server_process(fixtures=fixtures_dir) as url:
+        expected = fetch_day(url, airports)
+
+    # Every window is answered with 503 twice, the session's second retry gets it
+    with replay_server_process(fixtures=fixtures_dir, fail_first=2) as url:
+        assert fetch_day(url, airports) == expected
+
+def test_exhausted_retries_fail_the_run(fixtures, fast_retries):
+    fixtures_dir, airports = fixtures
+    with replay_server_process(fixtures=fixtures_dir, fail_first=3) as url:
+        with pytest.raises(AeroDataBoxAPIError, match="503"):
+            fetch_day(url, airports)
+
+def test_retry_after_is_capped():
+    retry = JitteredRetry(total=2, max_retry_after=5).increment(method="GET", url="/")
+    assert retry.get_retry_after(HTTPResponse(headers={"Retry-After": "3600"}, status=429)) == 5
+    assert retry.get_retry_after(HTTPResponse(headers={"Retry-After": "2"}, status=429)) == 2
+    assert retry.get_retry_after(HTTPResponse(status=429)) is None
@@ -0,0 +1,39 @@
+import gzip
+import itertools
+
+from benchmarks.replay_server import replay_server_process
+from utils.response_cache import cache_stats
+from tests.conftest import fetch_day
+
+def test_corrupt_entries_are_misses_and_stored_again(fixtures, tmp_path, monkeypatch):
+    fixtures_dir, airports = fixtures
+    monkeypatch.setenv("API_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INGESTION_CHECKPOINTS", "off")
+    monkeypatch.setenv("HTTP_MAX_RETRIES", "0")
+
+    with replay_server_process(fixtures=fixtures_dir) as url:
+        expected = fetch_day(url, airports)
+        entries = sorted(tmp_path.glob("*.json.gz"))
+        valid = entries[0].read_bytes()
+
+        corruptions = [
+            b"",
+            b"not gzip at all",
+            valid[:len(valid) // 2],
+            gzip.compress(b"header line without a body"),
+            gzip.compress(b'{"status_code": 200}\n{}'),
+        ]
+        for entry, content in zip(entries, itertools.cycle(corruptions)):
+            entry.write_bytes(content)
+
+        before = cache_stats()
+        assert fetch_day(url, airports) == expected
+        after = cache_stats()
+        assert after["misses"] - before["misses"] == len(entries)
+        assert after["stores"] - before["stores"] == len(entries)
+
+    # The entries stored again serve the next run on their own
+    with replay_server_process(fixtures=fixtures_dir, fail_first=100) as url:
+        before = cache_stats()
+        assert fetch_day(url, airports) == expected
+        assert cache_stats()["hits"] - before["hits"] == len(entries)
@@ -0,0 +1,180 @@
+"""
+Deduplication of the staging models when days are loaded again with different values. The dbt tests
+build the models on DuckDB (see benchmarks/bench_dbt_models.py) and needs dbt-core and dbt-duckdb
+(pip install -r dbt_project/dbt-dev-requirements.txt).
+"""
+import os
+import shutil
+
+import pytest
+
+from benchmarks import bench_dbt_models
+from benchmarks.synthetic_data import SyntheticTraffic, write_fixtures, write_airports
+from src.arr_dep_ingestion import DEPARTURE_FIELDS, parse_departure_record
+from tests.conftest import DATE
+
+DBT = os.getenv("DBT_EXECUTABLE") or shutil.which("dbt")
+
+FLIGHT_KEY = [column for column, _ in DEPARTURE_FIELDS].index("flight_key")
+
+# Makes the flights with flight_key modulo 5 in (0, 1, 2) complete in every load (see COMPLETENESS)
+COMPLETE_FLIGHTS = """
+    UPDATE {table} SET
+        departure_runwaytime_utc = NULL,
+        arrival_runwaytime_utc = COALESCE(arrival_runwaytime_utc, arrival_scheduledtime_utc)
+    WHERE abs(flight_key) % 5 IN (0, 1, 2)
+"""
+
+# Changes of the second load, by flight_key modulo 5: a less complete reload of the same schedule,
+# a less complete new schedule, an equally complete new schedule, and a lower-cased callsign
+RELOAD_CHANGES = """
+    UPDATE {table} SET
+        departure_revisedtime_utc = CASE WHEN abs(flight_key) % 5 = 0 THEN NULL ELSE departure_revisedtime_utc END,
+        arrival_airport_icao = CASE WHEN abs(flight_key) % 5 IN (1, 2) THEN 'ZZZZ' ELSE arrival_airport_icao END,
+        arrival_runwaytime_utc = CASE WHEN abs(flight_key) % 5 = 1 THEN NULL ELSE arrival_runwaytime_utc END,
+        callSign = CASE WHEN abs(flight_key) % 5 = 3 THEN lower(callSign) ELSE callSign END
+    WHERE ingestion_timestamp = (SELECT max(ingestion_timestamp) FROM {table})
+"""
+
+# Loads the day {date} again after everything else, for an incremental run to pick it up
+RELOAD_DAY = """
+    INSERT INTO {table}
+    SELECT * REPLACE ((SELECT max(ingestion_timestamp) FROM {table}) + INTERVAL 1 HOUR AS ingestion_timestamp)
+    FROM {table} WHERE flight_date = DATE '{date}'
+"""
+
+# Reports every tenth flight of {date} again under the next record date, like flights crossing midnight
+MOVE_FLIGHTS = """
+    INSERT INTO {table}
+    SELECT * REPLACE (
+        (SELECT max(ingestion_timestamp) FROM {table}) + INTERVAL 1 HOUR AS ingestion_timestamp,
+        record_date + 1 AS record_date
+    )
+    FROM {table} WHERE record_date = DATE '{date}' AND hash(icao24) % 10 = 0
+"""
+
+COMPLETENESS = """
+    CASE
+        WHEN departure_revised_utc IS NULL THEN 1
+        WHEN departure_runway_utc IS NOT NULL THEN 1
+        WHEN arrival_scheduled_utc IS NULL THEN 1
+        WHEN arrival_revised_utc IS NULL THEN 1
+        WHEN arrival_runway_utc IS NULL THEN 1
+        ELSE 0
+    END
+"""
+
+# The model's rules on the raw columns: the latest load of every flight and schedule, then the most
+# complete schedule of every flight, the latest load among equally complete ones
+REFERENCE = f"""
+    WITH filtered AS (
+        SELECT
+            number AS flight_number, TRY_CAST(flight_date AS DATE) AS flight_date, UPPER(callSign) AS callsign,
+            aircraft_modeS AS aircraft_mode_s, airport_icao,
+            departure_scheduledtime_utc AS departure_scheduled_utc, departure_revisedtime_utc AS departure_revised_utc,
+            departure_runwaytime_utc AS departure_runway_utc, arrival_airport_icao,
+            arrival_scheduledtime_utc AS arrival_scheduled_utc, arrival_revisedtime_utc AS arrival_revised_utc,
+            arrival_runwaytime_utc AS arrival_runway_utc, ingestion_timestamp
+        FROM {{table}}
+        WHERE isCargo = FALSE AND DATE(departure_scheduledtime_utc) = flight_date
+    ),
+    latest_records AS (
+        SELECT * FROM filtered
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY flight_number, flight_date, callsign, aircraft_mode_s, airport_icao,
+                departure_scheduled_utc, arrival_airport_icao, arrival_scheduled_utc
+            ORDER BY ingestion_timestamp DESC
+        ) = 1
+    )
+    SELECT * FROM latest_records
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY flight_number, flight_date, callsign, aircraft_mode_s, airport_icao
+        ORDER BY {COMPLETENESS}, ingestion_timestamp DESC
+    ) = 1
+"""
+
+COMPARED_COLUMNS = (
+    "flight_number, flight_date, callsign, aircraft_mode_s, airport_icao, departure_revised_utc, "
+    "arrival_airport_icao, arrival_runway_utc, ingestion_timestamp"
+)
+
+def test_flight_key_ignores_callsign_case():
+    record = {"number": "LH 400", "callSign": "dlh400", "aircraft": {"modeS": "3c6444"}}
+    upper = dict(record, callSign="DLH400")
+    assert parse_departure_record(record, DATE, "EDDF")[FLIGHT_KEY] == parse_departure_record(upper, DATE, "EDDF")[FLIGHT_KEY]
+
+@pytest.mark.skipif(DBT is None, reason="dbt is not installed")
+def test_departures_dedup_on_reloads_that_differ(tmp_path):
+    import duckdb
+
+    fixtures_dir = str(tmp_path / "fixtures")
+    traffic = SyntheticTraffic(airports=5, flights_per_airport=200, seed=11)
+    write_fixtures(traffic, fixtures_dir, [DATE], raw=True)
+    write_airports(traffic, fixtures_dir)
+
+    database_path = str(tmp_path / "staging.duckdb")
+    schema = bench_dbt_models.source_schema()
+    table = f"{schema}.airport_departures"
+    bench_dbt_models.load_raw_tables(database_path, fixtures_dir, schema, [DATE], reloads=2)
+    with duckdb.connect(database_path) as connection:
+        connection.execute(COMPLETE_FLIGHTS.format(table=table))
+        connection.execute(RELOAD_CHANGES.format(table=table))
+
+    run_results = bench_dbt_models.run_dbt(DBT, database_path, str(tmp_path / "target"), "stg_departures_base")
+    relation = run_results["results"][0]["relation_name"]
+
+    with duckdb.connect(database_path, read_only=True) as connection:
+        model = f"SELECT {COMPARED_COLUMNS} FROM {relation}"
+        reference = f"SELECT {COMPARED_COLUMNS} FROM ({REFERENCE.format(table=table)})"
+        assert connection.execute(f"SELECT count(*) FROM ({model} EXCEPT ALL {reference})").fetchone()[0] == 0
+        assert connection.execute(f"SELECT count(*) FROM ({reference} EXCEPT ALL {model})").fetchone()[0] == 0
+
+        # The complete schedules of the first load win over the less complete new ones of the second
+        kept_first_load = connection.execute(
+            f"SELECT count(*) FROM {relation} WHERE ingestion_timestamp = (SELECT min(ingestion_timestamp) FROM {table})"
+        ).fetchone()[0]
+        assert kept_first_load > 0
+
+@pytest.mark.skipif(DBT is None, reason="dbt is not installed")
+def test_incremental_run_rebuilds_the_days_loaded_since(tmp_path):
+    import duckdb
+
+    next_day = "2025-01-03"
+    fixtures_dir = str(tmp_path / "fixtures")
+    traffic = SyntheticTraffic(airports=5, flights_per_airport=200, seed=11)
+    write_fixtures(traffic, fixtures_dir, [DATE, next_day], raw=True)
+    write_airports(traffic, fixtures_dir)
+
+    database_path = str(tmp_path / "staging.duckdb")
+    schema = bench_dbt_models.source_schema()
+    departures, flights = f"{schema}.airport_departures", f"{schema}.flights"
+    bench_dbt_models.load_raw_tables(database_path, fixtures_dir, schema, [DATE, next_day], reloads=1)
+    bench_dbt_models.run_dbt(DBT, database_path, str(tmp_path / "full"), "stg_departures_base stg_flights")
+
+    # DATE is older than the newest day built, the moved flights land on the newest day
+    with duckdb.connect(database_path) as connection:
+        connection.execute(RELOAD_DAY.format(table=departures, date=DATE))
+        connection.execute(RELOAD_CHANGES.format(table=departures))
+        connection.execute(MOVE_FLIGHTS.format(table=flights, date=DATE))
+        moved = connection.execute(f"SELECT count(*) FROM {flights} WHERE record_date = DATE '{next_day}' "
+                                   f"AND ingestion_timestamp = (SELECT max(ingestion_timestamp) FROM {flights})").fetchone()[0]
+
+    run_results = bench_dbt_models.run_dbt(DBT, database_path, str(tmp_path / "incremental"), "stg_departures_base stg_flights")
+    relations = {result["unique_id"].split(".")[-1]: result["relation_name"] for result in run_results["results"]}
+
+    with duckdb.connect(database_path, read_only=True) as connection:
+        model = f"SELECT {COMPARED_COLUMNS} FROM {relations['stg_departures_base']}"
+        reference = f"SELECT {COMPARED_COLUMNS} FROM ({REFERENCE.format(table=departures)})"
+        assert connection.execute(f"SELECT count(*) FROM ({model} EXCEPT ALL {reference})").fetchone()[0] == 0
+        assert connection.execute(f"SELECT count(*) FROM ({reference} EXCEPT ALL {model})").fetchone()[0] == 0
+
+        # The moved flights are only kept under their new record date
+        stg_flights = relations["stg_flights"]
+        assert moved > 0
+        assert connection.execute(
+            f"SELECT count(*) FROM {stg_flights} WHERE flight_date = DATE '{next_day}' "
+            f"AND ingestion_timestamp = (SELECT max(ingestion_timestamp) FROM {flights})"
+        ).fetchone()[0] == moved
+        assert connection.execute(
+            f"SELECT count(*) FROM (SELECT icao24, first_seen_ts FROM {stg_flights} GROUP BY ALL HAVING count(*) > 1)"
+        ).fetchone()[0] == 0
@@ -0,0 +1,59 @@
+import time
+
+import requests
+import urllib3
+
+from benchmarks.replay_server import replay_server_process
+from src.arr_dep_ingestion import _is_read_timeout, AeroDataBoxAPIError
+from utils.metrics import get_metrics
+from tests.conftest import fetch_day
+
+def test_read_timeout_is_found_behind_exhausted_retries():
+    # What requests raises once the session's read retries are used up
+    read_timeout = urllib3.exceptions.ReadTimeoutError(None, "/icao/EDDF", "Read timed out.")
+    max_retries = urllib3.exceptions.MaxRetryError(None, "/icao/EDDF", reason=read_timeout)
+    try:
+        try:
+            raise requests.exceptions.ConnectionError(max_retries)
+        except requests.exceptions.ConnectionError as errc:
+            raise AeroDataBoxAPIError("Connection error") from errc
+    except AeroDataBoxAPIError as e:
+        assert _is_read_timeout(e)
+
+    assert _is_read_timeout(requests.exceptions.ReadTimeout())
+    assert not _is_read_timeout(AeroDataBoxAPIError("HTTP error 500"))
+
+def test_slow_window_is_bisected_in_the_same_run(monkeypatch, fixtures):
+    fixtures_dir, airports = fixtures
+    monkeypatch.setenv("INGESTION_CHECKPOINTS", "off")
+    with replay_server_process(fixtures=fixtures_dir) as url:
+        expected = fetch_day(url, airports)
+
+    monkeypatch.setenv("AERODATABOX_REQUEST_TIMEOUT_SECONDS", "1")
+    monkeypatch.setenv("AERODATABOX_MIN_WINDOW_MINUTES", "60")
+    # 12 hour windows are slow, their 6 hour halves are not
+    with replay_server_process(fixtures=fixtures_dir, slow_window_minutes=360, slow_window_ms=5000) as url:
+        start = time.perf_counter()
+        departures, arrivals = fetch_day(url, airports)
+        elapsed = time.perf_counter() - start
+
+    # The halves are collected in window order, so the rows come out as from the whole windows
+    assert (departures, arrivals) == expected
+    assert departures and arrivals
+    # Only the first window of each airport times out, the rest of its day is planned in 6 hour windows
+    assert get_metrics().counter_total("ingestion_retries_total", reason="bisect") == len(airports)
+    # One timeout per slow window, not the session's read retries with their backoff
+    assert elapsed < 4
+
+def test_window_at_the_record_cap_is_bisected(monkeypatch, fixtures):
+    fixtures_dir, airports = fixtures
+    monkeypatch.setenv("INGESTION_CHECKPOINTS", "off")
+    with replay_server_process(fixtures=fixtures_dir) as url:
+        expected = fetch_day(url, airports)
+
+        monkeypatch.setenv("AERODATABOX_MAX_RECORDS_PER_WINDOW", "10")
+        monkeypatch.setenv("AERODATABOX_MIN_WINDOW_MINUTES", "60")
+        departures, arrivals = fetch_day(url, airports)
+
+    assert (departures, arrivals) == expected
+    assert get_metrics().counter_total("ingestion_retries_total", reason="bisect") >= len(airports)
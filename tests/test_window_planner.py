@@ -0,0 +1,56 @@
+import threading
+
+from utils.window_planner import WindowPlanner, MAX_WINDOW_MINUTES
+
+def test_concurrent_saves_keep_every_planners_updates(tmp_path):
+    hints_path = str(tmp_path / "window_hints.json")
+    airports = [f"E{i:03d}" for i in range(40)]
+    errors = []
+
+    def run(airport_icao):
+        # One planner per backfill day, each adjusting its own airport
+        try:
+            planner = WindowPlanner(hints_path)
+            planner.observe(airport_icao, planner.large_records, 0)
+            for _ in range(10):
+                planner.save_hints()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(airport_icao,)) for airport_icao in airports]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    planner = WindowPlanner(hints_path)
+    assert {airport_icao: planner.window_minutes(airport_icao) for airport_icao in airports} == \
+        {airport_icao: MAX_WINDOW_MINUTES // 2 for airport_icao in airports}
+    assert list(tmp_path.glob("*.tmp")) == []
+
+def test_save_only_writes_adjusted_airports(tmp_path):
+    hints_path = str(tmp_path / "window_hints.json")
+    busy = WindowPlanner(hints_path)
+    busy.observe("EDDF", busy.large_records, 0)
+    busy.save_hints()
+
+    # A planner that saw EDDF before the save must not reset it with its stale copy
+    stale = WindowPlanner(str(tmp_path / "missing.json"))
+    stale.hints_path = hints_path
+    stale.observe("LFPG", stale.large_records, 0)
+    stale.save_hints()
+
+    planner = WindowPlanner(hints_path)
+    assert planner.window_minutes("EDDF") == MAX_WINDOW_MINUTES // 2
+    assert planner.window_minutes("LFPG") == MAX_WINDOW_MINUTES // 2
+
+def test_later_windows_use_what_earlier_ones_taught():
+    planner = WindowPlanner("")
+    windows = planner.windows("EDDF", "2025-01-02T00:00", "2025-01-02T23:59")
+
+    assert next(windows) == ("2025-01-02T00:00", "2025-01-02T12:00")
+    planner.observe("EDDF", planner.large_records, 0)
+    assert next(windows) == ("2025-01-02T12:00", "2025-01-02T18:00")
+    assert next(windows) == ("2025-01-02T18:00", "2025-01-02T23:59")
+    assert next(windows, None) is None
@@ -0,0 +1,175 @@
+import os
+import gzip
+import uuid
+import logging
+import tempfile
+
+from snowflake_handler import AsyncQueryExecutor
+
+# Load modes for the raw tables, switchable through RAW_LOAD_MODE
+LOAD_MODE_AUTO = "auto"      # COPY for large batches, INSERT for small ones
+LOAD_MODE_COPY = "copy"      # always PUT + COPY INTO
+LOAD_MODE_INSERT = "insert"  # always executemany
+
+# Below this many rows the PUT/COPY round trips cost more than a plain INSERT
+DEFAULT_COPY_MIN_ROWS = 5000
+
+# COPY INTO loads staged files in parallel, one file per warehouse thread (8 on an X-Small),
+# so each batch is split into this many files. A batch of at most a few hundred thousand rows
+# compresses to a few MB, far below any byte limit, so the split is by row count.
+DEFAULT_FILES_PER_LOAD = 8
+
+# Files below this many rows cost more in per-file overhead than their parallel load saves
+DEFAULT_MIN_FILE_ROWS = 5000
+
+# Upper bound per file, for very large batches (100-250 MB compressed is Snowflake's recommended size)
+DEFAULT_FILE_TARGET_BYTES = 100 * 1024 * 1024
+
+def _csv_value(value) -> str:
+    """Formats one value for the CSV file format used by COPY INTO."""
+    if value is None:
+        # Unquoted empty field -> NULL (EMPTY_FIELD_AS_NULL), "" stays an empty string
+        return ''
+    if value is True:
+        return 'TRUE'
+    if value is False:
+        return 'FALSE'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _csv_text_value(value) -> str:
+    """_csv_value for text, date and timestamp columns: everything but NULL is quoted."""
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+# Column types whose values are always written quoted, without checking the value's Python type
+TEXT_COLUMN_TYPES = {"VARCHAR", "STRING", "TEXT", "CHAR", "DATE", "TIMESTAMP", "TIMESTAMP_NTZ", "TIMESTAMP_TZ"}
+
+def _csv_formatters(column_types: list[str], column_count: int) -> list:
+    """One formatter per column, chosen from the declared column types when they are known."""
+    if not column_types:
+        return [_csv_value] * column_count
+    return [_csv_text_value if column_type in TEXT_COLUMN_TYPES else _csv_value for column_type in column_types]
+
+def file_rows_for(row_count: int, files: int = None, min_rows: int = None) -> int:
+    """Rows per staged file that split `row_count` rows over BULK_LOAD_FILES files of at least BULK_LOAD_MIN_FILE_ROWS."""
+    files = files or int(os.getenv('BULK_LOAD_FILES', DEFAULT_FILES_PER_LOAD))
+    min_rows = min_rows or int(os.getenv('BULK_LOAD_MIN_FILE_ROWS', DEFAULT_MIN_FILE_ROWS))
+    return max(-(-row_count // max(files, 1)), min_rows, 1)
+
+def write_csv_gz_files(data, directory: str, file_target_bytes: int = None, column_types: list[str] = None,
+                       file_rows: int = None) -> list[str]:
+    """
+    Writes rows into gzip-compressed CSV files of at most `file_rows` rows (unlimited when None)
+    and roughly `file_target_bytes` each.
+    `column_types` (e.g. from the raw schema registry) picks each column's formatter once up front.
+    Returns the list of written file paths.
+    """
+    file_target_bytes = file_target_bytes or int(os.getenv('BULK_LOAD_FILE_BYTES', DEFAULT_FILE_TARGET_BYTES))
+    formatters = None
+
+    paths = []
+    raw_file = gz_file = None
+    rows_in_file = 0
+
+    try:
+        for row in data:
+            # Roll over to a new file once it holds file_rows rows or its compressed size reaches the target
+            if gz_file is None or rows_in_file == file_rows or raw_file.tell() >= file_target_bytes:
+                if gz_file is not None:
+                    gz_file.close()
+                    raw_file.close()
+                path = os.path.join(directory, f"part_{len(paths):05d}.csv.gz")
+                raw_file = open(path, 'wb')
+                gz_file = gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=6)
+                paths.append(path)
+                rows_in_file = 0
+
+            if formatters is None:
+                formatters = _csv_formatters(column_types, len(row))
+            gz_file.write((','.join([format_value(v) for format_value, v in zip(formatters, row)]) + '\n').encode('utf-8'))
+            rows_in_file += 1
+    finally:
+        if gz_file is not None:
+            gz_file.close()
+            raw_file.close()
+
+    return paths
+
+def insert_rows(cursor, table_name: str, column_names: list[str], data):
+    """Loads rows with a parameterised INSERT through executemany."""
+    placeholders = ', '.join(['%s'] * len(column_names))
+    column_str = ', '.join(column_names)
+    insert_query = f"""
+        INSERT INTO {table_name} ({column_str})
+        VALUES ({placeholders})
+    """
+
+    # Using executemany with placeholders (%s) prevents SQL injection.
+    cursor.executemany(insert_query, data)
+
+def copy_rows(cursor, table_name: str, column_names: list[str], data, wait: bool = True,
+              column_types: list[str] = None):
+    """
+    Loads rows by writing them to compressed CSV files, uploading them to the
+    table stage with PUT and loading them with a single COPY INTO. The rows are split
+    over several files (see file_rows_for), which the COPY loads in parallel.
+    With wait=False the COPY INTO is submitted asynchronously and its AsyncQuery returned.
+    """
+    # A unique stage prefix keeps concurrent or retried loads apart
+    stage_path = f"@%{table_name}/load_{uuid.uuid4().hex}/"
+    column_str = ', '.join(column_names)
+
+    with tempfile.TemporaryDirectory(prefix=f"{table_name}_") as tmp_dir:
+        files = write_csv_gz_files(data, tmp_dir, column_types=column_types, file_rows=file_rows_for(len(data)))
+        logging.info(f"Staging {len(files)} compressed file(s) for {table_name} at {stage_path}.....")
+
+        cursor.execute(
+            f"PUT 'file://{tmp_dir}/*.csv.gz' '{stage_path}' "
+            f"PARALLEL = 8 AUTO_COMPRESS = FALSE SOURCE_COMPRESSION = GZIP OVERWRITE = TRUE"
+        )
+
+    copy_query = f"""
+        COPY INTO {table_name} ({column_str})
+        FROM '{stage_path}'
+        FILE_FORMAT = (
+            TYPE = CSV COMPRESSION = GZIP FIELD_DELIMITER = ','
+            FIELD_OPTIONALLY_ENCLOSED_BY = '"' EMPTY_FIELD_AS_NULL = TRUE
+        )
+        ON_ERROR = ABORT_STATEMENT
+        PURGE = TRUE
+    """
+
+    if not wait:
+        return AsyncQueryExecutor(cursor.connection).submit(copy_query)
+    cursor.execute(copy_query)
+
+def resolve_load_mode(row_count: int, mode: str = None) -> str:
+    """Decides between COPY and INSERT from RAW_LOAD_MODE and the row-count threshold."""
+    mode = (mode or os.getenv('RAW_LOAD_MODE', LOAD_MODE_AUTO)).lower()
+
+    if mode not in (LOAD_MODE_AUTO, LOAD_MODE_COPY, LOAD_MODE_INSERT):
+        raise ValueError(f"Unknown RAW_LOAD_MODE '{mode}'.")
+
+    if mode == LOAD_MODE_AUTO:
+        min_rows = int(os.getenv('BULK_LOAD_MIN_ROWS', DEFAULT_COPY_MIN_ROWS))
+        return LOAD_MODE_COPY if row_count >= min_rows else LOAD_MODE_INSERT
+
+    return mode
+
+def load_rows(cursor, table_name: str, column_names: list[str], data, mode: str = None, wait: bool = True,
+              column_types: list[str] = None):
+    """
+    Loads rows into a raw table using COPY or executemany, depending on configuration.
+    With wait=False a COPY INTO keeps running in Snowflake and its AsyncQuery is returned,
+    otherwise (and for INSERTs) the rows are loaded when this returns None.
+    """
+    load_mode = resolve_load_mode(len(data), mode)
+
+    if load_mode == LOAD_MODE_COPY:
+        return copy_rows(cursor, table_name, column_names, data, wait, column_types)
+
+    insert_rows(cursor, table_name, column_names, data)
+    return None
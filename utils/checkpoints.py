@@ -0,0 +1,119 @@
+import os
+import json
+import gzip
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from utils.local_state import atomic_write, file_lock, env_flag
+
+# Unit checkpoints of a failed run are reused by its retries for this long
+DEFAULT_UNIT_CHECKPOINT_TTL_SECONDS = 24 * 3600
+
+class CheckpointStore:
+    """
+    Small JSON checkpoint file recording which units of work are completed.
+    Safe to share between threads and processes: every update re-reads the file under an
+    exclusive file lock and replaces it atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, file_lock(self.path):
+            yield
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"completed": {}, "failed": {}}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, state: dict):
+        with atomic_write(self.path) as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+
+    def completed(self) -> set:
+        """Returns the keys of all completed units."""
+        with self._locked():
+            return set(self._read()["completed"])
+
+    def is_completed(self, key: str) -> bool:
+        return key in self.completed()
+
+    def mark_completed(self, key: str, **details):
+        with self._locked():
+            state = self._read()
+            state["completed"][key] = {"completed_at": time.time(), **details}
+            state["failed"].pop(key, None)
+            self._write(state)
+        logging.info(f"Checkpoint: {key} completed.")
+
+    def mark_failed(self, key: str, error: str):
+        with self._locked():
+            state = self._read()
+            state["failed"][key] = {"failed_at": time.time(), "error": error}
+            self._write(state)
+        logging.warning(f"Checkpoint: {key} failed ({error}).")
+
+class UnitCheckpoint:
+    """
+    Persists the parsed rows of every completed unit (e.g. one airport window) of an ingestion run,
+    so that a retry of the same run only fetches the units that did not complete.
+
+    Files live in INGESTION_CHECKPOINT_DIR (default: <tmp>/aviation_checkpoints)/<source>/<run_key>/
+    and are removed with `clear()` once the run has been loaded successfully.
+    Set INGESTION_CHECKPOINTS=off to disable.
+    """
+
+    def __init__(self, source: str, run_key: str, base_dir: str = None):
+        base_dir = base_dir or os.getenv(
+            'INGESTION_CHECKPOINT_DIR', os.path.join(tempfile.gettempdir(), "aviation_checkpoints")
+        )
+        self.directory = os.path.join(base_dir, source, run_key)
+        self.enabled = env_flag('INGESTION_CHECKPOINTS')
+        self.ttl = int(os.getenv('INGESTION_CHECKPOINT_TTL_SECONDS', DEFAULT_UNIT_CHECKPOINT_TTL_SECONDS))
+
+    def _unit_path(self, unit_key: str) -> str:
+        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in unit_key)
+        return os.path.join(self.directory, f"{safe_key}.json.gz")
+
+    def load(self, unit_key: str):
+        """Returns the saved row lists of a unit as lists of tuples, or None if it must be fetched."""
+        if not self.enabled:
+            return None
+
+        path = self._unit_path(unit_key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable unit checkpoint {path}: {e}")
+            return None
+
+        return [[tuple(row) for row in rows] for rows in payload]
+
+    def save(self, unit_key: str, *row_lists):
+        """Saves the row lists of a completed unit."""
+        if not self.enabled:
+            return
+
+        with atomic_write(self._unit_path(unit_key), binary=True) as f, gzip.open(f, 'wt', encoding='utf-8') as gz:
+            json.dump(row_lists, gz)
+
+    def clear(self):
+        """Removes all unit checkpoints of the run."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,216 @@
+import os
+import json
+import logging
+from typing import Any, Optional
+
+from utils.field_extraction import compile_extractor, add_hash_values, HASH_FUNCTIONS
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND_AUTO = "auto"
+BACKEND_MSGSPEC = "msgspec"
+BACKEND_ORJSON = "orjson"
+BACKEND_JSON = "json"
+
+def resolve_backend(backend: str = None) -> str:
+    """
+    Picks the JSON decoding backend: JSON_DECODER=auto|msgspec|orjson|json.
+    auto prefers msgspec, then orjson, and falls back to the standard library.
+    """
+    backend = (backend or os.getenv('JSON_DECODER', BACKEND_AUTO)).lower()
+
+    if backend == BACKEND_AUTO:
+        if msgspec is not None:
+            return BACKEND_MSGSPEC
+        return BACKEND_ORJSON if orjson is not None else BACKEND_JSON
+
+    if backend not in (BACKEND_MSGSPEC, BACKEND_ORJSON, BACKEND_JSON):
+        raise ValueError(f"Unknown JSON_DECODER '{backend}', expected auto, msgspec, orjson or json.")
+    if backend == BACKEND_MSGSPEC and msgspec is None or backend == BACKEND_ORJSON and orjson is None:
+        logging.warning(f"JSON_DECODER={backend} is not installed, using the standard json module.")
+        return BACKEND_JSON
+    return backend
+
+def _path_tree(fields: list) -> dict:
+    """Nested dict of the record keys a field map reads, leaves are None."""
+    tree = {}
+    for column, source in fields:
+        if source is None or source.startswith(("$", "#")):
+            continue
+        *parents, leaf = source.split(".")
+        node = tree
+        for key in parents:
+            child = node.setdefault(key, {})
+            if child is None:
+                raise ValueError(f"Field '{column}' reads below '{key}', which is also loaded as a value.")
+            node = child
+        if node.get(leaf):
+            raise ValueError(f"Field '{column}' loads '{leaf}', which also has nested fields.")
+        node[leaf] = None
+    return tree
+
+def _define_struct(name: str, tree: dict):
+    """
+    Defines a msgspec Struct that only holds the keys in `tree`, everything else in the
+    payload is skipped while decoding. Attributes are named f0, f1, ... and renamed to the
+    JSON keys, so keys that aren't valid identifiers work too.
+    Returns (struct, {key: (attribute, child attributes or None)}).
+    """
+    fields, rename, attributes = [], {}, {}
+
+    for i, (key, child) in enumerate(tree.items()):
+        attr = f"f{i}"
+        if child is None:
+            field_type, child_attributes = Any, None
+        else:
+            child_struct, child_attributes = _define_struct(f"{name}_{key}", child)
+            field_type = Optional[child_struct]
+        fields.append((attr, field_type, None))
+        rename[attr] = key
+        attributes[key] = (attr, child_attributes)
+
+    # Decoded JSON can't contain reference cycles, so the structs don't need GC tracking
+    struct = msgspec.defstruct(name, fields, rename=rename, gc=False)
+    return struct, attributes
+
+def _compile_struct_extractor(fields: list, attributes: dict, args: tuple, name: str):
+    """Like compile_extractor, but for records decoded into the structs of _define_struct."""
+    prefix_vars = {(): "record"}
+    lines, values = [], []
+
+    for column, source in fields:
+        if source is None:
+            values.append("None")
+            continue
+        if source.startswith("$"):
+            values.append(source[1:])
+            continue
+        if source.startswith("#"):
+            values.append(None)
+            continue
+
+        keys = source.split(".")
+        node, prefix = attributes, ()
+        for depth, key in enumerate(keys):
+            attr, child = node[key]
+            parent = prefix_vars[prefix]
+            prefix = prefix + (key,)
+
+            # The record itself is never None, nested structs are None when missing
+            access = f"{parent}.{attr}" if depth == 0 else f"(None if {parent} is None else {parent}.{attr})"
+            if depth == len(keys) - 1:
+                values.append(access)
+            elif prefix not in prefix_vars:
+                var = f"_v{len(prefix_vars)}"
+                lines.append(f"    {var} = {access}")
+                prefix_vars[prefix] = var
+            node = child
+
+    add_hash_values(fields, values, lines)
+
+    signature = ", ".join(("record",) + tuple(args))
+    body = "\n".join(lines)
+    source_code = f"def {name}({signature}):\n{body}\n    return ({', '.join(values)},)\n"
+
+    logging.debug(f"Compiled struct extractor {name}:\n{source_code}")
+
+    namespace = dict(HASH_FUNCTIONS)
+    exec(compile(source_code, f"<extractor {name}>", "exec"), namespace)
+    return namespace[name]
+
+class PayloadDecoder:
+    """
+    Decodes an API payload straight into row tuples, following one field map per collection.
+
+    With msgspec installed the payload is decoded into generated Structs holding only the
+    loaded fields, so no dict tree is ever built for the rest of the payload. Otherwise the
+    payload is parsed by orjson (or json) and rows are taken with compile_extractor.
+    Both paths give the same rows as parsing `response.json()` with compile_extractor.
+    """
+
+    def __init__(self, collections: list, args: tuple = (), name: str = "payload", backend: str = None):
+        """
+        Args:
+            collections: Ordered (key, fields) pairs. `key` is the top-level key holding the list of
+                records, or None when the payload itself is the list. `fields` is a field map as
+                accepted by compile_extractor.
+            args: Names of the extra arguments passed to decode() and referenced as "$<arg>".
+            name: Prefix for the generated structs and extractors.
+            backend: Overrides JSON_DECODER.
+        """
+        self.collections = collections
+        self.backend = resolve_backend(backend)
+
+        self._dict_extractors = [
+            compile_extractor(fields, args, f"{name}_{key or 'records'}") for key, fields in collections
+        ]
+
+        if self.backend == BACKEND_MSGSPEC:
+            self._init_msgspec(args, name)
+
+    def _init_msgspec(self, args: tuple, name: str):
+        record_types, self._struct_extractors = [], []
+        for key, fields in self.collections:
+            struct_name = f"{name}_{key or 'records'}"
+            struct, attributes = _define_struct(struct_name, _path_tree(fields))
+            record_types.append(list[struct])
+            self._struct_extractors.append(_compile_struct_extractor(fields, attributes, args, struct_name))
+
+        if len(self.collections) == 1 and self.collections[0][0] is None:
+            self._decoder = msgspec.json.Decoder(Optional[record_types[0]])
+            return
+
+        root = msgspec.defstruct(
+            f"{name}_root",
+            [(f"f{i}", Optional[record_type], None) for i, record_type in enumerate(record_types)],
+            rename={f"f{i}": key for i, (key, _) in enumerate(self.collections)},
+            gc=False,
+        )
+        self._decoder = msgspec.json.Decoder(root)
+
+    def _decode_msgspec(self, content: bytes, args: tuple):
+        try:
+            decoded = self._decoder.decode(content)
+        except msgspec.ValidationError as e:
+            # Unexpected shape somewhere in the payload (e.g. a string where an object was expected),
+            # the dict path handles it like any other missing value
+            logging.debug(f"Typed decoding failed ({e}), falling back to dict parsing.")
+            return self._decode_dicts(content, args)
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Invalid JSON payload: {e}") from e
+
+        if self.collections[0][0] is None:
+            record_lists = [decoded]
+        else:
+            record_lists = [getattr(decoded, f"f{i}") for i in range(len(self.collections))]
+
+        return tuple(
+            [extract(record, *args) for record in records or ()]
+            for extract, records in zip(self._struct_extractors, record_lists)
+        )
+
+    def _decode_dicts(self, content: bytes, args: tuple):
+        data = orjson.loads(content) if self.backend == BACKEND_ORJSON else json.loads(content)
+
+        results = []
+        for (key, _), extract in zip(self.collections, self._dict_extractors):
+            if key is None:
+                records = data
+            else:
+                records = data.get(key) if isinstance(data, dict) else None
+            results.append([extract(record, *args) for record in records or ()])
+        return tuple(results)
+
+    def decode(self, content: bytes, *args) -> tuple:
+        """Returns one list of row tuples per collection, in collection order."""
+        if self.backend == BACKEND_MSGSPEC:
+            return self._decode_msgspec(content, args)
+        return self._decode_dicts(content, args)
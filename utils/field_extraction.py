@@ -0,0 +1,168 @@
+import json
+import logging
+import datetime
+from functools import lru_cache
+from hashlib import blake2b
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shared stand-in for missing or non-dict intermediate values, so lookups below it yield None
+_EMPTY = {}
+
+# Hashed values are serialized as a compact JSON array, which keeps NULL, booleans, numbers and
+# text apart. All three encoders give the same bytes for the values the parsers produce.
+if msgspec is not None:
+    _encode_values = msgspec.json.Encoder().encode
+elif orjson is not None:
+    _encode_values = orjson.dumps
+else:
+    def _encode_values(values) -> bytes:
+        return json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def hash_values(values: tuple) -> int:
+    """
+    Signed 64-bit BLAKE2b hash of a tuple of values, as loaded into BIGINT columns.
+    Unlike hash() it is the same in every process, so keys computed by different runs match.
+    """
+    return int.from_bytes(blake2b(_encode_values(values), digest_size=8).digest(), "big", signed=True)
+
+def _upper(value):
+    return value.upper() if isinstance(value, str) else value
+
+@lru_cache(maxsize=65536)  # a day's movements share few distinct minutes
+def _timestamp(value):
+    """
+    Timestamp text as the TIMESTAMP (NTZ) column keeps it: the wall-clock time without its offset,
+    so "2025-01-02 11:00+01:00" and "2025-01-02T11:00:00+01:00" hash alike. Other text is kept as is.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(value).replace(tzinfo=None).isoformat()
+    except ValueError:
+        return value
+
+# Normalizations a hashed column can be wrapped in, e.g. "#number,UPPER(callSign)" hashes the
+# upper-cased callsign, as the staging models compare it
+HASH_NORMALIZERS = {"UPPER": _upper, "TIMESTAMP": _timestamp}
+
+# Names the hash expressions of add_hash_values refer to, for the namespace of generated extractors
+HASH_FUNCTIONS = {"_hash_values": hash_values, **{f"_{name}": function for name, function in HASH_NORMALIZERS.items()}}
+
+def hashed_terms(source: str) -> list:
+    """(column, normalization or None) pairs hashed by a "#<column>,<NORMALIZATION>(<column>),..." source."""
+    terms = []
+    for term in source[1:].split(","):
+        name, _, rest = term.partition("(")
+        if rest:
+            if name not in HASH_NORMALIZERS or not rest.endswith(")"):
+                raise ValueError(f"Unknown hashed column normalization '{term}'.")
+            terms.append((rest[:-1], name))
+        else:
+            terms.append((term, None))
+    return terms
+
+def hashed_columns(source: str) -> list:
+    """Columns hashed by a "#<column>,<column>,..." source."""
+    return [column for column, _ in hashed_terms(source)]
+
+def hash_record(source: str, record: dict) -> int:
+    """hash_values() of the columns a "#..." source hashes, taken from a dict of column values."""
+    return hash_values(tuple(
+        record.get(column) if normalization is None else HASH_NORMALIZERS[normalization](record.get(column))
+        for column, normalization in hashed_terms(source)
+    ))
+
+def add_hash_values(fields: list, values: list, lines: list):
+    """
+    Fills in the value expressions of the hashed ("#...") fields of a compiled extractor.
+    The columns they hash are computed once into locals, which the row then returns as well.
+    """
+    positions = {column: i for i, (column, _) in enumerate(fields)}
+    hashed = {column for _, source in fields if source and source.startswith("#") for column in hashed_columns(source)}
+
+    for column in sorted(hashed, key=lambda column: positions.get(column, -1)):
+        i = positions.get(column)
+        if i is None or not fields[i][1] or fields[i][1].startswith("#"):
+            raise ValueError(f"Hashed column '{column}' must be a loaded, non-hashed column of the same field map.")
+        lines.append(f"    _c{i} = {values[i]}")
+        values[i] = f"_c{i}"
+
+    for i, (_, source) in enumerate(fields):
+        if source and source.startswith("#"):
+            terms = [
+                values[positions[column]] if normalization is None else f"_{normalization}({values[positions[column]]})"
+                for column, normalization in hashed_terms(source)
+            ]
+            values[i] = f"_hash_values(({', '.join(terms)},))"
+
+def compile_extractor(fields: list, args: tuple = (), name: str = "extract"):
+    """
+    Compiles a declarative field map into a single extractor function.
+
+    Args:
+        fields: Ordered list of (column, source) pairs. A source is either a dotted path
+            into the record (e.g. "departure.scheduledTime.utc") or "$<arg>" to take the
+            value from one of the extractor's extra arguments.
+            A source "#<column>,<column>,..." is the hash_values() of those columns' values,
+            where a column may be wrapped in a HASH_NORMALIZERS name, e.g. "UPPER(callSign)".
+            A source of None loads NULL (see TableSchema.write_fields).
+        args: Names of the extra positional arguments the extractor accepts after the record.
+        name: Name given to the generated function (shows up in tracebacks and profiles).
+
+    Returns:
+        A function `extractor(record, *args)` that returns one row tuple in column order.
+        Every nested dict is looked up once per record, no matter how many fields read from it,
+        and missing or non-dict intermediate values give None just like `get_value` does.
+    """
+    prefix_vars = {(): "record"}
+    lines = []
+    values = []
+
+    for column, source in fields:
+        if source is None:
+            values.append("None")
+            continue
+        if source.startswith("$"):
+            arg = source[1:]
+            if arg not in args:
+                raise ValueError(f"Field '{column}' refers to unknown argument '{arg}'.")
+            values.append(arg)
+            continue
+        if source.startswith("#"):
+            values.append(None)
+            continue
+
+        keys = tuple(source.split("."))
+
+        # Emit one lookup per intermediate dict, the first time a path goes through it
+        for depth in range(1, len(keys)):
+            prefix = keys[:depth]
+            if prefix not in prefix_vars:
+                var = f"_v{len(prefix_vars)}"
+                parent = prefix_vars[prefix[:-1]]
+                lines.append(f"    {var} = {parent}.get({keys[depth - 1]!r})")
+                lines.append(f"    if not isinstance({var}, dict): {var} = _EMPTY")
+                prefix_vars[prefix] = var
+
+        values.append(f"{prefix_vars[keys[:-1]]}.get({keys[-1]!r})")
+
+    add_hash_values(fields, values, lines)
+
+    signature = ", ".join(("record",) + tuple(args))
+    body = "\n".join(lines)
+    source_code = f"def {name}({signature}):\n{body}\n    return ({', '.join(values)},)\n"
+
+    logging.debug(f"Compiled extractor {name}:\n{source_code}")
+
+    namespace = {"_EMPTY": _EMPTY, **HASH_FUNCTIONS}
+    exec(compile(source_code, f"<extractor {name}>", "exec"), namespace)
+    return namespace[name]
@@ -0,0 +1,113 @@
+import os
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing (one pool per host, `POOL_MAXSIZE` keep-alive connections in each)
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 8
+
+# Retry policy
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 1.0
+BACKOFF_MAX_SECONDS = 60
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Longest Retry-After a worker sleeps for, a server asking for more is retried after this anyway
+DEFAULT_RETRY_AFTER_MAX_SECONDS = 120
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+class JitteredRetry(Retry):
+    """
+    Exponential backoff with jitter, so concurrent workers that hit the same
+    throttling window don't all come back at the same moment.
+    A `Retry-After` header on 429/503 responses still takes precedence (handled by urllib3),
+    capped at `max_retry_after` seconds so one response can't park a worker for hours.
+    """
+
+    def __init__(self, *args, max_retry_after: float = DEFAULT_RETRY_AFTER_MAX_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw):
+        # urllib3 builds a new Retry for every attempt
+        kw.setdefault("max_retry_after", self.max_retry_after)
+        return super().new(**kw)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+    def get_backoff_time(self):
+        backoff = min(super().get_backoff_time(), BACKOFF_MAX_SECONDS)
+        if backoff <= 0:
+            return 0
+        return random.uniform(backoff / 2, backoff)
+
+def _build_session(retry_reads: bool = True) -> requests.Session:
+    """
+    Creates a session with a keep-alive connection pool and the shared retry policy.
+    With retry_reads=False read timeouts are not retried but raised as requests.exceptions.ReadTimeout
+    right away, for callers that answer a slow response by asking for less (e.g. a smaller window).
+    """
+
+    pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE))
+    max_retries = int(os.getenv('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+    backoff_factor = float(os.getenv('HTTP_BACKOFF_FACTOR', DEFAULT_BACKOFF_FACTOR))
+    max_retry_after = float(os.getenv('HTTP_RETRY_AFTER_MAX_SECONDS', DEFAULT_RETRY_AFTER_MAX_SECONDS))
+
+    retry = JitteredRetry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        # False (not 0) re-raises the read error itself instead of wrapping it in MaxRetryError
+        read=None if retry_reads else False,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        max_retry_after=max_retry_after,
+        # Hand the last response back instead of raising, callers run raise_for_status() themselves
+        raise_on_status=False,
+    )
+
+    # pool_block caps the open connections per host at pool_maxsize
+    adapter = HTTPAdapter(
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=True,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    logging.info(f"Created shared HTTP session (pool_maxsize={pool_maxsize}, max_retries={max_retries}, "
+                 f"retry_reads={retry_reads}).")
+    return session
+
+def get_session(retry_reads: bool = True) -> requests.Session:
+    """Returns the process-wide HTTP session shared by the API clients (one per read retry policy)."""
+    session = _sessions.get(retry_reads)
+
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(retry_reads)
+            if session is None:
+                session = _sessions[retry_reads] = _build_session(retry_reads)
+
+    return session
+
+def close_session():
+    """Closes the shared sessions and their pooled connections."""
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
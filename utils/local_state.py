@@ -0,0 +1,56 @@
+import os
+import fcntl
+import tempfile
+from contextlib import contextmanager
+
+# Files the ingestion keeps between runs (e.g. learnt window sizes), overridable through AVIATION_STATE_DIR
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), "aviation_state")
+
+# Values of an on/off environment switch that turn it off
+OFF_VALUES = ('off', 'false', '0', 'no')
+
+def env_flag(name: str, default: bool = True) -> bool:
+    """Reads an on/off environment switch, anything but off/false/0/no counts as on."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in OFF_VALUES
+
+def state_path(name: str) -> str:
+    """Path of a file kept between runs in AVIATION_STATE_DIR."""
+    return os.path.join(os.getenv('AVIATION_STATE_DIR', DEFAULT_STATE_DIR), name)
+
+@contextmanager
+def atomic_write(path: str, binary: bool = False, permissions: int = 0o644):
+    """
+    Opens a new file next to `path` and moves it over `path` once the block completes, so concurrent
+    readers only ever see a complete file. Every writer gets its own temporary file, so concurrent
+    writers never interfere (the last one to finish wins, see file_lock for read-modify-write).
+    The temporary file is removed when the block raises.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        os.fchmod(fd, permissions)
+        with os.fdopen(fd, 'wb' if binary else 'w', **({} if binary else {"encoding": "utf-8"})) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock on `path` across processes, held through `<path>.lock` for the duration of the block."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
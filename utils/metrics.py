@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from utils.local_state import atomic_write
+
+# Upper bounds (seconds) of the request latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_HELP = {
+    "ingestion_request_seconds": ("histogram", "Latency of API requests, including failed ones."),
+    "ingestion_requests_total": ("counter", "API responses by status code."),
+    "ingestion_request_errors_total": ("counter", "API requests that failed without a response (timeouts, connection errors)."),
+    "ingestion_response_bytes_total": ("counter", "Response body bytes received from the APIs."),
+    "ingestion_retries_total": ("counter", "Retried requests per airport: http (adapter retries), bisect (split windows), window (re-fetched intervals)."),
+    "ingestion_rows_parsed_total": ("counter", "Rows decoded from API payloads."),
+    "ingestion_parse_seconds_total": ("counter", "Time spent decoding API payloads into rows."),
+    "ingestion_rows_loaded_total": ("counter", "Rows loaded into the raw tables."),
+    "ingestion_load_seconds_total": ("counter", "Time spent loading rows into the raw tables."),
+}
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> list:
+        total, cumulative = 0, []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+class MetricsRegistry:
+    """Process-wide counters and histograms of an ingestion run, keyed by (name, labels)."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter_total(self, name: str, **labels) -> float:
+        """Sum of a counter over all label sets that contain `labels`."""
+        wanted = set(self._key(name, labels)[1])
+        with self._lock:
+            return sum(value for (key_name, key_labels), value in self._counters.items()
+                       if key_name == name and wanted <= set(key_labels))
+
+    def label_values(self, name: str, label: str) -> list:
+        with self._lock:
+            keys = list(self._counters) + list(self._histograms)
+        return sorted({value for key_name, key_labels in keys if key_name == name
+                       for key, value in key_labels if key == label})
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def to_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.buckets, h.cumulative_counts(), h.sum, h.count) for key, h in self._histograms.items()}
+
+        def render_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+        lines = []
+        for name in sorted({key[0] for key in counters} | {key[0] for key in histograms}):
+            metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f"{name}{render_labels(labels)} {value:g}")
+
+            for (key_name, labels), (buckets, cumulative, total, count) in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                for bound, bucket_count in zip(buckets, cumulative):
+                    lines.append(f"{name}_bucket{render_labels(labels, [('le', f'{bound:g}')])} {bucket_count}")
+                lines.append(f"{name}_bucket{render_labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{render_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{render_labels(labels)} {count}")
+
+        lines.append("# HELP ingestion_last_run_timestamp_seconds Unix time the metrics were exported.")
+        lines.append("# TYPE ingestion_last_run_timestamp_seconds gauge")
+        lines.append(f"ingestion_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """JSON-friendly run summary with derived throughput per source and table."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 6),
+                    "mean": round(h.sum / h.count, 6) if h.count else None,
+                    "buckets": {f"{bound:g}": count for bound, count in zip(h.buckets, h.cumulative_counts())},
+                }
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+
+        def rate(rows_metric, seconds_metric, label):
+            rates = {}
+            for value in self.label_values(rows_metric, label):
+                rows = self.counter_total(rows_metric, **{label: value})
+                seconds = self.counter_total(seconds_metric, **{label: value})
+                rates[value] = round(rows / seconds, 1) if seconds else None
+            return rates
+
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "rows_parsed_per_second": rate("ingestion_rows_parsed_total", "ingestion_parse_seconds_total", "source"),
+            "rows_loaded_per_second": rate("ingestion_rows_loaded_total", "ingestion_load_seconds_total", "table"),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+_metrics = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the process-wide metrics registry, shared by all worker threads."""
+    return _metrics
+
+def reset_metrics():
+    """Starts a new run, e.g. at the beginning of a DAG task."""
+    _metrics.reset()
+
+@contextmanager
+def track_request(source: str):
+    """
+    Times one API call and records its latency, status, body size and adapter retries.
+    Usage:
+
+        with track_request("opensky") as track:
+            response = session.get(...)
+            track(response, airport)
+    """
+    start = time.perf_counter()
+    outcome = {}
+
+    def track(response, airport: str = None):
+        outcome["response"] = response
+        outcome["airport"] = airport
+
+    try:
+        yield track
+    except Exception:
+        _metrics.inc("ingestion_request_errors_total", source=source)
+        raise
+    finally:
+        _metrics.observe("ingestion_request_seconds", time.perf_counter() - start, source=source)
+
+        response = outcome.get("response")
+        if response is not None:
+            _metrics.inc("ingestion_requests_total", source=source, status=response.status_code)
+            _metrics.inc("ingestion_response_bytes_total", len(response.content or b""), source=source)
+
+            # Retries done transparently by the HTTP adapter (429/5xx backoff)
+            retries = getattr(getattr(response, "raw", None), "retries", None)
+            history = getattr(retries, "history", None) or ()
+            if history:
+                record_retry(source, outcome.get("airport"), "http", len(history))
+
+def record_retry(source: str, airport: str = None, reason: str = "http", count: int = 1):
+    _metrics.inc("ingestion_retries_total", count, source=source, airport=airport or "ALL", reason=reason)
+
+def record_parse(source: str, rows: int, seconds: float):
+    _metrics.inc("ingestion_rows_parsed_total", rows, source=source)
+    _metrics.inc("ingestion_parse_seconds_total", seconds, source=source)
+
+def record_load(table: str, rows: int, seconds: float):
+    _metrics.inc("ingestion_rows_loaded_total", rows, table=table)
+    _metrics.inc("ingestion_load_seconds_total", seconds, table=table)
+
+def _write_atomic(path: str, content: str):
+    with atomic_write(path) as f:
+        f.write(content)
+
+def export_run_metrics(job: str, run_id: str) -> dict:
+    """
+    Writes the metrics of this run and returns the summary:
+
+    - JSON run summary to METRICS_SUMMARY_DIR (default: <tmp>/aviation_metrics)/<run_id>/<job>.json
+    - Prometheus textfile to METRICS_TEXTFILE_DIR/aviation_<job>.prom, for node_exporter's
+      textfile collector (only when METRICS_TEXTFILE_DIR is set)
+    """
+    summary = {"job": job, "run_id": run_id, **_metrics.summary()}
+
+    safe_run_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in run_id)
+    summary_dir = os.getenv('METRICS_SUMMARY_DIR', os.path.join(tempfile.gettempdir(), "aviation_metrics"))
+    summary_path = os.path.join(summary_dir, safe_run_id, f"{job}.json")
+    _write_atomic(summary_path, json.dumps(summary, indent=2, default=str))
+
+    textfile_dir = os.getenv('METRICS_TEXTFILE_DIR')
+    if textfile_dir:
+        _write_atomic(os.path.join(textfile_dir, f"aviation_{job}.prom"), _metrics.to_prometheus())
+
+    logging.info(f"Run metrics for {job}: parsed rows/s {summary['rows_parsed_per_second']}, "
+                 f"loaded rows/s {summary['rows_loaded_per_second']}. Summary written to {summary_path}.")
+    return summary
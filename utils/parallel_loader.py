@@ -0,0 +1,183 @@
+import os
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.bulk_loader import load_rows
+from utils.transaction_cursor import transaction
+from utils.upsert import publish_rows
+
+DEFAULT_INITIAL_BATCH_ROWS = 10000
+DEFAULT_MIN_BATCH_ROWS = 1000
+DEFAULT_MAX_BATCH_ROWS = 200000
+
+class AdaptiveBatchSizer:
+    """
+    Tunes the batch size from observed load throughput.
+    The batch doubles while rows/sec keeps improving and halves when it clearly drops.
+    """
+
+    def __init__(self, initial_rows: int = None, min_rows: int = None, max_rows: int = None):
+        self.min_rows = min_rows or int(os.getenv('LOAD_MIN_BATCH_ROWS', DEFAULT_MIN_BATCH_ROWS))
+        self.max_rows = max_rows or int(os.getenv('LOAD_MAX_BATCH_ROWS', DEFAULT_MAX_BATCH_ROWS))
+        initial_rows = initial_rows or int(os.getenv('LOAD_BATCH_ROWS', DEFAULT_INITIAL_BATCH_ROWS))
+        self.size = max(self.min_rows, min(initial_rows, self.max_rows))
+        self.best_throughput = 0.0
+
+    def record(self, rows: int, seconds: float):
+        """Feeds back the duration of one batch (its own staging and COPY) and adjusts the next batch size."""
+        throughput = rows / max(seconds, 1e-6)
+
+        if throughput > self.best_throughput * 1.1:
+            self.size = min(self.size * 2, self.max_rows)
+        elif throughput < self.best_throughput * 0.7:
+            self.size = max(self.size // 2, self.min_rows)
+
+        self.best_throughput = max(self.best_throughput, throughput)
+
+def _copy_seconds(pending, submitted_at: float) -> float:
+    """Waits for a batch's COPY INTO and returns how long it ran after it was submitted."""
+    pending.result()
+    return time.perf_counter() - submitted_at
+
+def load_in_batches(cursor, table_name: str, column_names: list[str], data, sizer: AdaptiveBatchSizer = None,
+                    column_types: list[str] = None):
+    """
+    Loads rows in consecutive batches so that only one batch is bound at a time.
+    A batch's COPY INTO keeps running in Snowflake while the next batch is written and staged,
+    and is waited for before the batch after that starts.
+
+    The sizer is fed every batch's own write/PUT time plus its own COPY time. The COPY is timed by
+    a waiter thread from its submission to its completion, so the time the loop spends staging the
+    next batch, or waiting for the previous COPY, isn't counted against it.
+    """
+    sizer = sizer or AdaptiveBatchSizer()
+    position = 0
+    loaded = 0
+    # (rows, write/PUT seconds, future of the COPY seconds) of the batch whose COPY is in flight
+    in_flight = None
+
+    def finish(rows: int, stage_seconds: float, copy_seconds: float):
+        nonlocal loaded
+        loaded += rows
+        elapsed = stage_seconds + copy_seconds
+        logging.info(f"Loaded batch of {rows} rows into {table_name} "
+                     f"({loaded}/{len(data)}, {rows / max(elapsed, 1e-6):,.0f} rows/s).")
+        sizer.record(rows, elapsed)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="copy_wait") as waiter:
+        try:
+            while position < len(data):
+                batch = data[position:position + sizer.size]
+
+                start = time.perf_counter()
+                pending = load_rows(cursor, table_name, column_names, batch, wait=False, column_types=column_types)
+                stage_seconds = time.perf_counter() - start
+                position += len(batch)
+
+                if in_flight is not None:
+                    rows, previous_stage_seconds, copy_wait = in_flight
+                    in_flight = None
+                    finish(rows, previous_stage_seconds, copy_wait.result())
+
+                if pending is None:
+                    # Loaded synchronously (INSERT)
+                    finish(len(batch), stage_seconds, 0.0)
+                else:
+                    in_flight = (len(batch), stage_seconds, waiter.submit(_copy_seconds, pending, time.perf_counter()))
+
+            if in_flight is not None:
+                rows, stage_seconds, copy_wait = in_flight
+                in_flight = None
+                finish(rows, stage_seconds, copy_wait.result())
+
+        finally:
+            # Never leave a COPY running into a table the caller is about to drop or roll back
+            if in_flight is not None:
+                try:
+                    in_flight[2].result()
+                except Exception as e:
+                    logging.warning(f"In-flight COPY into {table_name} failed during cleanup: {e}")
+
+def _stage_rows(cursor, staging_table: str, table_name: str, column_names: list[str], data,
+                column_types: list[str] = None, table_kind: str = "TRANSIENT"):
+    """Creates a staging table shaped like `table_name` and loads the rows into it in batches."""
+    cursor.execute(f"CREATE {table_kind} TABLE {staging_table} LIKE {table_name}")
+    load_in_batches(cursor, staging_table, column_names, data, column_types=column_types)
+
+def load_table(cursor, table_name: str, column_names: list[str], data, key_columns: list[str] = None,
+               column_types: list[str] = None):
+    """
+    Loads rows into one raw table on the given cursor.
+    The batches land in a temporary table first and are moved into the raw table with a single
+    INSERT ... SELECT (a MERGE on `key_columns` in merge mode), so a failed load leaves it untouched.
+    """
+    temp_table = f"{table_name}_load_{uuid.uuid4().hex[:8]}"
+    try:
+        _stage_rows(cursor, temp_table, table_name, column_names, data, column_types, table_kind="TEMPORARY")
+        publish_rows(cursor, temp_table, table_name, column_names, key_columns)
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {temp_table}")
+
+def _load_into_staging(connection_factory, staging_table: str, table_name: str, column_names: list[str], data,
+                       column_types: list[str] = None):
+    """Loads one table's rows into its own staging table over a dedicated connection."""
+    connection = connection_factory()
+    try:
+        with transaction(connection) as cursor:
+            _stage_rows(cursor, staging_table, table_name, column_names, data, column_types)
+    finally:
+        connection.close()
+
+def load_tables(connection, loads: list, connection_factory=None):
+    """
+    Loads several raw tables with all-or-nothing semantics for the whole run.
+
+    Every table is loaded into its own staging table first and the staged rows are then published
+    into the target tables in one explicit transaction on `connection`. The connection autocommits
+    each statement, and the batches' PUT/COPY statements can't share a transaction anyway, so a
+    failure before the publish leaves the raw tables untouched.
+
+    Args:
+        connection: Main Snowflake connection, used for the final publish step.
+        loads: List of (table_name, column_names, rows, key_columns, column_types) tuples. Tables must
+            already exist. key_columns is the natural key used in merge mode (RAW_WRITE_MODE=merge),
+            column_types the declared column types (see src/raw_schemas.py), both may be None.
+        connection_factory: Optional callable returning a new connection. When given, the staging
+            tables are loaded concurrently, each on its own connection. Without it they are loaded
+            one after another on `connection`.
+    """
+    loads = [load for load in loads if load[2]]
+    if not loads:
+        return
+
+    run_id = uuid.uuid4().hex[:8]
+    staging_tables = {table_name: f"{table_name}_load_{run_id}" for table_name, *_ in loads}
+
+    try:
+        if connection_factory is None or len(loads) < 2:
+            with transaction(connection) as cursor:
+                for table_name, column_names, data, _, column_types in loads:
+                    _stage_rows(cursor, staging_tables[table_name], table_name, column_names, data, column_types)
+        else:
+            logging.info(f"Loading {len(loads)} tables concurrently into staging tables.....")
+            with ThreadPoolExecutor(max_workers=len(loads), thread_name_prefix="loader") as executor:
+                futures = [
+                    executor.submit(_load_into_staging, connection_factory, staging_tables[table_name],
+                                    table_name, column_names, data, column_types)
+                    for table_name, column_names, data, _, column_types in loads
+                ]
+                for future in futures:
+                    future.result()
+
+        # Publish every table in one transaction, so either all of them get the run's rows or none
+        with transaction(connection) as cursor:
+            cursor.execute("BEGIN")
+            for table_name, column_names, _, key_columns, _ in loads:
+                publish_rows(cursor, staging_tables[table_name], table_name, column_names, key_columns)
+
+    finally:
+        with transaction(connection) as cursor:
+            for staging_table in staging_tables.values():
+                cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
@@ -0,0 +1,171 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+DEFAULT_RATE_PER_SECOND = 5.0
+DEFAULT_BURST = 5
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 16
+
+# Latency above this is treated like a congestion signal by the concurrency controller
+DEFAULT_LATENCY_TARGET_SECONDS = 10.0
+
+# Below this many remaining credits the request rate is scaled down proportionally
+DEFAULT_LOW_CREDITS = 100
+
+THROTTLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Quota headers sent by OpenSky and api.market (AeroDataBox)
+REMAINING_CREDIT_HEADERS = (
+    "X-Rate-Limit-Remaining",
+    "X-RateLimit-Requests-Remaining",
+    "X-RateLimit-Remaining",
+)
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `capacity` saved up for bursts."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class AIMDConcurrency:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    Healthy responses raise the limit by one per full window of successes,
+    throttling, server errors and slow responses halve it.
+    """
+
+    def __init__(self, initial: int, maximum: int, latency_target: float):
+        self.limit = max(1, min(initial, maximum))
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, healthy: bool):
+        with self._condition:
+            self._in_flight -= 1
+
+            if healthy:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            else:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+
+            self._condition.notify_all()
+
+class SourceLimiter:
+    """Token bucket plus adaptive concurrency for one API source, paced by its quota headers."""
+
+    def __init__(self, source: str):
+        prefix = source.upper()
+        self.source = source
+        self.base_rate = float(os.getenv(f'{prefix}_RATE_PER_SECOND', DEFAULT_RATE_PER_SECOND))
+        self.low_credits = int(os.getenv(f'{prefix}_LOW_CREDITS', DEFAULT_LOW_CREDITS))
+        self.remaining_credits = None
+
+        self.bucket = TokenBucket(self.base_rate, float(os.getenv(f'{prefix}_BURST', DEFAULT_BURST)))
+        self.concurrency = AIMDConcurrency(
+            int(os.getenv(f'{prefix}_INITIAL_CONCURRENCY', DEFAULT_INITIAL_CONCURRENCY)),
+            int(os.getenv(f'{prefix}_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+            float(os.getenv(f'{prefix}_LATENCY_TARGET_SECONDS', DEFAULT_LATENCY_TARGET_SECONDS)),
+        )
+
+    def _update_credits(self, response):
+        for header in REMAINING_CREDIT_HEADERS:
+            value = response.headers.get(header)
+            if value is not None:
+                try:
+                    self.remaining_credits = int(float(value))
+                except ValueError:
+                    return
+                break
+        else:
+            return
+
+        # Spread the remaining credits out instead of running into the hard stop
+        scale = min(1.0, max(self.remaining_credits, 1) / self.low_credits)
+        self.bucket.set_rate(max(self.base_rate * scale, 0.05))
+
+    def _is_healthy(self, response, latency: float) -> bool:
+        if response.status_code in THROTTLE_STATUS_CODES or latency > self.concurrency.latency_target:
+            return False
+
+        # Retries done transparently by the HTTP adapter still count as throttling
+        retries = getattr(getattr(response, "raw", None), "retries", None)
+        history = getattr(retries, "history", None) or ()
+        return not any(entry.status in THROTTLE_STATUS_CODES for entry in history)
+
+    @contextmanager
+    def request(self):
+        """
+        Wraps one API call. Usage:
+
+            with limiter.request() as observe:
+                response = session.get(...)
+                observe(response)
+        """
+        self.concurrency.acquire()
+        self.bucket.acquire()
+        start = time.perf_counter()
+        outcome = {"healthy": False}
+
+        def observe(response):
+            latency = time.perf_counter() - start
+            self._update_credits(response)
+            outcome["healthy"] = self._is_healthy(response, latency)
+            if not outcome["healthy"]:
+                logging.warning(f"{self.source} throttling or slow response ({response.status_code}, {latency:.1f}s), "
+                                f"reducing concurrency.")
+
+        try:
+            yield observe
+        finally:
+            self.concurrency.release(outcome["healthy"])
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(source: str) -> SourceLimiter:
+    """Returns the process-wide limiter of an API source, shared by all worker threads."""
+    with _limiters_lock:
+        if source not in _limiters:
+            _limiters[source] = SourceLimiter(source)
+        return _limiters[source]
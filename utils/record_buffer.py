@@ -0,0 +1,164 @@
+from array import array
+
+# Columns whose dictionary holds more than this share of the rows are stored as plain lists
+MAX_DICTIONARY_RATIO = 0.5
+
+# Dictionary ratio is checked once a column has this many rows (and again every such block)
+DICTIONARY_CHECK_ROWS = 4096
+
+# Rows are rebuilt in chunks of this size while iterating
+ITER_CHUNK_ROWS = 10000
+
+class _DictionaryColumn:
+    """
+    Stores every distinct value once and one small integer code per row.
+    Codes start as 2-byte array items and widen to 4 bytes past 65536 distinct values.
+    """
+    __slots__ = ("codes", "values", "index")
+
+    def __init__(self):
+        self.codes = array('H')
+        self.values = []
+        self.index = {}
+
+    def append(self, value):
+        # True == 1 == 1.0 as dict keys, so only strings and None are used as keys directly
+        key = value if value is None or value.__class__ is str else (value.__class__, value)
+        try:
+            code = self.index.get(key)
+        except TypeError:
+            # Unhashable values (lists, dicts) are stored as they are, without sharing
+            code = None
+            key = None
+
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            if key is not None:
+                self.index[key] = code
+            if code == 65536:
+                self.codes = array('I', self.codes)
+
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def is_high_cardinality(self) -> bool:
+        return len(self.values) > MAX_DICTIONARY_RATIO * len(self.codes)
+
+    def slice(self, start: int, stop: int) -> list:
+        values = self.values
+        return [values[code] for code in self.codes[start:stop]]
+
+    def reorder(self, order: list):
+        codes = self.codes
+        self.codes = array(codes.typecode, [codes[i] for i in order])
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + 8 * len(self.values)
+
+class _PlainColumn:
+    """Values kept in a list, for columns where almost every value is distinct."""
+    __slots__ = ("values",)
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def slice(self, start: int, stop: int) -> list:
+        return self.values[start:stop]
+
+    def reorder(self, order: list):
+        values = self.values
+        self.values = [values[i] for i in order]
+
+    def nbytes(self) -> int:
+        return 8 * len(self.values)
+
+class ColumnarBuffer:
+    """
+    Compact, append-only row buffer used between parsing and loading.
+
+    Rows are stored column by column, with repeated values (airline and airport names,
+    time zones, statuses, ...) dictionary-encoded into array-backed codes, so each distinct
+    value is kept once instead of once per row. High-cardinality columns fall back to plain
+    lists. Reading behaves like a list of row tuples: len(), iteration and slicing
+    (`buffer[i:j]` returns a list of tuples) rebuild only the rows that are asked for.
+    """
+
+    def __init__(self, column_names: list[str]):
+        self.column_names = list(column_names)
+        self.columns = [_DictionaryColumn() for _ in self.column_names]
+        self._length = 0
+
+    def append(self, row):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        self._length += 1
+
+        if self._length % DICTIONARY_CHECK_ROWS == 0:
+            self._demote_high_cardinality_columns()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _demote_high_cardinality_columns(self):
+        for i, column in enumerate(self.columns):
+            if isinstance(column, _DictionaryColumn) and column.is_high_cardinality():
+                self.columns[i] = _PlainColumn(column.slice(0, len(column)))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            rows = list(zip(*(column.slice(start, stop) for column in self.columns)))
+            return rows[::step] if step != 1 else rows
+
+        index = item + self._length if item < 0 else item
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnarBuffer index out of range")
+        return tuple(column.slice(index, index + 1)[0] for column in self.columns)
+
+    def __iter__(self):
+        for start in range(0, self._length, ITER_CHUNK_ROWS):
+            yield from self[start:start + ITER_CHUNK_ROWS]
+
+    def sort(self, key_indices: list):
+        """Reorders the rows in place by the given columns (NULLs last), rows with equal keys keep their order."""
+        if not key_indices or self._length < 2:
+            return
+        keys = list(zip(*(_null_last_keys(self.columns[i].slice(0, self._length)) for i in key_indices)))
+        order = sorted(range(self._length), key=keys.__getitem__)
+        for column in self.columns:
+            column.reorder(order)
+
+    def nbytes(self) -> int:
+        """Approximate size of the codes and value references, excluding the distinct values themselves."""
+        return sum(column.nbytes() for column in self.columns)
+
+def _null_last_keys(values: list) -> list:
+    # Tuples never compare a None against a value, and sort NULLs last like Snowflake does
+    return [(value is None, value) for value in values]
+
+def sort_rows(data, key_indices: list):
+    """
+    Sorts rows in place by the values at `key_indices` (e.g. TableSchema.cluster_indices), so loaded
+    batches arrive in clustering key order and Snowflake can prune their micro-partitions.
+    Accepts a ColumnarBuffer or a list of row tuples and returns it.
+    """
+    if not key_indices:
+        return data
+    if isinstance(data, ColumnarBuffer):
+        data.sort(key_indices)
+    else:
+        data.sort(key=lambda row: tuple((row[i] is None, row[i]) for i in key_indices))
+    return data
@@ -0,0 +1,161 @@
+import os
+import json
+import gzip
+import zlib
+import time
+import hashlib
+import logging
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.local_state import atomic_write
+
+# The cache is opt-in: it is only used when API_CACHE_DIR is set
+DEFAULT_TTL_SECONDS = 12 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+CACHEABLE_STATUS_CODES = (200, 204)
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_lock = threading.Lock()
+
+def _cache_dir():
+    return os.getenv('API_CACHE_DIR')
+
+def is_enabled() -> bool:
+    """Returns True when an on-disk response cache directory is configured."""
+    return bool(_cache_dir())
+
+def _entry_path(key: tuple) -> str:
+    """Maps a (source, endpoint, airport, time_from, time_to) key to its cache file."""
+    digest = hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+    return os.path.join(_cache_dir(), f"{digest}.json.gz")
+
+def _count(stat: str):
+    with _lock:
+        _stats[stat] += 1
+
+def _discard_entry(path: str, reason):
+    """Deletes a corrupt cache entry, so the next lookup fetches and stores it again."""
+    logging.warning(f"Discarding unreadable cache entry {path}: {reason}")
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def get_cached_response(source: str, endpoint: str, airport, time_from, time_to):
+    """
+    Looks up a cached API response.
+    Returns a requests.Response rebuilt from disk, or None on a miss or an expired entry.
+    """
+    if not is_enabled():
+        return None
+
+    path = _entry_path((source, endpoint, airport, time_from, time_to))
+    ttl = int(os.getenv('API_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+
+    try:
+        with open(path, 'rb') as f:
+            payload = gzip.decompress(f.read())
+        header_line, body = payload.split(b"\n", 1)
+        header = json.loads(header_line)
+        created_at = float(header["created_at"])
+        response = requests.models.Response()
+        response.status_code = int(header["status_code"])
+        response.headers = CaseInsensitiveDict(header["headers"])
+        response.url = header["url"]
+        response.encoding = header["encoding"]
+    except FileNotFoundError:
+        _count("misses")
+        return None
+    # Truncated or corrupt files: partial gzip streams, a missing header line, bad JSON or missing fields
+    except (OSError, EOFError, zlib.error, ValueError, TypeError, KeyError) as e:
+        _discard_entry(path, e)
+        _count("misses")
+        return None
+
+    if time.time() - created_at > ttl:
+        logging.debug(f"Cache entry for {source} {airport} ({time_from} - {time_to}) expired.")
+        _count("misses")
+        return None
+
+    # Touching the file marks it as recently used for LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    _count("hits")
+
+    response._content = body
+    return response
+
+def store_response(source: str, endpoint: str, airport, time_from, time_to, response):
+    """Stores a successful API response as a compressed cache entry."""
+    if not is_enabled() or response.status_code not in CACHEABLE_STATUS_CODES:
+        return
+
+    os.makedirs(_cache_dir(), exist_ok=True)
+    path = _entry_path((source, endpoint, airport, time_from, time_to))
+
+    # The body is stored decompressed by requests, so drop the transfer headers
+    headers = {
+        k: v for k, v in response.headers.items()
+        if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+    }
+    header = {
+        "created_at": time.time(),
+        "status_code": response.status_code,
+        "headers": headers,
+        "url": response.url,
+        "encoding": response.encoding,
+    }
+    payload = json.dumps(header).encode() + b"\n" + response.content
+
+    # Concurrent readers never see a partial entry
+    with atomic_write(path, binary=True) as f:
+        f.write(gzip.compress(payload, compresslevel=6))
+
+    _count("stores")
+    _evict_to_size_limit()
+
+def _evict_to_size_limit():
+    """Deletes least recently used entries until the cache fits in API_CACHE_MAX_BYTES."""
+    max_bytes = int(os.getenv('API_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+
+    with _lock:
+        entries = []
+        for entry in os.scandir(_cache_dir()):
+            if entry.is_file() and entry.name.endswith(".json.gz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            _stats["evictions"] += 1
+
+def cache_stats() -> dict:
+    """Returns a copy of the hit/miss/store/eviction counters of this process."""
+    with _lock:
+        return dict(_stats)
+
+def log_cache_stats(source: str):
+    """Logs how many API calls the cache saved so far."""
+    if not is_enabled():
+        return
+
+    stats = cache_stats()
+    logging.info(
+        f"Response cache after {source} fetch: {stats['hits']} hits (API calls saved), "
+        f"{stats['misses']} misses, {stats['stores']} stored, {stats['evictions']} evicted."
+    )
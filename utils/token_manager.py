@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from utils.local_state import atomic_write, file_lock
+
+# Tokens are refreshed this many seconds before they expire
+DEFAULT_REFRESH_MARGIN_SECONDS = 120
+
+class TokenManager:
+    """
+    Caches an OAuth access token until shortly before `expires_in`, refreshes it in the
+    background before it expires and shares it with other task processes through a
+    locked cache file, so concurrent workers and retries don't each hit the auth server.
+    """
+
+    def __init__(self, fetch_token, cache_path: str, cache_key: str, refresh_margin: int = None):
+        """
+        Args:
+            fetch_token: Callable returning the token response dict (`access_token`, `expires_in`).
+            cache_path: Cache file shared between processes.
+            cache_key: Identifies the credentials the token belongs to inside the cache file.
+            refresh_margin: Seconds before expiry at which the token is considered stale.
+        """
+        self.fetch_token = fetch_token
+        self.cache_path = cache_path
+        self.cache_key = cache_key
+        self.refresh_margin = refresh_margin or int(
+            os.getenv('TOKEN_REFRESH_MARGIN_SECONDS', DEFAULT_REFRESH_MARGIN_SECONDS)
+        )
+
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_cache(self, cache: dict):
+        # The file holds bearer tokens, keep it private to the user
+        with atomic_write(self.cache_path, permissions=0o600) as f:
+            json.dump(cache, f)
+
+    def _is_fresh(self, expires_at: float) -> bool:
+        return expires_at - self.refresh_margin > time.time()
+
+    def _refresh_locked(self, force: bool = False):
+        """Loads a fresh token from the shared cache, or requests a new one. Caller holds self._lock."""
+        with file_lock(self.cache_path):
+            cache = self._read_cache()
+            entry = cache.get(self.cache_key)
+
+            # A forced refresh still reuses a token another worker renewed after ours was rejected
+            reusable = entry and self._is_fresh(entry["expires_at"]) and not (
+                force and entry["access_token"] == self._token
+            )
+
+            if reusable:
+                logging.info("Using cached access token shared by another worker.")
+            else:
+                token_data = self.fetch_token()
+                entry = {
+                    "access_token": token_data["access_token"],
+                    "expires_at": time.time() + int(token_data.get("expires_in", 1800)),
+                }
+                cache[self.cache_key] = entry
+                self._write_cache(cache)
+
+        self._token = entry["access_token"]
+        self._expires_at = entry["expires_at"]
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        """Starts a background timer that renews the token just before it goes stale."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+        delay = max(self._expires_at - self.refresh_margin - time.time(), 1)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._refresh_locked(force=False)
+            logging.info("Access token refreshed in the background.")
+        except Exception as e:
+            # The next get_token call refreshes synchronously instead
+            logging.warning(f"Background token refresh failed: {e}")
+
+    def get_token(self, force_refresh: bool = False) -> str:
+        """
+        Returns a valid access token, requesting a new one only when needed.
+        Pass force_refresh=True after the current token was rejected (HTTP 401).
+        """
+        with self._lock:
+            if force_refresh or not self._token or not self._is_fresh(self._expires_at):
+                self._refresh_locked(force=force_refresh)
+            return self._token
@@ -4,7 +4,10 @@ from contextlib import contextmanager
 # This ensures atomicity: all inserts commit, or all rollback on error.
 @contextmanager
 def transaction(conn):
-    """Context manager for database transactions."""
+    """
+    Context manager for database transactions.
+    Snowflake connections autocommit every statement unless the block starts with an explicit BEGIN.
+    """
     try:
         cursor = conn.cursor()
         yield cursor
@@ -0,0 +1,80 @@
+import os
+import logging
+
+# Write modes for the raw tables, switchable through RAW_WRITE_MODE
+WRITE_MODE_APPEND = "append"  # plain INSERT, duplicates are removed downstream by dbt
+WRITE_MODE_MERGE = "merge"    # MERGE on the natural key, reruns update rows in place
+
+# Filled by the column default when a batch is loaded, so later batches (and later loads) have later values
+LOAD_TIMESTAMP_COLUMN = "ingestion_timestamp"
+
+# Hash of a row's loaded values (see src/raw_schemas.py), reloads of unchanged rows skip their update
+CONTENT_HASH_COLUMN = "content_hash"
+
+def resolve_write_mode(mode: str = None) -> str:
+    """Returns the configured raw table write mode."""
+    mode = (mode or os.getenv('RAW_WRITE_MODE', WRITE_MODE_APPEND)).lower()
+
+    if mode not in (WRITE_MODE_APPEND, WRITE_MODE_MERGE):
+        raise ValueError(f"Unknown RAW_WRITE_MODE '{mode}'.")
+
+    return mode
+
+def build_merge_sql(source_table: str, table_name: str, column_names: list[str], key_columns: list[str]) -> str:
+    """
+    Builds a MERGE that upserts `source_table` into `table_name` on the natural key.
+    Duplicate keys inside the source are collapsed first, because Snowflake rejects
+    a MERGE where several source rows match the same target row. The most recently loaded
+    row of a key wins: each batch gets its ingestion timestamp when it is loaded. Rows of one batch
+    share the timestamp, yet may come from different fetches (e.g. overlapping AeroDataBox windows),
+    so ties are broken on the content hash, or on the other columns when there is none, which picks
+    the same row on every run. When the rows carry a content hash, matched rows whose hash didn't
+    change are left as they are.
+    """
+    column_str = ', '.join(column_names)
+    key_str = ', '.join(key_columns)
+
+    # EQUAL_NULL so that rows with NULLs in a key column still match their previous version
+    on_clause = ' AND '.join(f"EQUAL_NULL(t.{key}, s.{key})" for key in key_columns)
+    update_clause = ', '.join(
+        [f"t.{col} = s.{col}" for col in column_names if col not in key_columns]
+        + [f"t.{LOAD_TIMESTAMP_COLUMN} = CURRENT_TIMESTAMP()"]
+    )
+    insert_values = ', '.join(f"s.{col}" for col in column_names)
+
+    tie_breakers = (
+        [CONTENT_HASH_COLUMN] if CONTENT_HASH_COLUMN in column_names
+        else [col for col in column_names if col not in key_columns and col != LOAD_TIMESTAMP_COLUMN]
+    )
+    order_str = ', '.join([f"{LOAD_TIMESTAMP_COLUMN} DESC"] + [f"{col} DESC NULLS LAST" for col in tie_breakers])
+
+    matched_clause = "WHEN MATCHED"
+    if CONTENT_HASH_COLUMN in column_names:
+        matched_clause += f" AND NOT EQUAL_NULL(t.{CONTENT_HASH_COLUMN}, s.{CONTENT_HASH_COLUMN})"
+
+    return f"""
+        MERGE INTO {table_name} t
+        USING (
+            SELECT {column_str}
+            FROM {source_table}
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY {key_str} ORDER BY {order_str}) = 1
+        ) s
+        ON {on_clause}
+        {matched_clause} THEN UPDATE SET {update_clause}
+        WHEN NOT MATCHED THEN INSERT ({column_str}) VALUES ({insert_values})
+    """
+
+def publish_rows(cursor, source_table: str, table_name: str, column_names: list[str],
+                 key_columns: list[str] = None, mode: str = None):
+    """Moves rows from a staging table into the target table, appending or merging."""
+    column_str = ', '.join(column_names)
+
+    if resolve_write_mode(mode) == WRITE_MODE_MERGE and key_columns:
+        cursor.execute(build_merge_sql(source_table, table_name, column_names, key_columns))
+        logging.info(f"Merged staged rows into {table_name} on ({', '.join(key_columns)}).")
+    else:
+        cursor.execute(f"""
+            INSERT INTO {table_name} ({column_str})
+            SELECT {column_str} FROM {source_table}
+        """)
+        logging.info(f"Published staged rows into {table_name}.")
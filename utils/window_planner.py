@@ -0,0 +1,146 @@
+import os
+import json
+import datetime
+import logging
+import threading
+
+from utils.local_state import atomic_write, file_lock, state_path
+
+API_TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+# AeroDataBox accepts at most 12 hours per airport FIDS request
+MAX_WINDOW_MINUTES = 12 * 60
+DEFAULT_MIN_WINDOW_MINUTES = 60
+
+# A window is "heavy" when it is slow or returns many records; the airport's next windows are smaller
+DEFAULT_SLOW_SECONDS = 20
+DEFAULT_LARGE_RECORDS = 1500
+
+# A response holding this many departures or arrivals is taken as cut short by the API and bisected
+DEFAULT_MAX_RECORDS_PER_WINDOW = 1000
+
+# Learnt window sizes, in the state directory unless AERODATABOX_WINDOW_HINTS_PATH says otherwise
+DEFAULT_HINTS_FILE = "aerodatabox_window_hints.json"
+
+class WindowPlanner:
+    """
+    Plans the time windows used per airport and learns from each response.
+
+    Every airport starts with the widest window the API allows. Windows that time out or come
+    back at the record cap are bisected on the spot, and airports whose windows are slow or very
+    large get a smaller preferred window, while quiet airports drift back to the maximum. windows()
+    sizes every window when it starts, so the rest of the airport's day already uses what the
+    earlier windows taught. Preferred sizes are kept between runs in AERODATABOX_WINDOW_HINTS_PATH
+    (default: aerodatabox_window_hints.json in the state directory, empty disables it); planners of
+    runs in parallel (e.g. backfill days) share the file and only write the airports they adjusted.
+    """
+
+    def __init__(self, hints_path: str = None):
+        self.min_minutes = int(os.getenv('AERODATABOX_MIN_WINDOW_MINUTES', DEFAULT_MIN_WINDOW_MINUTES))
+        self.slow_seconds = float(os.getenv('AERODATABOX_SLOW_WINDOW_SECONDS', DEFAULT_SLOW_SECONDS))
+        self.large_records = int(os.getenv('AERODATABOX_LARGE_WINDOW_RECORDS', DEFAULT_LARGE_RECORDS))
+        # Departures or arrivals at which the API cuts a response short, 0 disables truncation detection
+        self.truncation_records = int(os.getenv('AERODATABOX_MAX_RECORDS_PER_WINDOW', DEFAULT_MAX_RECORDS_PER_WINDOW))
+
+        if hints_path is None:
+            hints_path = os.getenv('AERODATABOX_WINDOW_HINTS_PATH', state_path(DEFAULT_HINTS_FILE))
+        self.hints_path = hints_path
+        self._lock = threading.Lock()
+        self._hints = self._load_hints()
+        # Airports shrunk during this run are not widened again before the next run
+        self._shrunk = set()
+        # Airports whose preferred size changed during this run, the only ones save_hints writes
+        self._changed = set()
+
+    def _load_hints(self) -> dict:
+        """Reads the hints file, an empty dict when there is none or it is unreadable."""
+        if not self.hints_path or not os.path.exists(self.hints_path):
+            return {}
+        try:
+            with open(self.hints_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable window hints file {self.hints_path}: {e}")
+            return {}
+
+    def save_hints(self):
+        """
+        Persists the window sizes adjusted in this run for the next one. The file is re-read and
+        merged under a file lock, so concurrent runs keep each other's updates. Failing to save
+        only costs the next run its hints, so it is logged rather than raised.
+        """
+        if not self.hints_path:
+            return
+        try:
+            with self._lock, file_lock(self.hints_path):
+                hints = self._load_hints()
+                for airport_icao in self._changed:
+                    if airport_icao in self._hints:
+                        hints[airport_icao] = self._hints[airport_icao]
+                    else:
+                        hints.pop(airport_icao, None)
+                with atomic_write(self.hints_path) as f:
+                    json.dump(hints, f, indent=2, sort_keys=True)
+        except OSError as e:
+            logging.warning(f"Could not save window hints to {self.hints_path}: {e}")
+
+    def window_minutes(self, airport_icao: str) -> int:
+        with self._lock:
+            return self._hints.get(airport_icao, MAX_WINDOW_MINUTES)
+
+    def windows(self, airport_icao: str, start_str: str, end_str: str):
+        """
+        Yields consecutive windows covering [start_str, end_str]. Each window gets the airport's
+        preferred size when it is requested, so observe() calls for the earlier windows resize the rest.
+        """
+        start = datetime.datetime.strptime(start_str, API_TIME_FORMAT)
+        end = datetime.datetime.strptime(end_str, API_TIME_FORMAT)
+
+        while start < end:
+            window_end = min(start + datetime.timedelta(minutes=self.window_minutes(airport_icao)), end)
+            yield start.strftime(API_TIME_FORMAT), window_end.strftime(API_TIME_FORMAT)
+            start = window_end
+
+    def bisect(self, time_from: str, time_to: str):
+        """Splits a window in two halves, or returns None when it is already at the minimum size."""
+        start = datetime.datetime.strptime(time_from, API_TIME_FORMAT)
+        end = datetime.datetime.strptime(time_to, API_TIME_FORMAT)
+
+        if end - start < datetime.timedelta(minutes=2 * self.min_minutes):
+            return None
+
+        middle = start + datetime.timedelta(minutes=(end - start) // datetime.timedelta(minutes=1) // 2)
+        middle_str = middle.strftime(API_TIME_FORMAT)
+        return [(time_from, middle_str), (middle_str, time_to)]
+
+    def is_truncated(self, departures: int, arrivals: int) -> bool:
+        """True when either list of a response reached the record cap, so the window may hold more."""
+        return bool(self.truncation_records) and max(departures, arrivals) >= self.truncation_records
+
+    def observe(self, airport_icao: str, record_count: int, elapsed: float):
+        """Adapts the airport's preferred window size from one completed window."""
+        with self._lock:
+            current = self._hints.get(airport_icao, MAX_WINDOW_MINUTES)
+
+            heavy = elapsed > self.slow_seconds or record_count >= self.large_records
+            quiet = elapsed < self.slow_seconds / 4 and record_count < self.large_records / 4
+
+            # Adjust at most one step per airport and run, so a single bad day can't collapse the window
+            if airport_icao in self._shrunk:
+                new_size = current
+            elif heavy:
+                new_size = max(current // 2, self.min_minutes)
+                self._shrunk.add(airport_icao)
+            elif quiet:
+                new_size = min(current * 2, MAX_WINDOW_MINUTES)
+            else:
+                new_size = current
+
+            if new_size != current:
+                logging.info(f"Window size for {airport_icao} adjusted from {current} to {new_size} minutes.")
+                self._changed.add(airport_icao)
+
+            if new_size == MAX_WINDOW_MINUTES:
+                self._hints.pop(airport_icao, None)
+            else:
+                self._hints[airport_icao] = new_size